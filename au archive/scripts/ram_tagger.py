@@ -12,8 +12,27 @@ Usage:
     python scripts/ram_tagger.py --image /path/to/image.jpg --device mps
     python scripts/ram_tagger.py --image /path/to/image.jpg --threshold 0.5 --max-tags 30
 
+    # Batch: load the model once, tag a directory or glob
+    python scripts/ram_tagger.py --images /path/to/dir "/path/to/shoot/**/*.jpg"
+
+    # Zero-shot labels from a file (RAM-HF fallback); label embeddings are
+    # cached in ~/.cache/ram_tagger (or RAM_TAGGER_CACHE_DIR)
+    python scripts/ram_tagger.py --image /path/to/image.jpg --vocabulary scripts/vocabularies/wedding.txt
+
+    # Daemon: keep the model resident, one JSON request per stdin line
+    python scripts/ram_tagger.py --serve --workers 4
+    {"id": "1", "image": "/path/to/image.jpg", "threshold": 0.6, "max_tags": 20}
+
 Output:
-    JSON to stdout: {"tags": [...], "confidence": {...}, "duration_ms": 123}
+    --image: JSON to stdout:
+        {"tags": [...], "confidence": {...}, "duration_ms": 123,
+         "load_ms": 100, "inference_ms": 23}
+    --images / --serve: JSONL to stdout, flushed line by line. First a ready
+    line with the model load time, then one result per image as it finishes:
+        {"event": "ready", "model": "ram++", "device": "mps", "load_ms": 4200}
+        {"id": "1", "image": "...", "tags": [...], "confidence": {...}, "inference_ms": 180}
+    A failed image gets {"image": "...", "error": "...", "tags": []} and
+    the run continues.
 
 Requirements:
     pip install torch torchvision pillow
@@ -24,10 +43,15 @@ Requirements:
 """
 
 import argparse
+import glob
+import hashlib
+import io
 import json
 import os
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Suppress warnings
@@ -35,6 +59,26 @@ os.environ['PYTORCH_ENABLE_MPS_FALLBACK'] = '1'
 import warnings
 warnings.filterwarnings('ignore')
 
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.tif', '.tiff', '.bmp'}
+
+# Zero-shot labels for the RAM-HF fallback (abandoned places). Pass
+# --vocabulary for other footage, e.g. vocabularies/wedding.txt
+DEFAULT_VOCABULARY = [
+    "abandoned building", "factory", "hospital", "school", "church",
+    "decay", "ruins", "graffiti", "broken windows", "overgrown",
+    "industrial", "warehouse", "brick", "concrete", "machinery",
+    "interior", "exterior", "hallway", "staircase", "roof",
+    "urban exploration", "urbex", "derelict", "dilapidated",
+    "nature reclaiming", "peeling paint", "rusty", "empty room",
+    "old building", "historic", "vintage", "retro"
+]
+
+# Encoded label matrices, one file per model and vocabulary
+LABEL_CACHE_DIR = Path(os.environ.get('RAM_TAGGER_CACHE_DIR', Path.home() / '.cache/ram_tagger')) / 'label_embeddings'
+
+_label_embeddings = {}  # cache key -> normalized label embeddings on the device
+_label_embeddings_lock = threading.Lock()
+
 
 def load_ram_model(device: str, model_path: str | None = None):
     """
@@ -118,46 +162,65 @@ def load_ram_model(device: str, model_path: str | None = None):
     )
 
 
+def ram_plus_scores(model, image_tensor):
+    """
+    Per-class sigmoid scores from RAM++, without thresholding.
+
+    Mirrors RamPlus.generate_tag() up to its logits but only reads model
+    attributes, so one resident model can serve concurrent calls with
+    different thresholds. Returns a (batch, num_class) tensor.
+    """
+    import torch
+    import torch.nn.functional as F
+
+    image_embeds = model.image_proj(model.visual_encoder(image_tensor))
+    image_atts = torch.ones(image_embeds.size()[:-1], dtype=torch.long, device=image_tensor.device)
+
+    image_cls_embeds = image_embeds[:, 0, :]
+    image_cls_embeds = image_cls_embeds / image_cls_embeds.norm(dim=-1, keepdim=True)
+    batch_size = image_embeds.shape[0]
+    des_per_class = int(model.label_embed.shape[0] / model.num_class)
+
+    # Reweight each class's description embeddings by their image similarity
+    logits_per_image = model.reweight_scale.exp() * image_cls_embeds @ model.label_embed.t()
+    weights = F.softmax(logits_per_image.view(batch_size, -1, des_per_class), dim=2)
+    descriptions = model.label_embed.view(-1, des_per_class, model.label_embed.shape[-1])
+    label_embed_reweight = torch.einsum('bcd,cde->bce', weights, descriptions)
+    label_embed = F.relu(model.wordvec_proj(label_embed_reweight))
+
+    tagging_embed = model.tagging_head(
+        encoder_embeds=label_embed,
+        encoder_hidden_states=image_embeds,
+        encoder_attention_mask=image_atts,
+        return_dict=False,
+        mode='tagging',
+    )
+    logits = model.fc(tagging_embed[0]).squeeze(-1)
+    return torch.sigmoid(logits)
+
+
 def tag_with_ram(model, transform, image_path: str, device: str, threshold: float, max_tags: int):
     """Tag image using original RAM++ model."""
     import torch
     from PIL import Image
 
-    # Apply threshold to model BEFORE inference
-    # Both global and per-class thresholds need to be set
-    original_threshold = model.threshold
-    original_class_threshold = model.class_threshold.clone()
-
-    model.threshold = threshold
-    # Force ALL class thresholds to the specified value for more tags
-    model.class_threshold = torch.ones_like(model.class_threshold) * threshold
-
     # Load and transform image
     image = Image.open(image_path).convert('RGB')
     image_tensor = transform(image).unsqueeze(0).to(device)
 
-    # Run inference using model's generate_tag directly
-    with torch.no_grad():
-        tags_list, tags_zh_list = model.generate_tag(image_tensor)
-
-    # Restore original thresholds
-    model.threshold = original_threshold
-    model.class_threshold = original_class_threshold
+    # Threshold the raw scores here instead of setting model.threshold /
+    # model.class_threshold, which would race between concurrent requests
+    with torch.inference_mode():
+        scores = ram_plus_scores(model, image_tensor)[0].float().cpu()
+    scores[list(model.delete_tag_index)] = 0.0
 
-    # Parse results - RAM++ returns pipe-separated tags
-    tags_en = tags_list[0] if tags_list else ""
-    tag_list = [t.strip() for t in tags_en.split(' | ') if t.strip()]
+    keep = torch.nonzero(scores >= threshold).flatten()
+    keep = keep[torch.argsort(scores[keep], descending=True)][:max_tags]
 
-    confidence_dict = {}
-    filtered_tags = []
+    tags = [str(model.tag_list[i]) for i in keep.tolist()]
+    confidence_dict = {tag: round(float(scores[i]), 3) for tag, i in zip(tags, keep.tolist())}
 
-    # RAM++ doesn't return per-tag confidence, assign high confidence
-    for tag in tag_list:
-        if tag and len(filtered_tags) < max_tags:
-            filtered_tags.append(tag)
-            confidence_dict[tag] = 0.9  # High confidence for RAM++ tags
-
-    return filtered_tags, confidence_dict
+    return tags, confidence_dict
 
 
 def tag_with_blip(model_tuple, image_path: str, device: str, threshold: float, max_tags: int):
@@ -194,33 +257,97 @@ def tag_with_blip(model_tuple, image_path: str, device: str, threshold: float, m
     return tags, confidence_dict
 
 
-def tag_with_ram_hf(model_tuple, image_path: str, device: str, threshold: float, max_tags: int):
+def load_vocabulary(path: str) -> list[str]:
+    """
+    Zero-shot labels from a file.
+
+    Text files hold one label per line ('#' starts a comment). JSON files
+    hold a list of labels or an object of {group: [labels]}.
+    """
+    text = Path(path).read_text(encoding='utf-8')
+    if Path(path).suffix.lower() == '.json':
+        data = json.loads(text)
+        groups = data.values() if isinstance(data, dict) else [data]
+        labels = [str(label).strip() for group in groups for label in group]
+    else:
+        labels = [line.split('#', 1)[0].strip() for line in text.splitlines()]
+    labels = list(dict.fromkeys(label for label in labels if label))
+    if not labels:
+        raise ValueError(f"No labels in vocabulary file: {path}")
+    return labels
+
+
+def _features(output):
+    """Embedding tensor from get_*_features() (a tensor, or a pooled output on transformers 5)."""
+    return output if hasattr(output, 'shape') else output.pooler_output
+
+
+def label_embeddings(model, processor, labels: list[str], device: str):
+    """
+    Normalized text embeddings of the labels, encoded once per model and vocabulary.
+
+    Kept in memory for the life of the process and on disk in
+    LABEL_CACHE_DIR, keyed by a hash of the model name and the labels.
+    """
+    import torch
+    import torch.nn.functional as F
+
+    model_id = getattr(model.config, '_name_or_path', '') or type(model).__name__
+    key = hashlib.sha256(json.dumps([model_id, labels]).encode('utf-8')).hexdigest()[:16]
+
+    with _label_embeddings_lock:
+        if key in _label_embeddings:
+            return _label_embeddings[key]
+
+        path = LABEL_CACHE_DIR / f"{key}.pt"
+        embeds = None
+        if path.exists():
+            try:
+                embeds = torch.load(path, map_location='cpu')
+            except Exception as e:
+                print(f"Ignoring unreadable label cache {path}: {e}", file=sys.stderr)
+        if embeds is None or embeds.shape[0] != len(labels):
+            inputs = processor(text=labels, return_tensors="pt", padding=True)
+            inputs = {k: v.to(device) for k, v in inputs.items()}
+            with torch.inference_mode():
+                embeds = F.normalize(_features(model.get_text_features(**inputs)).float(), dim=-1).cpu()
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                torch.save(embeds, path)
+            except OSError as e:
+                print(f"Could not write label cache {path}: {e}", file=sys.stderr)
+
+        _label_embeddings[key] = embeds.to(device)
+        return _label_embeddings[key]
+
+
+def tag_with_ram_hf(model_tuple, image_path: str, device: str, threshold: float, max_tags: int,
+                    labels: list[str] | None = None):
     """Tag image using RAM from HuggingFace transformers."""
     import torch
+    import torch.nn.functional as F
     from PIL import Image
 
     model, processor = model_tuple
     image = Image.open(image_path).convert('RGB')
-
-    # Common tag candidates for abandoned places
-    candidate_labels = [
-        "abandoned building", "factory", "hospital", "school", "church",
-        "decay", "ruins", "graffiti", "broken windows", "overgrown",
-        "industrial", "warehouse", "brick", "concrete", "machinery",
-        "interior", "exterior", "hallway", "staircase", "roof",
-        "urban exploration", "urbex", "derelict", "dilapidated",
-        "nature reclaiming", "peeling paint", "rusty", "empty room",
-        "old building", "historic", "vintage", "retro"
-    ]
-
-    inputs = processor(images=image, text=candidate_labels, return_tensors="pt", padding=True)
-    inputs = {k: v.to(device) for k, v in inputs.items()}
-
-    with torch.no_grad():
-        outputs = model(**inputs)
+    candidate_labels = labels or DEFAULT_VOCABULARY
+
+    if hasattr(model, 'get_text_features') and hasattr(model, 'logit_scale'):
+        # Labels come from the cache: only the image encoder runs per image
+        text_embeds = label_embeddings(model, processor, candidate_labels, device)
+        inputs = processor(images=image, return_tensors="pt")
+        inputs = {k: v.to(device) for k, v in inputs.items()}
+        with torch.inference_mode():
+            image_embeds = F.normalize(_features(model.get_image_features(**inputs)).float(), dim=-1)
+            logits_per_image = model.logit_scale.exp().float() * image_embeds @ text_embeds.t()
+    else:
+        inputs = processor(images=image, text=candidate_labels, return_tensors="pt", padding=True)
+        inputs = {k: v.to(device) for k, v in inputs.items()}
+        with torch.no_grad():
+            logits_per_image = model(**inputs).logits_per_image
 
     # Get probabilities
-    probs = outputs.logits_per_image.softmax(dim=1)[0]
+    probs = logits_per_image.softmax(dim=1)[0]
 
     # Filter and sort by confidence
     results = []
@@ -238,9 +365,154 @@ def tag_with_ram_hf(model_tuple, image_path: str, device: str, threshold: float,
     return tags, confidence_dict
 
 
+def resolve_device(device: str) -> str:
+    """Fall back to CPU when the requested accelerator is missing."""
+    import torch
+
+    if device == "mps" and not torch.backends.mps.is_available():
+        print("MPS not available, falling back to CPU", file=sys.stderr)
+        return "cpu"
+    if device == "cuda" and not torch.cuda.is_available():
+        print("CUDA not available, falling back to CPU", file=sys.stderr)
+        return "cpu"
+    return device
+
+
+def load_model_quietly(device: str, model_path: str | None = None):
+    """load_ram_model() with library stdout sent to stderr, keeping JSON output clean."""
+    old_stdout = sys.stdout
+    sys.stdout = io.StringIO()  # Capture any stdout during model loading
+    try:
+        return load_ram_model(device, model_path)
+    finally:
+        captured = sys.stdout.getvalue()
+        sys.stdout = old_stdout
+        if captured.strip():
+            print(captured.strip(), file=sys.stderr)  # Redirect to stderr
+
+
+def tag_image(model_data, transform, model_type: str, image_path: str, device: str,
+              threshold: float, max_tags: int, labels: list[str] | None = None):
+    """Tag one image with whichever model load_ram_model() returned."""
+    if model_type == 'ram++':
+        return tag_with_ram(model_data, transform, image_path, device, threshold, max_tags)
+    if model_type == 'blip':
+        return tag_with_blip(model_data, image_path, device, threshold, max_tags)
+    if model_type == 'ram-hf':
+        return tag_with_ram_hf(model_data, image_path, device, threshold, max_tags, labels)
+    raise RuntimeError(f"Unknown model type: {model_type}")
+
+
+def expand_images(patterns: list[str]) -> list[str]:
+    """Image files from directories (non-recursive) and glob patterns, in order."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(str(p) for p in Path(pattern).iterdir())
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+        paths.extend(p for p in matches if Path(p).suffix.lower() in IMAGE_EXTENSIONS and os.path.isfile(p))
+    return list(dict.fromkeys(paths))
+
+
+def read_requests(stream):
+    """
+    Tagging requests from JSONL lines.
+
+    Each line is an object with "image" and optional "id", "threshold" and
+    "max_tags", or a bare image path. Blank lines are skipped.
+    """
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('{'):
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"error": f"Invalid request: {e}"}
+        else:
+            yield {"image": line}
+
+
+def write_line(result: dict):
+    """One JSONL line, flushed so the caller sees it immediately."""
+    sys.stdout.write(json.dumps(result) + "\n")
+    sys.stdout.flush()
+
+
+def run_resident(args, requests) -> int:
+    """
+    Load the model once and tag every request as it arrives.
+
+    Writes a ready line with the load time, then one result line per
+    image as it finishes; with --workers above 1 that may be out of
+    request order (match on "id" or "image"). Returns the number of
+    failed images.
+    """
+    load_start = time.time()
+    try:
+        device = resolve_device(args.device)
+        model_data, transform, model_type = load_model_quietly(device, args.model)
+    except Exception as e:
+        write_line({"event": "error", "error": str(e), "load_ms": round((time.time() - load_start) * 1000, 2)})
+        return -1
+    load_ms = round((time.time() - load_start) * 1000, 2)
+    if args.output == "json":
+        write_line({"event": "ready", "model": model_type, "device": device, "load_ms": load_ms})
+    else:
+        print(f"Loaded {model_type} on {device} in {load_ms:.0f}ms", file=sys.stderr)
+
+    output_lock = threading.Lock()
+
+    def handle(request: dict) -> bool:
+        image_path = request.get("image")
+        result = {"id": request["id"]} if "id" in request else {}
+        result["image"] = image_path
+
+        start_time = time.time()
+        failed = False
+        try:
+            if "error" in request:
+                raise ValueError(request["error"])
+            if not image_path or not Path(image_path).exists():
+                raise FileNotFoundError(f"Image not found: {image_path}")
+            tags, confidence = tag_image(
+                model_data, transform, model_type, image_path, device,
+                float(request.get("threshold", args.threshold)),
+                int(request.get("max_tags", args.max_tags)),
+                args.labels
+            )
+            result.update(tags=tags, confidence=confidence)
+        except Exception as e:
+            failed = True
+            result.update(error=str(e), tags=[], confidence={})
+
+        inference_ms = round((time.time() - start_time) * 1000, 2)
+        result.update(duration_ms=inference_ms, inference_ms=inference_ms, model=model_type, device=device)
+        with output_lock:
+            if args.output == "json":
+                write_line(result)
+            else:
+                print(f"{image_path}: {', '.join(result['tags'])} ({inference_ms:.0f}ms)", flush=True)
+        return failed
+
+    # Inference never mutates the model, so requests share it across threads
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [pool.submit(handle, request) for request in requests]
+    failures = sum(future.result() for future in futures)
+
+    return failures
+
+
 def main():
     parser = argparse.ArgumentParser(description="RAM++ Local Image Tagger")
-    parser.add_argument("--image", "-i", required=True, help="Path to image file")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--image", "-i", help="Path to image file")
+    mode.add_argument("--images", nargs="+", metavar="DIR_OR_GLOB",
+                      help="Directories or glob patterns to tag with one model load (JSONL output)")
+    mode.add_argument("--serve", action="store_true",
+                      help="Keep the model loaded and tag JSONL requests from stdin (JSONL output)")
     parser.add_argument("--device", "-d", default="mps",
                         choices=["mps", "cuda", "cpu"],
                         help="Device for inference (default: mps for Mac)")
@@ -250,11 +522,32 @@ def main():
                         help="Maximum number of tags (default: 30)")
     parser.add_argument("--model", type=str, default=None,
                         help="Path to RAM++ model weights")
+    parser.add_argument("--vocabulary", type=str, default=None,
+                        help="Label file for zero-shot tagging (RAM-HF fallback), e.g. vocabularies/wedding.txt")
+    parser.add_argument("--workers", "-w", type=int, default=1,
+                        help="Concurrent requests on the one loaded model (--images/--serve; default: 1)")
     parser.add_argument("--output", "-o", default="json",
                         choices=["json", "text"],
                         help="Output format (default: json)")
     args = parser.parse_args()
 
+    try:
+        args.labels = load_vocabulary(args.vocabulary) if args.vocabulary else None
+    except (OSError, ValueError) as e:
+        print(json.dumps({"error": f"Could not load vocabulary: {e}"}))
+        sys.exit(1)
+
+    if args.serve:
+        failures = run_resident(args, read_requests(sys.stdin))
+        sys.exit(1 if failures < 0 else 0)
+    if args.images:
+        paths = expand_images(args.images)
+        if not paths:
+            print(json.dumps({"error": f"No images match: {' '.join(args.images)}"}))
+            sys.exit(1)
+        failures = run_resident(args, ({"image": p} for p in paths))
+        sys.exit(1 if failures else 0)
+
     # Validate image exists
     if not Path(args.image).exists():
         print(json.dumps({"error": f"Image not found: {args.image}"}))
@@ -263,54 +556,24 @@ def main():
     start_time = time.time()
 
     try:
-        import torch
-
-        # Check device availability
-        device = args.device
-        if device == "mps" and not torch.backends.mps.is_available():
-            print("MPS not available, falling back to CPU", file=sys.stderr)
-            device = "cpu"
-        elif device == "cuda" and not torch.cuda.is_available():
-            print("CUDA not available, falling back to CPU", file=sys.stderr)
-            device = "cpu"
-
-        # Load model (suppress library stdout during loading to keep JSON output clean)
-        import io
-        old_stdout = sys.stdout
-        sys.stdout = io.StringIO()  # Capture any stdout during model loading
-        try:
-            model_data, transform, model_type = load_ram_model(device, args.model)
-        finally:
-            captured = sys.stdout.getvalue()
-            sys.stdout = old_stdout
-            if captured.strip():
-                print(captured.strip(), file=sys.stderr)  # Redirect to stderr
-
-        # Run inference based on model type
-        if model_type == 'ram++':
-            tags, confidence = tag_with_ram(
-                model_data, transform, args.image, device,
-                args.threshold, args.max_tags
-            )
-        elif model_type == 'blip':
-            tags, confidence = tag_with_blip(
-                model_data, args.image, device,
-                args.threshold, args.max_tags
-            )
-        elif model_type == 'ram-hf':
-            tags, confidence = tag_with_ram_hf(
-                model_data, args.image, device,
-                args.threshold, args.max_tags
-            )
-        else:
-            raise RuntimeError(f"Unknown model type: {model_type}")
-
+        device = resolve_device(args.device)
+        model_data, transform, model_type = load_model_quietly(device, args.model)
+        load_ms = (time.time() - start_time) * 1000
+
+        inference_start = time.time()
+        tags, confidence = tag_image(
+            model_data, transform, model_type, args.image, device,
+            args.threshold, args.max_tags, args.labels
+        )
+        inference_ms = (time.time() - inference_start) * 1000
         duration_ms = (time.time() - start_time) * 1000
 
         result = {
             "tags": tags,
             "confidence": confidence,
             "duration_ms": round(duration_ms, 2),
+            "load_ms": round(load_ms, 2),
+            "inference_ms": round(inference_ms, 2),
             "model": model_type,
             "device": device,
         }
@@ -319,7 +582,7 @@ def main():
             print(json.dumps(result))
         else:
             print(f"Tags: {', '.join(tags)}")
-            print(f"Duration: {duration_ms:.0f}ms")
+            print(f"Duration: {duration_ms:.0f}ms (load {load_ms:.0f}ms, inference {inference_ms:.0f}ms)")
 
     except Exception as e:
         error_result = {
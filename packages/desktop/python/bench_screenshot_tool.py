@@ -0,0 +1,961 @@
+#!/usr/bin/env python3
+"""
+Screenshot Tool Benchmarks
+
+Micro-benchmarks for the performance-sensitive parts of the pipeline.
+Synthetic clips are generated with FFmpeg to mimic our camera formats;
+pass --video to benchmark real footage instead.
+
+Usage:
+    cd packages/desktop/python
+    source venv/bin/activate
+    python bench_screenshot_tool.py opencv-extract
+    python bench_screenshot_tool.py opencv-extract --video /path/to/clip.mp4
+    python bench_screenshot_tool.py lut --lut /path/to/look.cube
+    python bench_screenshot_tool.py cut-detect
+    python bench_screenshot_tool.py scene-parallel --workers 1 2 4 8
+    python bench_screenshot_tool.py quality
+    python bench_screenshot_tool.py nima --nima screenshot_tool/models/nima.onnx
+    python bench_screenshot_tool.py budget --video /path/to/ceremony.mp4 --budgets 1 2 3
+    python bench_screenshot_tool.py faces --video /path/to/reception.mp4 --batch-sizes 8 32 64
+    python bench_screenshot_tool.py face-store
+    python bench_screenshot_tool.py tagging --ram screenshot_tool/models/ram_plus_swin_large_14m.pth --batch-sizes 1 8 16
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List
+
+DEFAULT_LUT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '..', 'resources', 'luts', 'XH2S_FLog2_FGamut_to_WDR_BT.709_33grid.cube'
+)
+
+# Synthetic stand-ins for our camera formats: (codec args, GOP in seconds)
+CAMERA_FORMATS = {
+    'h264_all_intra': (['-c:v', 'libx264', '-pix_fmt', 'yuv420p'], 0),
+    'h264_long_gop': (['-c:v', 'libx264', '-pix_fmt', 'yuv420p'], 1.0),
+    'h265_long_gop': (['-c:v', 'libx265', '-pix_fmt', 'yuv420p10le'], 2.0),
+}
+
+
+def print_header(title: str):
+    """Print benchmark section header."""
+    print("\n" + "=" * 60)
+    print(title)
+    print("=" * 60)
+
+
+def make_synthetic_clip(
+    output_path: str,
+    codec_args: List[str],
+    gop_seconds: float,
+    width: int = 1280,
+    height: int = 720,
+    fps: int = 24,
+    duration: float = 20.0
+) -> bool:
+    """Encode a moving test pattern with the given codec and GOP length."""
+    gop = max(1, int(gop_seconds * fps))
+    cmd = [
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', f'testsrc2=size={width}x{height}:rate={fps}',
+        '-t', str(duration),
+        *codec_args,
+        '-g', str(gop),
+    ]
+    if 'libx265' in codec_args:
+        cmd += ['-x265-params', f'keyint={gop}:min-keyint={gop}:log-level=error']
+    cmd.append(output_path)
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"  Could not encode {output_path}: {result.stderr.strip()[:200]}")
+        return False
+    return True
+
+
+def get_clips(args, work_dir: str) -> Dict[str, str]:
+    """Return {label: path} for the clips to benchmark."""
+    if args.video:
+        return {os.path.basename(v): v for v in args.video}
+
+    clips = {}
+    for name, (codec_args, gop_seconds) in CAMERA_FORMATS.items():
+        path = os.path.join(work_dir, f'{name}.mp4')
+        if make_synthetic_clip(path, codec_args, gop_seconds, duration=args.duration):
+            clips[name] = path
+    return clips
+
+
+# Edit-like test clip: (lavfi source, seconds, transition into the next shot).
+# Transitions are 'cut' or an xfade name; 'flash' adds a 2-frame camera
+# flash mid-shot, which must not be reported as a boundary.
+CUT_TEST_SHOTS = [
+    ('testsrc2', 3.0, 'cut'),
+    ('smptebars', 2.5, 'fade'),
+    ('mandelbrot', 3.0, 'cut'),
+    ('life=mold=10:ratio=0.5', 2.0, 'fadeblack'),
+    ('rgbtestsrc', 2.5, 'cut'),
+    ('cellauto=rule=110', 3.0, 'dissolve'),
+    ('testsrc2', 3.0, 'flash'),
+    ('gradients=speed=0.05', 3.0, None),
+]
+CUT_TEST_FADE_SECONDS = 1.0
+
+
+def make_cut_test_clip(output_path: str, width: int = 640, height: int = 360, fps: int = 24) -> List[tuple]:
+    """
+    Encode CUT_TEST_SHOTS into one clip.
+
+    Returns:
+        Ground-truth transitions as (first_frame, end_frame) pairs, end
+        exclusive; hard cuts have first == end
+    """
+    inputs, filters, truth = [], [], []
+
+    for i, (source, seconds, _) in enumerate(CUT_TEST_SHOTS):
+        separator = ':' if '=' in source else '='
+        inputs += ['-f', 'lavfi', '-i', f'{source}{separator}size={width}x{height}:rate={fps}']
+        filters.append(f"[{i}:v]trim=duration={seconds},setpts=PTS-STARTPTS,fps={fps},format=yuv420p,settb=1/{fps}[s{i}]")
+
+    current, length = 's0', 0
+    fade_frames = int(CUT_TEST_FADE_SECONDS * fps)
+
+    for i, (_, seconds, transition) in enumerate(CUT_TEST_SHOTS[:-1]):
+        if length == 0:
+            length = int(seconds * fps)
+        following = f's{i + 1}'
+        next_frames = int(CUT_TEST_SHOTS[i + 1][1] * fps)
+
+        if transition in ('cut', 'flash'):
+            if transition == 'flash':
+                flash = length + next_frames // 2
+                filters.append(f"[{following}]lutyuv=y=255:enable='between(n,{next_frames // 2},{next_frames // 2 + 1})'[f{i}]")
+                following = f'f{i}'
+            filters.append(f"[{current}][{following}]concat=n=2:v=1,fps={fps},settb=1/{fps}[c{i}]")
+            truth.append((length, length))
+            length += next_frames
+        else:
+            offset = (length - fade_frames) / fps
+            filters.append(
+                f"[{current}][{following}]xfade=transition={transition}:"
+                f"duration={CUT_TEST_FADE_SECONDS}:offset={offset},fps={fps},settb=1/{fps}[c{i}]"
+            )
+            truth.append((length - fade_frames, length))
+            length += next_frames - fade_frames
+        current = f'c{i}'
+
+    cmd = [
+        'ffmpeg', '-y', '-v', 'error', *inputs,
+        '-filter_complex', ';'.join(filters), '-map', f'[{current}]',
+        '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-g', str(fps), output_path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"  Could not encode {output_path}: {result.stderr.strip()[:300]}")
+        return []
+    return truth
+
+
+def score_boundaries(found: List[tuple], truth: List[tuple], tolerance: int = 2) -> Dict[str, float]:
+    """Precision/recall of detected transitions against ground truth."""
+    def matches(a, b):
+        return a[0] - tolerance <= b[1] and b[0] - tolerance <= a[1]
+
+    hits = sum(1 for t in truth if any(matches(f, t) for f in found))
+    correct = sum(1 for f in found if any(matches(f, t) for t in truth))
+    return {
+        'recall': hits / len(truth) if truth else 1.0,
+        'precision': correct / len(found) if found else 1.0,
+    }
+
+
+def scenes_to_transitions(scenes: List[tuple]) -> List[tuple]:
+    """Gaps between consecutive (start, end) scenes as (first, end) transitions."""
+    return [(prev_end + 1, start) for (_, prev_end), (start, _) in zip(scenes, scenes[1:])]
+
+
+def bench_cut_detect(args):
+    """CPU cut detector vs TransNetV2 and ground truth on edited test clips."""
+    import cv2
+    from screenshot_tool.cut_detector import FastCutDetector
+    from screenshot_tool.pipeline import SceneDetector
+
+    print_header("Scene detection: fast CPU detector vs TransNetV2")
+
+    work_dir = tempfile.mkdtemp(prefix='bench_cuts_')
+    try:
+        clips = {}
+        for label, (width, height) in [('edit_360p', (640, 360)), ('edit_1080p', (1920, 1080))]:
+            path = os.path.join(work_dir, f'{label}.mp4')
+            truth = make_cut_test_clip(path, width, height)
+            if truth:
+                clips[label] = (path, truth)
+        for video in args.video or []:
+            clips[os.path.basename(video)] = (video, None)
+
+        transnet = SceneDetector(device='cpu')
+        transnet.load()
+
+        for label, (path, truth) in clips.items():
+            cap = cv2.VideoCapture(path)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 24.0
+            duration = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) / fps
+            cap.release()
+
+            print(f"\n{label}: {duration:.1f} s")
+            if truth:
+                print(f"  truth:        {truth}")
+
+            results = {}
+            start = time.perf_counter()
+            results['fast (1 thread)'] = FastCutDetector(threads=1).detect(path)
+            timings = {'fast (1 thread)': time.perf_counter() - start}
+
+            if transnet.model is not None:
+                start = time.perf_counter()
+                predictions = transnet._predict_streaming(path)
+                results['transnetv2'] = [tuple(s) for s in transnet.model.predictions_to_scenes(predictions).tolist()]
+                timings['transnetv2'] = time.perf_counter() - start
+
+            for name, scenes in results.items():
+                found = scenes_to_transitions(scenes)
+                line = f"  {name:<16} {timings[name]:>6.2f} s ({duration / timings[name]:>5.1f}x real time)"
+                if truth:
+                    score = score_boundaries(found, truth)
+                    line += f"  recall {score['recall']:.2f}  precision {score['precision']:.2f}"
+                print(line)
+                print(f"    {found}")
+
+            if 'transnetv2' in results:
+                agreement = score_boundaries(
+                    scenes_to_transitions(results['fast (1 thread)']),
+                    scenes_to_transitions(results['transnetv2'])
+                )
+                print(f"  Agreement with TransNetV2: recall {agreement['recall']:.2f}, "
+                      f"precision {agreement['precision']:.2f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_scene_parallel(args):
+    """Chunk-parallel scene detection: scaling from 1 to N worker processes."""
+    import cv2
+    from screenshot_tool.pipeline import SceneDetector
+
+    print_header("Scene detection: chunk-parallel scaling")
+    print(f"\n{os.cpu_count()} CPU cores available")
+
+    work_dir = tempfile.mkdtemp(prefix='bench_scene_parallel_')
+    try:
+        if args.video:
+            clips = {os.path.basename(v): v for v in args.video}
+        else:
+            # Loop the edited test clip into a long recording
+            edit_path = os.path.join(work_dir, 'edit.mp4')
+            long_path = os.path.join(work_dir, 'long.mp4')
+            make_cut_test_clip(edit_path)
+            cap = cv2.VideoCapture(edit_path)
+            edit_seconds = cap.get(cv2.CAP_PROP_FRAME_COUNT) / (cap.get(cv2.CAP_PROP_FPS) or 24.0)
+            cap.release()
+            # Chunks are at least SceneDetector.MIN_CHUNK_FRAMES, so use 10+ minutes
+            loops = max(1, int(max(args.duration, 600) / edit_seconds))
+            subprocess.run([
+                'ffmpeg', '-y', '-v', 'error', '-stream_loop', str(loops - 1), '-i', edit_path,
+                '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-g', '24', long_path
+            ], check=True)
+            clips = {f'edit x{loops}': long_path}
+
+        detector = SceneDetector(device='cpu')
+        detector.load()
+        modes = ['fast']
+        if detector.model is not None:
+            modes.append('transnetv2')
+
+        for label, path in clips.items():
+            print(f"\n{label}")
+            print(f"  {'mode':<12} {'workers':>7} {'time (s)':>9} {'speedup':>8}  matches 1 worker")
+
+            for mode in modes:
+                baseline, reference = None, None
+                for workers in args.workers:
+                    start = time.perf_counter()
+                    if mode == 'fast':
+                        result = detector._fallback_detect(path, workers=workers)
+                    else:
+                        result = detector.predict(path, workers=workers)
+                    elapsed = time.perf_counter() - start
+
+                    if baseline is None:
+                        baseline, reference = elapsed, result
+                    same = result == reference if mode == 'fast' else bool((result == reference).all())
+                    print(f"  {mode:<12} {workers:>7} {elapsed:>9.2f} {baseline / elapsed:>7.2f}x  {same}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_opencv_extract(args):
+    """Seek vs sequential OpenCV extraction across candidate spacings."""
+    import cv2
+    from screenshot_tool.pipeline import ScreenshotPipeline
+
+    print_header("OpenCV extraction: seek vs sequential")
+
+    pipeline = ScreenshotPipeline(device='cpu')
+    work_dir = tempfile.mkdtemp(prefix='bench_extract_')
+
+    try:
+        for label, path in get_clips(args, work_dir).items():
+            cap = cv2.VideoCapture(path)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 24.0
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+
+            gop = pipeline._estimate_gop_frames(path, fps)
+            print(f"\n{label}: {total} frames @ {fps:.2f} fps, GOP ~{gop} frames")
+            print(f"  {'spacing':>8} {'frames':>7} {'seek (s)':>9} {'seq (s)':>9} {'auto (s)':>9}")
+
+            seek_wins = {}
+            for spacing in args.spacings:
+                frame_numbers = list(range(0, total, spacing))[:args.max_frames]
+                frame_to_scene = {n: 0 for n in frame_numbers}
+                timings = {}
+
+                for strategy in ['seek', 'sequential', 'auto']:
+                    out_dir = os.path.join(work_dir, f'{label}_{strategy}_{spacing}')
+                    os.makedirs(out_dir, exist_ok=True)
+                    start = time.perf_counter()
+                    pipeline._extract_frames_opencv(
+                        path, frame_numbers, frame_to_scene, out_dir, fps, strategy=strategy
+                    )
+                    timings[strategy] = time.perf_counter() - start
+                    shutil.rmtree(out_dir, ignore_errors=True)
+
+                seek_wins[spacing] = timings['seek'] < timings['sequential']
+
+                print(f"  {spacing:>8} {len(frame_numbers):>7} {timings['seek']:>9.2f} "
+                      f"{timings['sequential']:>9.2f} {timings['auto']:>9.2f}")
+
+            # Crossover: smallest spacing from which seeking wins at every larger one
+            crossover = None
+            for spacing in sorted(seek_wins, reverse=True):
+                if not seek_wins[spacing]:
+                    break
+                crossover = spacing
+
+            if crossover:
+                print(f"  Seeking wins from spacing >= {crossover} frames ({crossover / gop:.1f}x GOP)")
+            else:
+                print("  Sequential wins at every tested spacing")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_lut(args):
+    """In-process .cube application: parity with FFmpeg lut3d and per-frame cost."""
+    import numpy as np
+    from screenshot_tool.lut import load_cube
+
+    print_header("3D LUT: in-process vs FFmpeg lut3d")
+
+    lut_path = args.lut or DEFAULT_LUT
+    start = time.perf_counter()
+    lut = load_cube(lut_path)
+    print(f"\n{os.path.basename(lut_path)}: {lut.size}^3 lattice, parsed in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    lut._dense_table()
+    print(f"  Dense 8-bit table baked in {time.perf_counter() - start:.2f} s (once per LUT)")
+
+    # Parity on identical RGB input (covers the whole 8-bit cube sparsely)
+    rng = np.random.default_rng(0)
+    height, width = 360, 640
+    rgb = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    for interpolation in ['tetrahedral', 'trilinear']:
+        result = subprocess.run(
+            ['ffmpeg', '-v', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+             '-s', f'{width}x{height}', '-i', '-',
+             '-vf', f"lut3d=file='{lut_path}':interp={interpolation}",
+             '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-'],
+            input=rgb.tobytes(), capture_output=True
+        )
+        if result.returncode != 0:
+            print(f"  FFmpeg lut3d failed: {result.stderr.decode()[:200]}")
+            continue
+        reference = np.frombuffer(result.stdout, np.uint8).reshape(rgb.shape).astype(int)
+        ours = lut.apply(np.ascontiguousarray(rgb[..., ::-1]), interpolation)[..., ::-1].astype(int)
+        diff = np.abs(reference - ours)
+        print(f"  {interpolation:>12}: max diff {diff.max()} code values, "
+              f"{(diff > 0).mean() * 100:.4f}% of channels differ")
+
+    # Per-frame cost on smooth gradients (closer to real frames than noise)
+    print(f"\n  {'resolution':>10} {'tetra (ms)':>11} {'trilin (ms)':>12}")
+    for label, (width, height) in [('1080p', (1920, 1080)), ('UHD', (3840, 2160))]:
+        x = np.linspace(0, 255, width, dtype=np.float32)[None, :]
+        y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+        frame = np.stack([np.broadcast_to(x, (height, width)),
+                          np.broadcast_to(y, (height, width)),
+                          np.broadcast_to((x + y) / 2, (height, width))], axis=-1).astype(np.uint8)
+
+        timings = {}
+        for interpolation in ['tetrahedral', 'trilinear']:
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                lut.apply(frame, interpolation)
+            timings[interpolation] = (time.perf_counter() - start) / args.repeats * 1000
+
+        print(f"  {label:>10} {timings['tetrahedral']:>11.1f} {timings['trilinear']:>12.1f}")
+
+
+def bench_quality(args):
+    """Batched quality metrics vs the per-frame float64 Laplacian variance."""
+    import cv2
+    import numpy as np
+    from screenshot_tool.pipeline import QualityFilter, SHARPNESS_REFERENCE_SIZE, fit_long_edge
+
+    print_header("Frame quality: batched metrics vs Laplacian variance")
+
+    def legacy_sharpness(image: np.ndarray) -> float:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        ref_size = fit_long_edge(gray.shape[1], gray.shape[0], SHARPNESS_REFERENCE_SIZE)
+        if ref_size != (gray.shape[1], gray.shape[0]):
+            gray = cv2.resize(gray, ref_size, interpolation=cv2.INTER_AREA)
+        return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+    work_dir = tempfile.mkdtemp(prefix='bench_quality_')
+    try:
+        if args.video:
+            clips = {os.path.basename(v): v for v in args.video}
+        else:
+            clips = {}
+            for label, (width, height) in [('1080p', (1920, 1080)), ('UHD', (3840, 2160))]:
+                path = os.path.join(work_dir, f'{label}.mp4')
+                if make_synthetic_clip(path, CAMERA_FORMATS['h264_all_intra'][0], 0,
+                                       width=width, height=height, duration=2.0):
+                    clips[label] = path
+
+        print(f"\n  {'clip':>12} {'frames':>7} {'laplacian (ms)':>15} {'all metrics (ms)':>17} {'max diff':>9}")
+        for label, path in clips.items():
+            cap = cv2.VideoCapture(path)
+            frames = []
+            while len(frames) < min(args.max_frames, 16):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.append(frame)
+            cap.release()
+            if not frames:
+                continue
+
+            quality_filter = QualityFilter()
+            quality_filter.compute_quality_batch(frames[:1])  # Allocate work buffers
+
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                legacy = [legacy_sharpness(frame) for frame in frames]
+            legacy_ms = (time.perf_counter() - start) / (args.repeats * len(frames)) * 1000
+
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                batch = quality_filter.compute_quality_batch(frames)
+            batch_ms = (time.perf_counter() - start) / (args.repeats * len(frames)) * 1000
+
+            diff = max(abs(q['sharpness'] - s) / max(s, 1e-9) for q, s in zip(batch, legacy))
+            print(f"  {label:>12} {len(frames):>7} {legacy_ms:>15.1f} {batch_ms:>17.1f} {diff:>9.1e}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def make_nima_stand_in(output_path: str) -> bool:
+    """Export an untrained NIMA (MobileNetV2 + 10-bucket softmax) for timing."""
+    try:
+        import torch
+        import torchvision
+    except ImportError as e:
+        print(f"  Need torch and torchvision to build a stand-in NIMA model: {e}")
+        return False
+
+    model = torchvision.models.mobilenet_v2(weights=None)
+    model.classifier = torch.nn.Sequential(
+        torch.nn.Dropout(0.75), torch.nn.Linear(1280, 10), torch.nn.Softmax(dim=1)
+    )
+    model.eval()
+    torch.onnx.export(
+        model, torch.randn(1, 3, 224, 224), output_path,
+        input_names=['image'], output_names=['scores'],
+        dynamic_axes={'image': {0: 'batch'}, 'scores': {0: 'batch'}},
+        opset_version=17, dynamo=False
+    )
+    return True
+
+
+def bench_nima(args):
+    """NIMA throughput through ONNX Runtime at several batch sizes."""
+    import cv2
+    from screenshot_tool.pipeline import QualityFilter
+
+    print_header("NIMA aesthetic scoring: ONNX Runtime CPU batching")
+
+    work_dir = tempfile.mkdtemp(prefix='bench_nima_')
+    try:
+        model_path = args.nima
+        if not model_path:
+            model_path = os.path.join(work_dir, 'nima.onnx')
+            if not make_nima_stand_in(model_path):
+                return
+            print("\nUsing an untrained MobileNetV2 NIMA (same cost as trained weights); pass --nima for a real model")
+
+        clips = get_clips(args, work_dir) if args.video else {}
+        if not clips:
+            path = os.path.join(work_dir, '1080p.mp4')
+            if make_synthetic_clip(path, CAMERA_FORMATS['h264_all_intra'][0], 0,
+                                   width=1920, height=1080, duration=4.0):
+                clips['1080p'] = path
+
+        frames = []
+        for path in clips.values():
+            cap = cv2.VideoCapture(path)
+            while len(frames) < args.max_frames:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.append(frame)
+            cap.release()
+        if not frames:
+            print("  No frames decoded")
+            return
+
+        quality_filter = QualityFilter()
+        quality_filter.load_nima(model_path)
+        if quality_filter.nima_session is None:
+            return
+
+        print(f"\n  {len(frames)} frames at {frames[0].shape[1]}x{frames[0].shape[0]}")
+        print(f"  {'batch':>6} {'frames/s':>9} {'ms/frame':>9}")
+        for batch_size in args.batch_sizes:
+            quality_filter.score_aesthetics(frames[:batch_size], batch_size=batch_size)  # Warm up
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                quality_filter.score_aesthetics(frames, batch_size=batch_size)
+            elapsed = (time.perf_counter() - start) / args.repeats
+            print(f"  {batch_size:>6} {len(frames) / elapsed:>9.1f} {elapsed / len(frames) * 1000:>9.1f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def make_face_stand_ins(model_dir: str) -> bool:
+    """
+    Export untrained stand-ins for the buffalo_l models, for timing.
+
+    Recognition is a ResNet-50 at 112px (like w600k_r50), the landmark and
+    gender/age models are MobileNetV2s at 192px and 96px. The detector is a
+    cheap fixed-anchor stand-in that finds the same five faces in every frame,
+    so detection time is not representative.
+    """
+    try:
+        import torch
+        import torchvision
+    except ImportError as e:
+        print(f"  Need torch and torchvision to build stand-in face models: {e}")
+        return False
+
+    class StandInDetector(torch.nn.Module):
+        """SCRFD output layout: scores, boxes, keypoints for strides 8/16/32."""
+
+        def __init__(self):
+            super().__init__()
+            self.heads = torch.nn.ModuleList(torch.nn.Conv2d(3, 2 * 15, 1) for _ in range(3))
+            # Five faces on the stride-32 grid of a 640x640 input
+            logits = torch.full((20, 20, 2), -10.0)
+            for y, x in [(5, 4), (5, 10), (5, 16), (13, 7), (13, 13)]:
+                logits[y, x, 0] = 10.0
+            self.register_buffer('logits', logits.reshape(-1, 1))
+            self.register_buffer('box', torch.tensor([1.5, 1.8, 1.5, 1.8]))
+            self.register_buffer('kps', torch.tensor([-0.5, -0.4, 0.5, -0.4, 0.0, 0.1, -0.4, 0.8, 0.4, 0.8]))
+
+        def forward(self, x):
+            scores, boxes, kpss = [], [], []
+            for head, stride in zip(self.heads, (8, 16, 32)):
+                out = head(torch.nn.functional.avg_pool2d(x, stride)).permute(0, 2, 3, 1).reshape(-1, 15) * 0.01
+                score = torch.sigmoid(out[:, :1] + (self.logits if stride == 32 else -10.0))
+                scores.append(score)
+                boxes.append(out[:, 1:5] + self.box)
+                kpss.append(out[:, 5:] + self.kps)
+            return tuple(scores + boxes + kpss)
+
+    def export(model, size, path, dynamic=True):
+        model.eval()
+        torch.onnx.export(
+            model, torch.randn(1, 3, size, size), path,
+            input_names=['input.1'], output_names=None if not dynamic else ['output'],
+            dynamic_axes={'input.1': {0: 'batch'}, 'output': {0: 'batch'}} if dynamic else None,
+            opset_version=17, dynamo=False
+        )
+
+    os.makedirs(model_dir, exist_ok=True)
+    export(StandInDetector(), 640, os.path.join(model_dir, 'det_standin.onnx'), dynamic=False)
+    export(torchvision.models.resnet50(weights=None, num_classes=512), 112, os.path.join(model_dir, 'w600k_standin.onnx'))
+    export(torchvision.models.mobilenet_v2(weights=None, num_classes=212), 192, os.path.join(model_dir, '2d106_standin.onnx'))
+    export(torchvision.models.mobilenet_v2(weights=None, num_classes=3309), 192, os.path.join(model_dir, '1k3d68_standin.onnx'))
+    export(torchvision.models.mobilenet_v2(weights=None, width_mult=0.5, num_classes=3), 96,
+           os.path.join(model_dir, 'genderage_standin.onnx'))
+    return True
+
+
+def bench_faces(args):
+    """Batched face analysis vs one InsightFace call per frame."""
+    import cv2
+    import logging
+    import numpy as np
+    from screenshot_tool.pipeline import FaceDetector
+
+    print_header("Face analysis: batched face models vs per-frame InsightFace")
+    logging.getLogger('screenshot_tool').setLevel(logging.WARNING)
+
+    work_dir = tempfile.mkdtemp(prefix='bench_faces_')
+    try:
+        detector = FaceDetector(device='cpu')
+        try:
+            detector.load()
+        except Exception as e:
+            print(f"\n  Could not load buffalo_l: {e}")
+        if detector.app is None:
+            from insightface.app import FaceAnalysis
+            if not make_face_stand_ins(os.path.join(work_dir, 'models', 'standin')):
+                return
+            print("\nbuffalo_l not installed: using untrained stand-ins (see make_face_stand_ins)")
+            detector.app = FaceAnalysis(name='standin', root=work_dir, providers=['CPUExecutionProvider'])
+            detector.app.prepare(ctx_id=-1, det_size=(640, 640))
+
+        clips = get_clips(args, work_dir) if args.video else {}
+        if not clips:
+            path = os.path.join(work_dir, '1080p.mp4')
+            if make_synthetic_clip(path, CAMERA_FORMATS['h264_all_intra'][0], 0,
+                                   width=1920, height=1080, duration=2.0):
+                clips['1080p'] = path
+
+        frames = []
+        for path in clips.values():
+            cap = cv2.VideoCapture(path)
+            while len(frames) < min(args.max_frames, 32):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.append(frame)
+            cap.release()
+        if not frames:
+            print("  No frames decoded")
+            return
+
+        def timed(fn):
+            fn()  # Warm up
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                result = fn()
+            return (time.perf_counter() - start) / args.repeats, result
+
+        per_frame_time, per_frame = timed(lambda: [[detector._face_data(f) for f in detector.app.get(frame)] for frame in frames])
+        face_count = sum(len(faces) for faces in per_frame)
+        print(f"\n  {len(frames)} frames at {frames[0].shape[1]}x{frames[0].shape[0]}, {face_count} faces")
+        print(f"  {'path':>12} {'frames/s':>9} {'ms/face':>8} {'max diff':>9}")
+        print(f"  {'per-frame':>12} {len(frames) / per_frame_time:>9.1f} "
+              f"{per_frame_time / max(1, face_count) * 1000:>8.1f} {'-':>9}")
+
+        for batch_size in args.batch_sizes:
+            elapsed, batched = timed(lambda: detector.detect_batch(frames, batch_size=batch_size))
+            diff = 0.0
+            for a_faces, b_faces in zip(per_frame, batched):
+                if len(a_faces) != len(b_faces):
+                    diff = float('inf')
+                    break
+                for a, b in zip(a_faces, b_faces):
+                    for key in ('bbox', 'landmarks', 'embedding', 'pose'):
+                        if getattr(a, key) is not None:
+                            diff = max(diff, float(np.abs(np.subtract(getattr(a, key), getattr(b, key))).max()))
+                    if (a.age, a.gender) != (b.age, b.gender):
+                        diff = float('inf')
+                    diff = max(diff, abs((a.smile_score or 0.0) - (b.smile_score or 0.0)))
+            print(f"  {'batch ' + str(batch_size):>12} {len(frames) / elapsed:>9.1f} "
+                  f"{elapsed / max(1, face_count) * 1000:>8.1f} {diff:>9.1e}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_face_store(args):
+    """Peak memory and time of per-face lists vs the FaceStore arrays."""
+    import tracemalloc
+    from dataclasses import asdict
+    import numpy as np
+    from screenshot_tool.pipeline import FaceData, FaceStore, FaceRecord, FrameCandidate
+
+    print_header("Face representation: FaceData lists vs FaceStore arrays")
+
+    frames, per_frame, keep_every = 2000, 4, 10
+    rng = np.random.default_rng(0)
+    count = frames * per_frame
+    embeddings = rng.normal(size=(count, 512)).astype(np.float32)
+    bboxes = rng.uniform(0, 1000, size=(count, 4)).astype(np.float32)
+    kpss = rng.uniform(0, 1000, size=(count, 5, 2)).astype(np.float32)
+    poses = rng.normal(size=(count, 3)).astype(np.float32)
+
+    def candidate(frame: int, faces: list) -> FrameCandidate:
+        return FrameCandidate(frame_number=frame, timestamp=frame / 24, image_path='', sharpness_score=100.0, faces=faces)
+
+    def lists():
+        # Previous representation: FaceData lists, asdict() copies, np.array per face
+        candidates, vectors = [], []
+        for frame in range(frames):
+            faces = []
+            for i in range(frame * per_frame, (frame + 1) * per_frame):
+                faces.append(FaceData(
+                    bbox=bboxes[i].tolist(), confidence=0.9, landmarks=kpss[i].tolist(),
+                    embedding=embeddings[i].tolist(), age=30, gender='F', pose=poses[i].tolist(), smile_score=0.5
+                ).to_dict())
+            candidates.append(asdict(candidate(frame, faces)))
+        for c in candidates:
+            vectors.extend(np.array(f['embedding']) for f in c['faces'])
+        matrix = np.array(vectors)
+        start = time.perf_counter()
+        text = json.dumps(candidates[::keep_every])
+        return matrix.shape, time.perf_counter() - start, len(text)
+
+    def store():
+        face_store = FaceStore()
+        candidates, rows = [], []
+        for frame in range(frames):
+            faces = [
+                face_store.add(bbox=bboxes[i], confidence=0.9, landmarks=kpss[i], embedding=embeddings[i],
+                               age=30, gender=0, pose=poses[i], smile_score=0.5)
+                for i in range(frame * per_frame, (frame + 1) * per_frame)
+            ]
+            candidates.append(candidate(frame, faces).to_dict())
+        for c in candidates:
+            rows.extend(f.index for f in c['faces'])
+        matrix = face_store.embeddings(rows)
+        start = time.perf_counter()
+        selected = candidates[::keep_every]
+        for c in selected:
+            c['faces'] = [f.to_dict() if isinstance(f, FaceRecord) else f for f in c['faces']]
+        text = json.dumps(selected)
+        return matrix.shape, time.perf_counter() - start, len(text)
+
+    print(f"\n  {count} faces in {frames} candidates, 1 in {keep_every} serialized")
+    print(f"  {'representation':>15} {'peak MB':>8} {'build (s)':>10} {'serialize (s)':>14} {'JSON MB':>8}")
+    for label, build in [('FaceData lists', lists), ('FaceStore', store)]:
+        start = time.perf_counter()
+        shape, serialize, size = build()
+        total = time.perf_counter() - start
+
+        # Separate pass: tracing allocations slows the build several times over
+        tracemalloc.start()
+        build()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {label:>15} {peak / 2**20:>8.1f} {total - serialize:>10.2f} {serialize:>14.3f} {size / 2**20:>8.1f}")
+
+
+def bench_budget(args):
+    """Per-scene analysis budget: run time and selection overlap with a full run."""
+    import logging
+    from screenshot_tool.pipeline import ScreenshotPipeline
+
+    print_header("Analysis budget: budgeted vs full pipeline runs")
+    logging.getLogger('screenshot_tool').setLevel(logging.WARNING)
+
+    work_dir = tempfile.mkdtemp(prefix='bench_budget_')
+    try:
+        if args.video:
+            clips = {os.path.basename(v): v for v in args.video}
+        else:
+            edit_path = os.path.join(work_dir, 'edit.mp4')
+            make_cut_test_clip(edit_path, width=1280, height=720)
+            clips = {'edit': edit_path}
+
+        pipeline = ScreenshotPipeline(device='cpu', scene_cache_dir=os.path.join(work_dir, 'cache'))
+
+        def run(path: str, budget: float):
+            options = {'analyze_audio': False, 'analysis_budget': budget}
+            start = time.perf_counter()
+            selected = pipeline.run(path, os.path.join(work_dir, 'out'), options)
+            elapsed = time.perf_counter() - start
+            with open(os.path.join(work_dir, 'out', 'results.json')) as f:
+                analyzed = json.load(f)['total_analyzed']
+            return elapsed, analyzed, selected
+
+        for label, path in clips.items():
+            run(path, 0)  # Warm up models and the scene cache
+            full_time, full_analyzed, full = run(path, 0)
+            full_frames = {c['frame_number'] for c in full}
+            full_best = {}
+            for c in full:
+                full_best.setdefault(c['scene_index'], c['frame_number'])
+
+            print(f"\n{label}: {len(pipeline.last_scenes)} scenes")
+            print(f"  {'budget':>7} {'analyzed':>9} {'time (s)':>9} {'selected':>9} "
+                  f"{'recall':>7} {'jaccard':>8} {'same best':>10}")
+            print(f"  {'full':>7} {full_analyzed:>9} {full_time:>9.2f} {len(full):>9} "
+                  f"{1.0:>7.2f} {1.0:>8.2f} {1.0:>10.2f}")
+
+            for factor in args.budgets:
+                elapsed, analyzed, selected = run(path, factor)
+                frames = {c['frame_number'] for c in selected}
+                best = {}
+                for c in selected:
+                    best.setdefault(c['scene_index'], c['frame_number'])
+                overlap = len(frames & full_frames)
+                recall = overlap / len(full_frames) if full_frames else 1.0
+                jaccard = overlap / len(frames | full_frames) if frames | full_frames else 1.0
+                same_best = sum(best.get(k) == v for k, v in full_best.items()) / max(1, len(full_best))
+                print(f"  {factor:>6g}x {analyzed:>9} {elapsed:>9.2f} {len(selected):>9} "
+                      f"{recall:>7.2f} {jaccard:>8.2f} {same_best:>10.2f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def make_ram_stand_in():
+    """
+    Untrained stand-in for RAM++ with the same generate_tag() interface.
+
+    A Swin-T at 384px with a 4585-way sigmoid head (RAM++'s tag count),
+    thresholded so the untrained head yields a dozen or so tags per frame.
+    It costs about a seventh of Swin-L, so absolute frames/s are
+    optimistic, but batching behaves the same way.
+    """
+    try:
+        import torch
+        import torchvision
+    except ImportError as e:
+        print(f"  Need torch and torchvision to build a stand-in RAM++ model: {e}")
+        return None
+
+    class StandInRam(torch.nn.Module):
+        def __init__(self, num_tags: int = 4585, threshold: float = 0.62):
+            super().__init__()
+            self.backbone = torchvision.models.swin_t(weights=None)
+            self.backbone.head = torch.nn.Linear(self.backbone.head.in_features, num_tags)
+            self.tag_list = [f'tag_{i}' for i in range(num_tags)]
+            self.threshold = threshold
+
+        def generate_tag(self, image):
+            scores = torch.sigmoid(self.backbone(image))
+            tags = [' | '.join(self.tag_list[j] for j in torch.nonzero(row > self.threshold).flatten().tolist())
+                    for row in scores]
+            return tags, tags
+
+    torch.manual_seed(0)
+    return StandInRam().eval()
+
+
+def bench_tagging(args):
+    """RAM++ tagging: one image per call vs tag_batch."""
+    import cv2
+    import logging
+    from screenshot_tool.pipeline import ContentTagger
+
+    print_header("Content tagging: batched RAM++ vs one image per call")
+    logging.getLogger('screenshot_tool').setLevel(logging.WARNING)
+
+    work_dir = tempfile.mkdtemp(prefix='bench_tagging_')
+    try:
+        tagger = ContentTagger(device='cpu')
+        tagger.load(args.ram)
+        if tagger.model is None:
+            tagger.model = make_ram_stand_in()
+            if tagger.model is None:
+                return
+            print("\nRAM++ not installed: using an untrained Swin-T stand-in (see make_ram_stand_in)")
+        print(f"  Auto batch size: {tagger.auto_batch_size()}")
+
+        clips = get_clips(args, work_dir) if args.video else {}
+        if not clips:
+            path = os.path.join(work_dir, '1080p.mp4')
+            if make_synthetic_clip(path, CAMERA_FORMATS['h264_all_intra'][0], 0,
+                                   width=1920, height=1080, duration=2.0):
+                clips['1080p'] = path
+
+        frames = []
+        for path in clips.values():
+            cap = cv2.VideoCapture(path)
+            while len(frames) < min(args.max_frames, 32):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.append(frame)
+            cap.release()
+        if not frames:
+            print("  No frames decoded")
+            return
+
+        def timed(fn):
+            fn()  # Warm up
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                result = fn()
+            return (time.perf_counter() - start) / args.repeats, result
+
+        single_time, single = timed(lambda: [tagger.tag_array(frame) for frame in frames])
+        print(f"\n  {len(frames)} frames at {frames[0].shape[1]}x{frames[0].shape[0]}, "
+              f"{sum(map(len, single)) / len(frames):.1f} tags/frame")
+        print(f"  {'path':>10} {'frames/s':>9} {'ms/frame':>9} {'same tags':>10}")
+        print(f"  {'per-image':>10} {len(frames) / single_time:>9.2f} {single_time / len(frames) * 1000:>9.1f} {'-':>10}")
+        for batch_size in args.batch_sizes:
+            elapsed, batched = timed(lambda: tagger.tag_batch(frames, batch_size=batch_size))
+            same = sum(a == b for a, b in zip(single, batched))
+            print(f"  {'batch ' + str(batch_size):>10} {len(frames) / elapsed:>9.2f} "
+                  f"{elapsed / len(frames) * 1000:>9.1f} {f'{same}/{len(frames)}':>10}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+BENCHMARKS = {
+    'opencv-extract': bench_opencv_extract,
+    'lut': bench_lut,
+    'cut-detect': bench_cut_detect,
+    'scene-parallel': bench_scene_parallel,
+    'quality': bench_quality,
+    'nima': bench_nima,
+    'budget': bench_budget,
+    'faces': bench_faces,
+    'face-store': bench_face_store,
+    'tagging': bench_tagging,
+}
+
+
+def main():
+    """Run the selected benchmark(s)."""
+    parser = argparse.ArgumentParser(description="Screenshot Tool benchmarks")
+    parser.add_argument('benchmark', choices=list(BENCHMARKS) + ['all'], help='Benchmark to run')
+    parser.add_argument('--video', action='append', help='Real clip to benchmark (repeatable)')
+    parser.add_argument('--duration', type=float, default=20.0, help='Synthetic clip length in seconds')
+    parser.add_argument('--spacings', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64, 128],
+                        help='Candidate spacings in frames (opencv-extract)')
+    parser.add_argument('--max-frames', type=int, default=200, help='Cap on frames per run')
+    parser.add_argument('--lut', help='.cube LUT to benchmark (lut)')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed repetitions per measurement')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help='Worker counts to compare (scene-parallel)')
+    parser.add_argument('--nima', help='NIMA .onnx model (nima; default: untrained stand-in)')
+    parser.add_argument('--ram', help='RAM++ weights (tagging; default: untrained stand-in)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32],
+                        help='Inference batch sizes to compare (nima, faces, tagging)')
+    parser.add_argument('--budgets', type=float, nargs='+', default=[1, 2, 3],
+                        help='analysis_budget multiples of max_per_scene to compare (budget)')
+    args = parser.parse_args()
+
+    selected = BENCHMARKS.values() if args.benchmark == 'all' else [BENCHMARKS[args.benchmark]]
+    for bench in selected:
+        bench(args)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
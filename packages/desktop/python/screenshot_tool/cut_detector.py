@@ -0,0 +1,305 @@
+"""
+CPU-only shot boundary detection for when TransNetV2 is unavailable.
+
+Frames are streamed from FFmpeg at thumbnail size (64x36) and reduced in
+batches to three small per-frame signals:
+- colour histogram (16 bins per RGB channel)
+- mean absolute luma difference to the previous frame
+- a 16x9 luma thumbnail
+
+Hard cuts are peaks in the consecutive histogram distance that stand out
+from the local noise floor (rolling median + k * MAD), confirmed by the
+pixel difference and rejected when the frame after the jump looks like the
+frame before it (camera flashes). Gradual transitions use twin-comparison:
+runs of frames above a lower adaptive threshold whose accumulated change is
+large, and whose middle frame is close to a blend of the two ends
+(dissolves and fades are linear blends, pans and motion are not).
+
+Signals are ~250 bytes per frame, so an hour at 30 fps needs ~27 MB.
+`python bench_screenshot_tool.py cut-detect` compares the boundaries with
+TransNetV2 and ground truth on synthetic clips.
+"""
+
+import logging
+import subprocess
+from typing import Callable, List, Tuple
+
+import cv2
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+
+class FastCutDetector:
+    """Histogram and pixel-difference cut detector with adaptive thresholds."""
+
+    WIDTH = 64
+    HEIGHT = 36
+    BINS = 16
+    THUMB_WIDTH = 16
+    THUMB_HEIGHT = 9
+
+    def __init__(
+        self,
+        cut_sigma: float = 6.0,
+        min_cut: float = 0.15,
+        gradual_sigma: float = 2.0,
+        min_gradual: float = 0.2,
+        min_scene_seconds: float = 0.5,
+        window_seconds: float = 2.0,
+        batch_frames: int = 256,
+        threads: int = 0
+    ):
+        """
+        Args:
+            cut_sigma: Noise-floor multiples a hard cut must exceed
+            min_cut: Minimum histogram distance (0-1) for a hard cut
+            gradual_sigma: Noise-floor multiples that start a gradual transition
+            min_gradual: Minimum histogram change (0-1) across a gradual transition
+            min_scene_seconds: Boundaries closer than this are merged
+            window_seconds: Width of the rolling noise-floor window
+            batch_frames: Frames reduced per NumPy batch
+            threads: FFmpeg decoder threads (0 = FFmpeg default)
+        """
+        self.cut_sigma = cut_sigma
+        self.min_cut = min_cut
+        self.gradual_sigma = gradual_sigma
+        self.min_gradual = min_gradual
+        self.min_scene_seconds = min_scene_seconds
+        self.window_seconds = window_seconds
+        self.batch_frames = batch_frames
+        self.threads = threads
+
+    def detect(
+        self,
+        video_path: str,
+        on_progress: Callable[[int, int], None] = None
+    ) -> List[tuple]:
+        """
+        Detect scenes in a video.
+
+        Args:
+            video_path: Path to video file
+            on_progress: Optional callback(frames_done, total_frames)
+
+        Returns:
+            List of (start_frame, end_frame) tuples (inclusive), with
+            gradual transition frames left out, like TransNetV2
+        """
+        cap = cv2.VideoCapture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        hists, pixel_diff, thumbs = self.read_signals(video_path, on_progress=on_progress)
+        if len(hists) == 0:
+            return []
+
+        transitions = self.find_transitions(hists, pixel_diff, thumbs, fps)
+        return self.transitions_to_scenes(transitions, len(hists))
+
+    def read_signals(
+        self,
+        video_path: str,
+        start_frame: int = 0,
+        frame_count: int = None,
+        on_progress: Callable[[int, int], None] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stream thumbnail frames and reduce them to per-frame signals.
+
+        Signals for a range [start_frame, start_frame + frame_count) match
+        the same rows of a full pass, so ranges can be read in parallel and
+        concatenated.
+
+        Returns:
+            (histograms, pixel differences, thumbnails), one row per frame
+        """
+        cap = cv2.VideoCapture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        total_frames = frame_count or int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        # The pixel difference of the first frame needs the one before it
+        read_start = max(0, start_frame - 1)
+        skip = start_frame - read_start
+
+        cmd = ['ffmpeg', '-v', 'error', '-skip_loop_filter', 'all']
+        if self.threads:
+            cmd += ['-threads', str(self.threads)]
+        if read_start > 0:
+            # Accurate seek: half a frame early so rounding never skips read_start
+            cmd += ['-ss', f'{(read_start - 0.5) / fps:.6f}']
+        cmd += ['-i', video_path, '-an', '-sn']
+        if frame_count:
+            cmd += ['-frames:v', str(frame_count + skip)]
+        cmd += [
+            '-vf', f'scale={self.WIDTH}:{self.HEIGHT}:flags=area',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:'
+        ]
+        frame_bytes = self.WIDTH * self.HEIGHT * 3
+
+        # Per-pixel bin offsets so one bincount covers all channels and frames
+        shift = 8 - int(np.log2(self.BINS))
+        channel_offsets = (np.arange(3, dtype=np.int32) * self.BINS)
+        luma_weights = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+        hists, pixel_diffs, thumbs = [], [], []
+        previous_gray = None
+        done = 0
+
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                data = proc.stdout.read(frame_bytes * self.batch_frames)
+                count = len(data) // frame_bytes
+                if count == 0:
+                    break
+
+                frames = np.frombuffer(data[:count * frame_bytes], np.uint8).reshape(
+                    count, self.HEIGHT * self.WIDTH, 3
+                )
+
+                bins = (frames >> shift).astype(np.int32) + channel_offsets
+                bins += (np.arange(count, dtype=np.int32) * 3 * self.BINS)[:, None, None]
+                hist = np.bincount(bins.ravel(), minlength=count * 3 * self.BINS)
+                hists.append(hist.reshape(count, 3 * self.BINS).astype(np.uint16))
+
+                gray = (frames @ luma_weights).reshape(count, self.HEIGHT, self.WIDTH)
+                stacked = gray if previous_gray is None else np.concatenate([previous_gray[None], gray])
+                diff = np.abs(np.diff(stacked, axis=0)).mean(axis=(1, 2)) / 255.0
+                pixel_diffs.append(diff if previous_gray is not None else np.concatenate([[0.0], diff]))
+                previous_gray = gray[-1]
+
+                thumb = gray.reshape(
+                    count, self.THUMB_HEIGHT, self.HEIGHT // self.THUMB_HEIGHT,
+                    self.THUMB_WIDTH, self.WIDTH // self.THUMB_WIDTH
+                ).mean(axis=(2, 4))
+                thumbs.append(thumb.astype(np.uint8))
+
+                done += count
+                if on_progress and total_frames > 0:
+                    on_progress(min(done, total_frames), total_frames)
+        finally:
+            proc.stdout.close()
+            proc.kill()
+            proc.wait()
+
+        if not hists:
+            return np.empty((0, 3 * self.BINS)), np.empty(0), np.empty((0, self.THUMB_HEIGHT, self.THUMB_WIDTH))
+
+        hists = np.concatenate(hists)[skip:]
+        pixel_diffs = np.concatenate(pixel_diffs).astype(np.float32)[skip:]
+        thumbs = np.concatenate(thumbs)[skip:]
+        return hists, pixel_diffs, thumbs
+
+    def find_transitions(
+        self,
+        hists: np.ndarray,
+        pixel_diff: np.ndarray,
+        thumbs: np.ndarray,
+        fps: float
+    ) -> List[Tuple[int, int]]:
+        """
+        Locate transitions from per-frame signals.
+
+        Returns:
+            Sorted (first_frame, end_frame) pairs, end exclusive: a hard cut
+            at frame i is (i, i), a gradual transition covers [first, end)
+        """
+        n = len(hists)
+        if n < 3:
+            return []
+
+        pixels = self.WIDTH * self.HEIGHT
+        norm = hists.astype(np.float32) / pixels
+
+        def distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+            # Mean over channels of half the L1 histogram distance, in 0-1
+            return np.abs(norm[a] - norm[b]).sum(axis=-1) / 6.0
+
+        index = np.arange(n)
+        d = np.zeros(n, dtype=np.float32)
+        d[1:] = distance(index[1:], index[:-1])
+
+        # Adaptive noise floor: rolling median and MAD of the distance signal
+        window = max(3, int(self.window_seconds * fps) | 1)
+        padded = np.pad(d, window // 2, mode='edge')
+        windows = sliding_window_view(padded, window)
+        median = np.median(windows, axis=1)
+        sigma = 1.4826 * np.median(np.abs(windows - median[:, None]), axis=1) + 1e-3
+
+        # Hard cuts: local peaks well above the floor
+        cut_threshold = np.maximum(self.min_cut, median + self.cut_sigma * sigma)
+        local_max = sliding_window_view(np.pad(d, 2, mode='edge'), 5).max(axis=1)
+        candidates = np.flatnonzero((d > cut_threshold) & (d >= local_max) & (pixel_diff > 0.02))
+
+        # Flash rejection: after a real cut the next frames stay different
+        # from the frame before the jump; after a flash they come back
+        cuts = []
+        for i in candidates:
+            before = max(i - 1, 0)
+            after = [distance(np.array([j]), np.array([before]))[0] for j in (i + 1, i + 2) if j < n]
+            if not after or min(after) > 0.5 * d[i]:
+                cuts.append(int(i))
+        cut_set = set(cuts)
+
+        # Gradual transitions: runs above the lower threshold (twin comparison)
+        low_threshold = np.maximum(0.005, median + self.gradual_sigma * sigma)
+        active = d > low_threshold
+        active[list(cut_set)] = False
+        min_frames = max(3, int(0.2 * fps))
+
+        edges = np.diff(np.concatenate([[0], active.astype(np.int8), [0]]))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+        # Bridge short dips inside one transition
+        runs = []
+        for start, end in zip(starts, ends):
+            if runs and start - runs[-1][1] <= 2:
+                runs[-1][1] = end
+            else:
+                runs.append([start, end])
+
+        gradual = []
+        for start, end in runs:
+            if end - start < min_frames or any(start <= c < end for c in cut_set):
+                continue
+
+            first, last = max(start - 1, 0), min(end, n - 1)
+            if distance(np.array([first]), np.array([last]))[0] < self.min_gradual:
+                continue
+
+            # Dissolves and fades are linear blends of the two ends
+            a = thumbs[first].astype(np.float32)
+            b = thumbs[last].astype(np.float32)
+            middle = thumbs[(first + last) // 2].astype(np.float32)
+            span = np.abs(a - b).mean()
+            if span > 4.0 and np.abs(middle - (a + b) / 2).mean() < 0.35 * span:
+                gradual.append((int(start), int(end)))
+
+        transitions = sorted([(c, c) for c in cuts] + gradual)
+
+        # Merge boundaries closer than the minimum scene length
+        min_scene = max(1, int(self.min_scene_seconds * fps))
+        merged = []
+        for transition in transitions:
+            if merged and transition[0] - merged[-1][1] < min_scene:
+                continue
+            merged.append(transition)
+
+        return merged
+
+    @staticmethod
+    def transitions_to_scenes(transitions: List[Tuple[int, int]], total_frames: int) -> List[tuple]:
+        """Turn transitions into inclusive (start, end) scenes covering the clip."""
+        scenes = []
+        start = 0
+        for first, end in transitions:
+            if first - 1 >= start:
+                scenes.append((start, first - 1))
+            start = end
+        if start <= total_frames - 1:
+            scenes.append((start, total_frames - 1))
+        return scenes or [(0, total_frames - 1)]
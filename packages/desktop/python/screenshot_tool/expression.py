@@ -0,0 +1,114 @@
+"""
+Vectorized facial expression scores from face landmarks.
+
+All faces of a batch are scored in one NumPy pass over an (N, 106, 2)
+array of InsightFace 2d106 landmarks, or an (N, 5, 2) array of detector
+keypoints when the landmark model did not run:
+- smile: mouth width against eye distance, corner lift and openness
+  (5 points: mouth width against eye distance only)
+- mouth_open: outer lip height over mouth width
+- eye_open: eye aspect ratio (lid gap over eye width) averaged over both
+  eyes, mapped to 0-1; low values are blinks
+
+Scores are in 0-1, NaN where the landmark set cannot measure them
+(mouth_open and eye_open need 106 points).
+"""
+
+from typing import Dict
+
+import numpy as np
+
+# 2d106 indices: mouth corners, outer lip centres and pupils
+LEFT_MOUTH_CORNER = 52
+RIGHT_MOUTH_CORNER = 61
+UPPER_LIP_CENTER = 57
+LOWER_LIP_CENTER = 66
+LEFT_EYE_CENTER = 38
+RIGHT_EYE_CENTER = 88
+
+# Eye contours: corner pairs and (upper lid, lower lid) pairs
+LEFT_EYE_CORNERS = (35, 39)
+LEFT_EYE_LIDS = ((36, 41), (33, 40), (37, 42))
+RIGHT_EYE_CORNERS = (89, 93)
+RIGHT_EYE_LIDS = ((90, 95), (87, 94), (91, 96))
+
+# Eye aspect ratios mapped to eye_open 0 (closed) and 1 (fully open)
+EYE_CLOSED_RATIO = 0.08
+EYE_OPEN_RATIO = 0.25
+
+SCORES = ('smile', 'mouth_open', 'eye_open')
+
+
+def score_expressions(landmarks: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Expression scores for a batch of faces.
+
+    Args:
+        landmarks: (N, 106, 2) 2d106 landmarks or (N, 5, 2) keypoints
+
+    Returns:
+        Dict of SCORES -> (N,) float arrays
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    if landmarks.ndim != 3 or landmarks.shape[1:] not in ((106, 2), (5, 2)):
+        raise ValueError(f"Expected (N, 106, 2) or (N, 5, 2) landmarks, got {landmarks.shape}")
+
+    if landmarks.shape[1] == 5:
+        return _score_keypoints(landmarks)
+    return _score_106(landmarks)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator, 0 where the denominator is not positive."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, 0.0)
+
+
+def _distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.sqrt(((a - b) ** 2).sum(axis=-1))
+
+
+def _score_106(landmarks: np.ndarray) -> Dict[str, np.ndarray]:
+    left_corner = landmarks[:, LEFT_MOUTH_CORNER]
+    right_corner = landmarks[:, RIGHT_MOUTH_CORNER]
+    upper_lip = landmarks[:, UPPER_LIP_CENTER]
+    lower_lip = landmarks[:, LOWER_LIP_CENTER]
+
+    mouth_width = _distance(right_corner, left_corner)
+    eye_distance = _distance(landmarks[:, RIGHT_EYE_CENTER], landmarks[:, LEFT_EYE_CENTER])
+
+    # 1. Mouth width to eye distance ratio (wider = more smile)
+    width_score = np.clip((_ratio(mouth_width, eye_distance) - 0.9) * 3, 0.0, 1.0)
+
+    # 2. Corner elevation (corners up relative to the lip centres = smile)
+    mouth_center_y = (upper_lip[:, 1] + lower_lip[:, 1]) / 2
+    avg_lift = ((mouth_center_y - left_corner[:, 1]) + (mouth_center_y - right_corner[:, 1])) / 2
+    face_height = eye_distance * 1.5  # Approximate
+    lift_score = np.clip(_ratio(avg_lift, face_height * 0.03) + 0.5, 0.0, 1.0)
+
+    # 3. Mouth openness (teeth showing = often smiling), capped contribution
+    openness = _ratio(_distance(upper_lip, lower_lip), mouth_width)
+    openness_score = np.clip(openness * 2, 0.0, 0.5)
+
+    smile = np.clip(width_score * 0.4 + lift_score * 0.4 + openness_score * 0.2, 0.0, 1.0)
+
+    # Eye aspect ratio per eye, averaged: blinks pull it towards 0
+    ratios = []
+    for corners, lids in ((LEFT_EYE_CORNERS, LEFT_EYE_LIDS), (RIGHT_EYE_CORNERS, RIGHT_EYE_LIDS)):
+        width = _distance(landmarks[:, corners[0]], landmarks[:, corners[1]])
+        gap = np.mean([_distance(landmarks[:, upper], landmarks[:, lower]) for upper, lower in lids], axis=0)
+        ratios.append(_ratio(gap, width))
+    eye_ratio = (ratios[0] + ratios[1]) / 2
+    eye_open = np.clip((eye_ratio - EYE_CLOSED_RATIO) / (EYE_OPEN_RATIO - EYE_CLOSED_RATIO), 0.0, 1.0)
+
+    return {'smile': smile, 'mouth_open': np.clip(openness, 0.0, 1.0), 'eye_open': eye_open}
+
+
+def _score_keypoints(keypoints: np.ndarray) -> Dict[str, np.ndarray]:
+    # Order: left eye, right eye, nose, left mouth corner, right mouth corner
+    face_width = _distance(keypoints[:, 1], keypoints[:, 0])
+    mouth_width = _distance(keypoints[:, 4], keypoints[:, 3])
+    smile = np.clip((_ratio(mouth_width, face_width) - 0.4) * 2, 0.0, 1.0)
+
+    unknown = np.full(len(keypoints), np.nan)
+    return {'smile': smile, 'mouth_open': unknown, 'eye_open': unknown.copy()}
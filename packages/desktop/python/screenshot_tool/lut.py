@@ -0,0 +1,226 @@
+"""
+3D LUT loading and application for LOG footage previews.
+
+Parses .cube files into a NumPy lattice once (cached by path and mtime) and
+applies them to already decoded frames with vectorized interpolation, so the
+LUT preview no longer needs its own FFmpeg decode.
+
+Tetrahedral interpolation (the default) is the scheme FFmpeg's lut3d filter
+uses. On identical 8-bit RGB input the result matches `ffmpeg -vf lut3d` to
+within 1 code value per channel, on a handful of pixels where float32 and
+FFmpeg's arithmetic land either side of an 8-bit step (both truncate).
+`python bench_screenshot_tool.py lut` measures the difference and the
+per-frame cost.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+@dataclass
+class Lut3D:
+    """Parsed 3D LUT lattice, indexed as table[r, g, b] -> (r, g, b)."""
+    table: np.ndarray
+    domain_min: np.ndarray
+    domain_max: np.ndarray
+    title: str = ""
+
+    def __post_init__(self):
+        self._dense = None
+        self._dense_lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self.table.shape[0]
+
+    def apply(self, image: np.ndarray, interpolation: str = 'tetrahedral') -> np.ndarray:
+        """
+        Grade a BGR uint8 frame.
+
+        Tetrahedral lookups go through a dense 256^3 table baked on first
+        use (64 MB, cached with the LUT), so each frame costs one gather.
+
+        Args:
+            image: BGR uint8 image array (OpenCV layout)
+            interpolation: 'tetrahedral' (FFmpeg default) or 'trilinear'
+
+        Returns:
+            Graded BGR uint8 image array
+        """
+        if interpolation == 'tetrahedral':
+            dense = self._dense_table()
+            flat = image.reshape(-1, 3)
+            # BGR pixel -> (r << 16 | g << 8 | b) index into the dense table
+            idx = (flat[:, 2].astype(np.int32) << 16) | (flat[:, 1].astype(np.int32) << 8) | flat[:, 0]
+            packed = np.take(dense, idx)
+            bgr = packed.view(np.uint8).reshape(-1, 4)[:, :3]
+            return np.ascontiguousarray(bgr).reshape(image.shape)
+
+        rgb = image[..., ::-1].reshape(-1, 3).astype(np.float32) * (1.0 / 255.0)
+        return _to_u8(self.apply_float(rgb, interpolation)).reshape(image.shape)[..., ::-1]
+
+    def apply_float(self, rgb: np.ndarray, interpolation: str = 'tetrahedral') -> np.ndarray:
+        """
+        Look up (M, 3) float RGB values in the 0-1 range.
+
+        Returns:
+            (M, 3) float32 graded RGB values
+        """
+        n = self.size
+        scale = ((n - 1) / (self.domain_max - self.domain_min)).astype(np.float32)
+        pos = np.clip((rgb - self.domain_min) * scale, 0, n - 1).astype(np.float32)
+
+        base = np.minimum(pos.astype(np.int32), n - 2)
+        frac = pos - base
+
+        lut = self.table.reshape(-1, 3)
+        idx000 = (base[:, 0] * n + base[:, 1]) * n + base[:, 2]
+
+        # Flat index offsets for the +r, +g, +b lattice neighbours
+        offsets = (n * n, n, 1)
+
+        if interpolation == 'trilinear':
+            return _trilinear(lut, idx000, frac, offsets)
+        return _tetrahedral(lut, idx000, frac, offsets)
+
+    def _dense_table(self) -> np.ndarray:
+        """
+        Every 8-bit RGB input mapped once.
+
+        Entries are little-endian uint32 packed as b | g << 8 | r << 16, so a
+        uint8 view of a gather is already in OpenCV BGR(x) order.
+        """
+        with self._dense_lock:
+            if self._dense is None:
+                levels = np.arange(256, dtype=np.float32) / 255.0
+                dense = np.empty(256 ** 3, dtype='<u4')
+                gb = np.stack(np.meshgrid(levels, levels, indexing='ij'), axis=-1).reshape(-1, 2)
+                rgb = np.empty((gb.shape[0], 3), dtype=np.float32)
+                rgb[:, 1:] = gb
+
+                # One red level per chunk keeps temporaries at ~65k points
+                for r in range(256):
+                    rgb[:, 0] = levels[r]
+                    out = _to_u8(self.apply_float(rgb)).astype(np.uint32)
+                    dense[r * 65536:(r + 1) * 65536] = out[:, 2] | (out[:, 1] << 8) | (out[:, 0] << 16)
+
+                self._dense = dense
+            return self._dense
+
+
+def _to_u8(values: np.ndarray) -> np.ndarray:
+    """Scale 0-1 floats to 8-bit, truncating like FFmpeg's lut3d."""
+    return np.clip(values * 255.0, 0, 255).astype(np.uint8)
+
+
+def _trilinear(lut, idx000, frac, offsets) -> np.ndarray:
+    """Blend the 8 surrounding lattice points."""
+    dr, dg, db = offsets
+    fr, fg, fb = frac[:, 0:1], frac[:, 1:2], frac[:, 2:3]
+
+    c00 = lut[idx000] * (1 - fr) + lut[idx000 + dr] * fr
+    c01 = lut[idx000 + db] * (1 - fr) + lut[idx000 + dr + db] * fr
+    c10 = lut[idx000 + dg] * (1 - fr) + lut[idx000 + dr + dg] * fr
+    c11 = lut[idx000 + dg + db] * (1 - fr) + lut[idx000 + dr + dg + db] * fr
+
+    c0 = c00 * (1 - fg) + c10 * fg
+    c1 = c01 * (1 - fg) + c11 * fg
+    return c0 * (1 - fb) + c1 * fb
+
+
+def _tetrahedral(lut, idx000, frac, offsets) -> np.ndarray:
+    """
+    Blend the 4 corners of the tetrahedron containing each point.
+
+    The tetrahedron runs from c000 along the axis with the largest fraction,
+    then the middle one, to c111 - the same 6-way split as FFmpeg's
+    interp_tetrahedral(). Ties give zero-weight edges, so any consistent
+    tie-break is exact.
+    """
+    dr, dg, db = offsets
+    fr, fg, fb = frac[:, 0], frac[:, 1], frac[:, 2]
+
+    f_max = np.maximum(np.maximum(fr, fg), fb)
+    f_min = np.minimum(np.minimum(fr, fg), fb)
+    f_mid = fr + fg + fb - f_max - f_min
+
+    # Largest axis breaks ties r > g > b, smallest axis b > g > r, so they differ
+    first = np.where(fr == f_max, dr, np.where(fg == f_max, dg, db))
+    last = np.where(fb == f_min, db, np.where(fg == f_min, dg, dr))
+    corner = dr + dg + db
+
+    return (
+        lut[idx000] * (1 - f_max)[:, None]
+        + lut[idx000 + first] * (f_max - f_mid)[:, None]
+        + lut[idx000 + corner - last] * (f_mid - f_min)[:, None]
+        + lut[idx000 + corner] * f_min[:, None]
+    )
+
+
+def load_cube(path: str) -> Lut3D:
+    """
+    Parse an Adobe/Resolve .cube 3D LUT.
+
+    Raises:
+        ValueError: If the file is not a complete 3D LUT
+    """
+    size = None
+    title = ""
+    domain_min = np.zeros(3, dtype=np.float32)
+    domain_max = np.ones(3, dtype=np.float32)
+    values = []
+
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            keyword = line.split(maxsplit=1)[0].upper()
+            if keyword == 'TITLE':
+                title = line[5:].strip().strip('"')
+            elif keyword == 'LUT_3D_SIZE':
+                size = int(line.split()[1])
+            elif keyword == 'LUT_1D_SIZE':
+                raise ValueError(f"1D LUTs are not supported: {path}")
+            elif keyword == 'DOMAIN_MIN':
+                domain_min = np.array(line.split()[1:4], dtype=np.float32)
+            elif keyword == 'DOMAIN_MAX':
+                domain_max = np.array(line.split()[1:4], dtype=np.float32)
+            elif keyword[0].isdigit() or keyword[0] in '-.':
+                values.append(line.split()[:3])
+
+    if size is None:
+        raise ValueError(f"Missing LUT_3D_SIZE in {path}")
+    if len(values) != size ** 3:
+        raise ValueError(f"Expected {size ** 3} LUT entries in {path}, found {len(values)}")
+
+    # .cube data runs with red fastest: reshape gives [b, g, r], swap to [r, g, b]
+    data = np.array(values, dtype=np.float32).reshape(size, size, size, 3)
+    table = np.ascontiguousarray(data.transpose(2, 1, 0, 3))
+
+    return Lut3D(table=table, domain_min=domain_min, domain_max=domain_max, title=title)
+
+
+_cache: Dict[Tuple[str, float], Lut3D] = {}
+_cache_lock = threading.Lock()
+
+
+def get_lut(path: str) -> Lut3D:
+    """Load a .cube LUT, reusing the parsed lattice until the file changes."""
+    path = os.path.abspath(path)
+    key = (path, os.path.getmtime(path))
+
+    with _cache_lock:
+        lut = _cache.get(key)
+        if lut is None:
+            lut = load_cube(path)
+            # Drop stale versions of the same file
+            for stale in [k for k in _cache if k[0] == path]:
+                del _cache[stale]
+            _cache[key] = lut
+        return lut
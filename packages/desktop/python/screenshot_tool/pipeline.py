@@ -6,7 +6,7 @@ Coordinates all ML components for screenshot extraction from video:
 2. Frame Extraction (FFmpeg)
 3. Quality Filtering (Laplacian + NIMA)
 4. Face Detection (InsightFace)
-5. Expression Analysis
+5. Expression Analysis (smile, mouth-open, blink)
 6. Content Tagging (RAM++)
 7. Captioning (Florence-2) - optional
 8. Smart Cropping (U2-Net via rembg)
@@ -17,20 +17,32 @@ Coordinates all ML components for screenshot extraction from video:
 """
 
 import os
+import re
+import copy
 import json
+import time
 import torch
 import cv2
 import numpy as np
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Callable
-from dataclasses import dataclass, asdict, field
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from dataclasses import dataclass, asdict, field, fields, replace
 from datetime import datetime
 import logging
 
+from .lut import Lut3D, get_lut
+from .scene_cache import ScenePredictionCache, video_fingerprint
+from .cut_detector import FastCutDetector
+from .expression import score_expressions
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Long edge (px) at which Laplacian sharpness is measured, so
+# sharpness_threshold means the same thing for 1080p, 4K and 6K footage
+SHARPNESS_REFERENCE_SIZE = 1920
+
 
 @dataclass
 class FaceData:
@@ -43,10 +55,202 @@ class FaceData:
     gender: Optional[str] = None
     pose: Optional[List[float]] = None
     smile_score: Optional[float] = None
+    mouth_open: Optional[float] = None
+    eye_open: Optional[float] = None  # Low values are blinks
+    track_id: Optional[int] = None
 
     def to_dict(self) -> dict:
         return asdict(self)
 
+    def scaled(self, factor: float) -> 'FaceData':
+        """Copy with bbox and landmarks multiplied by factor (e.g. analysis -> source pixels)."""
+        return replace(
+            self,
+            bbox=[v * factor for v in self.bbox],
+            landmarks=[[x * factor, y * factor] for x, y in self.landmarks] if self.landmarks else self.landmarks,
+        )
+
+
+class FaceStore:
+    """
+    Struct-of-arrays storage for the faces of one analysis job.
+
+    Boxes, keypoints, embeddings and scalars live in float32/int columns
+    that grow by doubling; FaceRecord objects only hold a row index. Faces
+    become JSON-friendly dicts (same keys as FaceData.to_dict()) only at the
+    results.json / API boundary, via FaceRecord.to_dict().
+    """
+
+    FIELDS = (
+        'bbox', 'confidence', 'landmarks', 'embedding', 'age', 'gender', 'pose',
+        'smile_score', 'mouth_open', 'eye_open', 'track_id'
+    )
+    SCORES = ('smile_score', 'mouth_open', 'eye_open')  # float64 columns, NaN when unset
+
+    def __init__(self, embedding_size: int = 512, capacity: int = 256):
+        self.embedding_size = embedding_size
+        self.count = 0
+        self.columns: Dict[str, np.ndarray] = {}
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        """(Re)allocate all columns with room for capacity faces, keeping existing rows."""
+        specs = {
+            'bbox': ((4,), np.float32, 0),
+            'confidence': ((), np.float32, 0),
+            'landmarks': ((5, 2), np.float32, 0),
+            'has_landmarks': ((), bool, False),
+            'embedding': ((self.embedding_size,), np.float32, 0),
+            'has_embedding': ((), bool, False),
+            'age': ((), np.int16, -1),
+            'gender': ((), np.int8, -1),
+            'pose': ((3,), np.float32, 0),
+            'has_pose': ((), bool, False),
+            **{name: ((), np.float64, np.nan) for name in self.SCORES},
+            'track_id': ((), np.int32, -1),
+        }
+        for name, (shape, dtype, fill) in specs.items():
+            column = np.full((capacity,) + shape, fill, dtype=dtype)
+            if name in self.columns:
+                column[:self.count] = self.columns[name][:self.count]
+            self.columns[name] = column
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(
+        self,
+        bbox: np.ndarray,
+        confidence: float,
+        landmarks: np.ndarray = None,
+        embedding: np.ndarray = None,
+        age: int = None,
+        gender: int = None,
+        pose: np.ndarray = None,
+        smile_score: float = None,
+        mouth_open: float = None,
+        eye_open: float = None,
+        track_id: int = None
+    ) -> 'FaceRecord':
+        """Append a face (gender: 1 = male, 0 = female) and return its record."""
+        if self.count == len(self.columns['bbox']):
+            self._allocate(2 * self.count)
+
+        index = self.count
+        self.count += 1
+        c = self.columns
+        c['bbox'][index] = bbox[:4]
+        c['confidence'][index] = confidence
+        if landmarks is not None:
+            c['landmarks'][index] = landmarks
+            c['has_landmarks'][index] = True
+        if embedding is not None:
+            self.set_embedding(index, embedding)
+        if age is not None:
+            c['age'][index] = age
+        if gender is not None:
+            c['gender'][index] = gender
+        if pose is not None:
+            c['pose'][index] = pose
+            c['has_pose'][index] = True
+        for name, score in zip(self.SCORES, (smile_score, mouth_open, eye_open)):
+            if score is not None:
+                c[name][index] = score
+        if track_id is not None:
+            c['track_id'][index] = track_id
+        return FaceRecord(self, index)
+
+    def set_embedding(self, index: int, embedding: np.ndarray):
+        """Store a recognition embedding for a face."""
+        embedding = np.asarray(embedding, dtype=np.float32).ravel()
+        if embedding.shape[0] != self.embedding_size:
+            raise ValueError(f"Expected a {self.embedding_size}-d embedding, got {embedding.shape[0]}")
+        self.columns['embedding'][index] = embedding
+        self.columns['has_embedding'][index] = True
+
+    def has_embedding(self, index: int) -> bool:
+        return bool(self.columns['has_embedding'][index])
+
+    def embeddings(self, indices: List[int]) -> np.ndarray:
+        """Embedding matrix (len(indices), embedding_size) for the given faces."""
+        return self.columns['embedding'][indices]
+
+    def scale(self, index: int, factor: float):
+        """Multiply a face's box and keypoints by factor in place."""
+        self.columns['bbox'][index] *= factor
+        self.columns['landmarks'][index] *= factor
+
+    def value(self, index: int, key: str) -> Any:
+        """One field of a face, as FaceData.to_dict() would hold it (embedding stays an array)."""
+        c = self.columns
+        if key == 'bbox':
+            return c['bbox'][index].tolist()
+        if key == 'confidence':
+            return float(c['confidence'][index])
+        if key == 'landmarks':
+            return c['landmarks'][index].tolist() if c['has_landmarks'][index] else None
+        if key == 'embedding':
+            return c['embedding'][index] if c['has_embedding'][index] else None
+        if key == 'age':
+            return int(c['age'][index]) if c['age'][index] >= 0 else None
+        if key == 'gender':
+            return {1: 'M', 0: 'F'}.get(int(c['gender'][index]))
+        if key == 'pose':
+            return c['pose'][index].tolist() if c['has_pose'][index] else None
+        if key in self.SCORES:
+            score = c[key][index]
+            return None if np.isnan(score) else float(score)
+        if key == 'track_id':
+            return int(c['track_id'][index]) if c['track_id'][index] >= 0 else None
+        raise KeyError(key)
+
+    def to_dict(self, index: int) -> dict:
+        """JSON-friendly dict for one face."""
+        result = {key: self.value(index, key) for key in self.FIELDS}
+        if result['embedding'] is not None:
+            result['embedding'] = result['embedding'].tolist()
+        return result
+
+
+class FaceRecord:
+    """
+    One face in a FaceStore, readable like a FaceData dict.
+
+    Records are views: copies share the row, and scaled() changes it in place.
+    """
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store: FaceStore, index: int):
+        self.store = store
+        self.index = index
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.store.value(self.index, key) if key in FaceStore.FIELDS else default
+
+    def __getitem__(self, key: str) -> Any:
+        return self.store.value(self.index, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in FaceStore.FIELDS
+
+    def keys(self):
+        return FaceStore.FIELDS
+
+    def scaled(self, factor: float) -> 'FaceRecord':
+        """Map box and keypoints to an image factor times larger (in place)."""
+        self.store.scale(self.index, factor)
+        return self
+
+    def to_dict(self) -> dict:
+        return self.store.to_dict(self.index)
+
+    def __copy__(self) -> 'FaceRecord':
+        return self
+
+    def __deepcopy__(self, memo: dict) -> 'FaceRecord':
+        return self
+
 
 @dataclass
 class CropCoordinates:
@@ -61,14 +265,23 @@ class CropCoordinates:
     def to_dict(self) -> dict:
         return asdict(self)
 
+    def scaled(self, factor: float, max_width: int, max_height: int) -> 'CropCoordinates':
+        """Copy mapped to an image `factor` times larger, clamped to its bounds."""
+        width = min(int(round(self.width * factor)), max_width)
+        height = min(int(round(self.height * factor)), max_height)
+        x1 = max(0, min(int(round(self.x1 * factor)), max_width - width))
+        y1 = max(0, min(int(round(self.y1 * factor)), max_height - height))
+        return CropCoordinates(x1=x1, y1=y1, x2=x1 + width, y2=y1 + height, width=width, height=height)
+
 
 @dataclass
 class FrameCandidate:
     """Represents a candidate frame for export."""
     frame_number: int
     timestamp: float
-    image_path: str  # LUT-graded preview (used for ML analysis)
+    image_path: str  # LUT-graded preview at analysis resolution (used for ML analysis)
     sharpness_score: float
+    quality: Dict[str, float] = field(default_factory=dict)  # QualityFilter.METRICS
     raw_path: Optional[str] = None  # Original LOG/RAW frame (for final export)
     nima_score: float = 0.0
     faces: List[FaceData] = field(default_factory=list)
@@ -79,14 +292,93 @@ class FrameCandidate:
     is_broll: bool = False
     scene_index: int = 0
     cluster_labels: Dict[str, int] = field(default_factory=dict)
+    duplicate_of: Optional[int] = None  # Frame whose analysis results this near-duplicate reuses
 
     def to_dict(self) -> dict:
-        result = asdict(self)
-        result['faces'] = [f if isinstance(f, dict) else f.to_dict() for f in self.faces]
+        # Shallow: FaceRecords stay views into the job's FaceStore until
+        # the results are serialized
+        result = {f.name: getattr(self, f.name) for f in fields(self)}
+        result['quality'] = dict(self.quality)
+        result['tags'] = list(self.tags)
+        result['cluster_labels'] = dict(self.cluster_labels)
+        result['faces'] = [f.to_dict() if isinstance(f, FaceData) else f for f in self.faces]
         result['crops'] = {k: (v if isinstance(v, dict) else v.to_dict()) for k, v in self.crops.items()}
         return result
 
 
+class AnalysisFrame:
+    """
+    Decoded frame handed between pipeline stages.
+
+    Sharpness, face detection, tagging and saliency all read the same BGR
+    array, so each frame is decoded once instead of once per stage. Frames
+    decoded straight from the video have no file until save() is called;
+    frames that already exist on disk are decoded lazily on first access.
+
+    The image may be smaller than the source video; `scale` is the number of
+    source pixels per analysis pixel, used to map detections back for export.
+    """
+
+    def __init__(self, path: str, image: np.ndarray = None, scale: float = 1.0):
+        self.path = path
+        self._image = image
+        self.on_disk = image is None
+        self.scale = scale
+
+    @property
+    def image(self) -> Optional[np.ndarray]:
+        """BGR array, decoded from disk on first access if needed."""
+        if self._image is None and self.on_disk:
+            self._image = cv2.imread(self.path)
+        return self._image
+
+    @property
+    def nbytes(self) -> int:
+        return self._image.nbytes if self._image is not None else 0
+
+    def save(self, quality: int = 95) -> bool:
+        """Write the in-memory frame to its path (no-op if already on disk)."""
+        if self.on_disk:
+            return True
+        if self._image is None:
+            return False
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.on_disk = cv2.imwrite(self.path, self._image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return self.on_disk
+
+    def release(self):
+        """Drop the decoded array (in-memory frames are lost unless saved)."""
+        self._image = None
+
+
+def fit_long_edge(width: int, height: int, max_side: int) -> Tuple[int, int]:
+    """
+    Dimensions scaled down so the long edge is at most max_side.
+
+    Returns the input unchanged when max_side is 0/None or already larger
+    than the frame. Dimensions are kept even for FFmpeg's JPEG encoder.
+    """
+    if not max_side or max(width, height) <= max_side:
+        return width, height
+    ratio = max_side / max(width, height)
+    return max(2, int(round(width * ratio / 2)) * 2), max(2, int(round(height * ratio / 2)) * 2)
+
+
+def dhash(image: np.ndarray, hash_size: int = 8) -> int:
+    """
+    Difference hash of an image as a hash_size**2-bit integer.
+
+    The image is area-downscaled to (hash_size + 1) x hash_size gray pixels
+    and each bit records whether a pixel is brighter than its right-hand
+    neighbour, so exposure shifts and recompression leave it unchanged.
+    """
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
 def get_device() -> str:
     """Get the best available device."""
     if torch.cuda.is_available():
@@ -97,11 +389,32 @@ def get_device() -> str:
 
 
 class SceneDetector:
-    """TransNetV2-based scene detection."""
+    """
+    TransNetV2-based scene detection.
 
-    def __init__(self, device: str = None):
+    Frames are streamed from an FFmpeg pipe at TransNetV2's 48x27 input size
+    and run through the model one window at a time, so memory stays flat
+    however long the clip is. Per-frame transition probabilities are cached
+    by video content, so detecting the same clip again (at any threshold)
+    skips inference.
+    """
+
+    # TransNetV2 windowing: 100-frame windows advancing by 50, keeping the
+    # middle 50 predictions of each (25 frames of context on either side)
+    WINDOW_FRAMES = 100
+    STEP_FRAMES = 50
+    CONTEXT_FRAMES = 25
+    INPUT_WIDTH = 48
+    INPUT_HEIGHT = 27
+
+    # Chunks for parallel detection: at least this many frames each, so the
+    # per-process model load and seek stay small next to the chunk's work
+    MIN_CHUNK_FRAMES = 1500
+
+    def __init__(self, device: str = None, cache: Optional[ScenePredictionCache] = None):
         self.device = device or get_device()
         self.model = None
+        self.cache = cache
 
     def load(self):
         """Load the TransNetV2 model."""
@@ -113,33 +426,306 @@ class SceneDetector:
             self.model = TransNetV2(device=self.device)
             logger.info("TransNetV2 loaded successfully")
         except ImportError:
-            logger.warning("TransNetV2 not available, using fallback FFmpeg-based detection")
+            logger.warning("TransNetV2 not available, using fallback FFmpeg cut detection")
             self.model = None
 
-    def detect(self, video_path: str, threshold: float = 0.5) -> List[tuple]:
+    def detect(
+        self,
+        video_path: str,
+        threshold: float = 0.5,
+        on_progress: Callable[[int, int], None] = None,
+        workers: int = 1
+    ) -> List[tuple]:
         """
         Detect scene boundaries in video.
 
         Args:
             video_path: Path to video file
             threshold: Detection threshold (0.0-1.0)
+            on_progress: Optional callback(frames_done, total_frames)
+            workers: Processes to split long clips across (CPU only)
 
         Returns:
             List of (start_frame, end_frame) tuples
         """
         if self.model is None:
-            return self._fallback_detect(video_path)
+            return self._fallback_detect(video_path, on_progress, workers)
 
         try:
-            _, predictions, _ = self.model.predict_video(video_path)
+            predictions = self.predict(video_path, on_progress=on_progress, workers=workers)
             scenes = self.model.predictions_to_scenes(predictions, threshold=threshold)
-            return scenes
+            return [(int(start), int(end)) for start, end in scenes]
         except Exception as e:
             logger.error(f"Scene detection failed: {e}")
-            return self._fallback_detect(video_path)
+            return self._fallback_detect(video_path, on_progress, workers)
+
+    def predict(
+        self,
+        video_path: str,
+        on_progress: Callable[[int, int], None] = None,
+        workers: int = 1
+    ) -> np.ndarray:
+        """
+        Per-frame transition probabilities, from the cache when available.
+
+        With workers > 1, the clip is split into chunks that start on window
+        boundaries and are predicted in a process pool; the stitched result
+        is identical to a single pass.
+
+        Args:
+            video_path: Path to video file
+            on_progress: Optional callback(frames_done, total_frames)
+            workers: Processes to split long clips across (CPU only)
+
+        Returns:
+            Float32 array with one probability per frame
+        """
+        key = None
+        if self.cache is not None:
+            key = f"transnetv2_{video_fingerprint(video_path)}"
+            predictions = self.cache.get(key)
+            if predictions is not None:
+                logger.info(f"Scene predictions cache hit for {os.path.basename(video_path)}")
+                return predictions
+
+        predictions = None
+        if workers > 1:
+            chunks = self._map_chunks(video_path, 'transnetv2', workers, on_progress)
+            if chunks:
+                predictions = np.concatenate(chunks)
+
+        if predictions is None:
+            predictions = self._predict_streaming(video_path, on_progress)
+
+        if key is not None:
+            self.cache.put(key, predictions)
+
+        return predictions
+
+    def _plan_chunks(self, total_frames: int, workers: int) -> List[tuple]:
+        """Split [0, total_frames) into up to `workers` chunks aligned to STEP_FRAMES (last end None = EOF)."""
+        count = min(workers, total_frames // self.MIN_CHUNK_FRAMES)
+        if count < 2:
+            return [(0, None)]
+
+        size = -(-total_frames // count)
+        size = -(-size // self.STEP_FRAMES) * self.STEP_FRAMES
+        starts = list(range(0, total_frames, size))
+        return [(start, start + size) for start in starts[:-1]] + [(starts[-1], None)]
+
+    def _map_chunks(
+        self,
+        video_path: str,
+        mode: str,
+        workers: int,
+        on_progress: Callable[[int, int], None] = None
+    ) -> Optional[List]:
+        """
+        Run one detection pass per chunk in a process pool.
+
+        Args:
+            video_path: Path to video file
+            mode: 'transnetv2' (prediction arrays) or 'signals' (cut detector signals)
+            workers: Pool size
+            on_progress: Optional callback(frames_done, total_frames), per chunk
+
+        Returns:
+            Per-chunk results in clip order, or None when the clip is too
+            short to split or a chunk failed (callers then run a single pass)
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
 
-    def _fallback_detect(self, video_path: str) -> List[tuple]:
-        """Fallback scene detection using frame count."""
+        cap = cv2.VideoCapture(video_path)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        chunks = self._plan_chunks(total_frames, workers)
+        if len(chunks) < 2:
+            return None
+
+        # Split the cores between workers instead of oversubscribing them
+        threads = max(1, (os.cpu_count() or 1) // len(chunks))
+        logger.info(f"Scene detection: {len(chunks)} chunks on {len(chunks)} workers ({threads} threads each)")
+
+        results = {}
+        done = 0
+        try:
+            # spawn: forked children inherit torch's thread pools and can deadlock
+            with ProcessPoolExecutor(
+                max_workers=len(chunks),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_scene_worker,
+                initargs=(threads, mode == 'transnetv2')
+            ) as pool:
+                futures = {
+                    pool.submit(_detect_scene_chunk, video_path, mode, start, end, threads): (start, end)
+                    for start, end in chunks
+                }
+                for future in as_completed(futures):
+                    start, end = futures[future]
+                    results[start] = future.result()
+                    done += (end if end is not None else total_frames) - start
+                    if on_progress:
+                        on_progress(min(done, total_frames), total_frames)
+        except Exception as e:
+            logger.warning(f"Parallel scene detection failed, running a single pass: {e}")
+            return None
+
+        # Chunks must tile the clip exactly (frame-accurate seeking can fail on
+        # variable frame rate footage)
+        for start, end in chunks[:-1]:
+            result = results[start]
+            length = len(result) if mode == 'transnetv2' else len(result[0])
+            if length != end - start:
+                logger.warning(f"Chunk at frame {start} returned {length}/{end - start} frames, running a single pass")
+                return None
+
+        return [results[start] for start, _ in chunks]
+
+    def _read_frames(self, video_path: str, start_frame: int = 0, max_frames: int = None, fps: float = None):
+        """Yield batches of STEP_FRAMES 48x27 RGB frames from an FFmpeg pipe."""
+        import subprocess
+
+        cmd = ['ffmpeg', '-v', 'error']
+        if start_frame > 0:
+            # Accurate seek: half a frame early so rounding never skips start_frame
+            cmd += ['-ss', f'{(start_frame - 0.5) / fps:.6f}']
+        cmd += ['-i', video_path]
+        if max_frames:
+            cmd += ['-frames:v', str(max_frames)]
+
+        # Same scaling as TransNetV2.predict_video, without holding the clip
+        cmd += [
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            '-s', f'{self.INPUT_WIDTH}x{self.INPUT_HEIGHT}', 'pipe:'
+        ]
+        frame_bytes = self.INPUT_WIDTH * self.INPUT_HEIGHT * 3
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+        try:
+            while True:
+                data = proc.stdout.read(frame_bytes * self.STEP_FRAMES)
+                count = len(data) // frame_bytes
+                if count == 0:
+                    break
+                yield np.frombuffer(data[:count * frame_bytes], np.uint8).reshape(
+                    count, self.INPUT_HEIGHT, self.INPUT_WIDTH, 3
+                )
+        finally:
+            proc.stdout.close()
+            proc.kill()
+            proc.wait()
+
+    def _predict_streaming(
+        self,
+        video_path: str,
+        on_progress: Callable[[int, int], None] = None,
+        start_frame: int = 0,
+        end_frame: int = None
+    ) -> np.ndarray:
+        """
+        Run TransNetV2 over the clip (or frames [start_frame, end_frame)) window by window.
+
+        Reproduces TransNetV2.predict_frames (first frame repeated before the
+        clip, last frame after it, middle half of each window kept) while
+        only ever holding one window plus one step of decoded frames. A range
+        starting on a multiple of STEP_FRAMES decodes CONTEXT_FRAMES either
+        side of it, so its predictions match a full pass exactly.
+        """
+        cap = cv2.VideoCapture(video_path)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        cap.release()
+
+        read_start = max(0, start_frame - self.CONTEXT_FRAMES)
+        max_frames = None
+        if end_frame is not None:
+            max_frames = end_frame + self.WINDOW_FRAMES - self.STEP_FRAMES - self.CONTEXT_FRAMES - read_start
+            total_frames = end_frame - start_frame
+
+        predictions = []
+        done = 0
+        last_pct = -1
+        buffer = None  # buffer[0] is frame (start_frame + done - CONTEXT_FRAMES)
+        frames = self._read_frames(video_path, read_start, max_frames, fps)
+        eof = False
+
+        while True:
+            # Read ahead until a full window is buffered or the clip ends
+            while not eof and (buffer is None or len(buffer) < self.WINDOW_FRAMES):
+                batch = next(frames, None)
+                if batch is None:
+                    eof = True
+                elif buffer is None and start_frame == 0:
+                    buffer = np.concatenate([np.repeat(batch[:1], self.CONTEXT_FRAMES, axis=0), batch])
+                elif buffer is None:
+                    buffer = batch
+                else:
+                    buffer = np.concatenate([buffer, batch])
+
+            if buffer is None:
+                raise RuntimeError(f"No frames decoded from {video_path}")
+
+            count = min(self.STEP_FRAMES, len(buffer) - self.CONTEXT_FRAMES)
+            if end_frame is not None:
+                count = min(count, end_frame - start_frame - done)
+            if count <= 0:
+                break
+
+            window = buffer[:self.WINDOW_FRAMES]
+            if len(window) < self.WINDOW_FRAMES:
+                padding = np.repeat(window[-1:], self.WINDOW_FRAMES - len(window), axis=0)
+                window = np.concatenate([window, padding])
+
+            with torch.no_grad():
+                inputs = torch.from_numpy(window[np.newaxis]).to(self.model.device)
+                single_frame_pred, _ = self.model.predict_raw(inputs)
+
+            start = self.CONTEXT_FRAMES
+            predictions.append(single_frame_pred[0, start:start + count, 0].cpu().numpy())
+
+            done += count
+            buffer = buffer[self.STEP_FRAMES:]
+
+            if on_progress and total_frames > 0:
+                pct = min(100, done * 100 // total_frames)
+                if pct != last_pct:
+                    last_pct = pct
+                    on_progress(done, total_frames)
+
+        return np.concatenate(predictions).astype(np.float32)
+
+    def _fallback_detect(
+        self,
+        video_path: str,
+        on_progress: Callable[[int, int], None] = None,
+        workers: int = 1
+    ) -> List[tuple]:
+        """Fallback scene detection with the CPU cut detector."""
+        detector = FastCutDetector()
+        try:
+            chunks = self._map_chunks(video_path, 'signals', workers, on_progress) if workers > 1 else None
+            if chunks:
+                # Thresholds are adaptive over the whole clip, so only the
+                # signal extraction is split; transitions are found in one go
+                hists, pixel_diff, thumbs = (np.concatenate(parts) for parts in zip(*chunks))
+                cap = cv2.VideoCapture(video_path)
+                fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+                cap.release()
+                transitions = detector.find_transitions(hists, pixel_diff, thumbs, fps)
+                return detector.transitions_to_scenes(transitions, len(hists))
+
+            scenes = detector.detect(video_path, on_progress=on_progress)
+            if scenes:
+                return scenes
+        except Exception as e:
+            logger.error(f"Fast cut detection failed: {e}")
+
+        return self._fixed_interval_scenes(video_path)
+
+    def _fixed_interval_scenes(self, video_path: str) -> List[tuple]:
+        """Last-resort scenes every 5 seconds, when frames cannot be decoded."""
         cap = cv2.VideoCapture(video_path)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         fps = cap.get(cv2.CAP_PROP_FPS)
@@ -161,32 +747,281 @@ class SceneDetector:
         return scenes
 
 
+# Process-pool side of chunk-parallel scene detection. Each worker process
+# keeps one detector (and its TransNetV2 weights) for all of its chunks.
+_scene_worker: Optional[SceneDetector] = None
+
+
+def _init_scene_worker(threads: int, load_model: bool):
+    """Pool initializer: limit threads and load the model once per process."""
+    global _scene_worker
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(threads)
+    _scene_worker = SceneDetector(device='cpu')
+    if load_model:
+        _scene_worker.load()
+
+
+def _detect_scene_chunk(video_path: str, mode: str, start: int, end: Optional[int], threads: int):
+    """Predictions (or cut detector signals) for frames [start, end)."""
+    if mode == 'transnetv2':
+        return _scene_worker._predict_streaming(video_path, start_frame=start, end_frame=end)
+
+    frame_count = end - start if end is not None else None
+    return FastCutDetector(threads=threads).read_signals(video_path, start, frame_count)
+
+
 class QualityFilter:
     """Quality filtering using Laplacian variance and optionally NIMA."""
 
+    # Per-frame metrics returned by compute_quality_batch()
+    METRICS = ('sharpness', 'tile_sharpness', 'luminance', 'clipping', 'contrast', 'noise')
+
+    TILES = 4  # tile_sharpness grid (TILES x TILES)
+    CLIP_LOW = 2  # Gray levels at or below count as crushed shadows
+    CLIP_HIGH = 253  # Gray levels at or above count as blown highlights
+    _NOISE_KERNEL = np.array([1.0, -2.0, 1.0], dtype=np.float32)
+
+    NIMA_SIZE = 224  # Default NIMA input size when the model does not fix one
+    _IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+    _IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
     def __init__(self):
         self.nima_session = None
+        self._buffers: Dict[tuple, np.ndarray] = {}
+        self._nima_input = None
+        self._nima_size = self.NIMA_SIZE
+        self._nima_channels_last = False
+        self._nima_fixed_batch = None
+        self._nima_preprocessing = 'imagenet'
+
+    def load_nima(self, model_path: str = None, threads: int = 0):
+        """
+        Load the NIMA aesthetic model into an ONNX Runtime CPU session.
+
+        The model takes RGB images (NCHW or NHWC) and outputs a 10-bucket
+        score distribution. Inputs are ImageNet-normalized for NCHW models
+        (PyTorch exports) and scaled to [-1, 1] for NHWC models (Keras
+        MobileNet exports); a 'preprocessing' metadata entry of 'imagenet'
+        or 'inception' overrides this.
+
+        Args:
+            model_path: Path to nima.onnx (default: models/nima.onnx)
+            threads: Intra-op threads (0 = ONNX Runtime default)
+        """
+        if self.nima_session is not None:
+            return
+
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            logger.error(f"ONNX Runtime not available: {e}")
+            return
+
+        if model_path is None:
+            model_path = os.path.join(os.path.dirname(__file__), 'models', 'nima.onnx')
+
+        if not os.path.exists(model_path):
+            logger.warning(f"NIMA model not found at {model_path}")
+            return
+
+        try:
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if threads:
+                options.intra_op_num_threads = threads
+            session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        except Exception as e:
+            logger.error(f"Could not load NIMA model {model_path}: {e}")
+            return
+
+        model_input = session.get_inputs()[0]
+        shape = model_input.shape
+        self._nima_input = model_input.name
+        self._nima_channels_last = shape[-1] == 3
+        self._nima_fixed_batch = shape[0] if isinstance(shape[0], int) and shape[0] > 0 else None
+        size = shape[1] if self._nima_channels_last else shape[-1]
+        self._nima_size = size if isinstance(size, int) and size > 0 else self.NIMA_SIZE
+
+        metadata = session.get_modelmeta().custom_metadata_map
+        self._nima_preprocessing = metadata.get(
+            'preprocessing', 'inception' if self._nima_channels_last else 'imagenet'
+        )
+
+        self.nima_session = session
+        logger.info(
+            f"NIMA loaded ({self._nima_size}px, "
+            f"{'batch ' + str(self._nima_fixed_batch) if self._nima_fixed_batch else 'dynamic batch'})"
+        )
+
+    def score_aesthetics(self, images: List[np.ndarray], batch_size: int = 32) -> List[float]:
+        """
+        Mean NIMA score (1-10) for each image, run in batches.
+
+        Images are resized into a reused uint8 batch buffer, then colour
+        conversion, normalization and layout change run once per batch.
+        Models with a fixed batch dimension get padded batches.
+
+        Args:
+            images: BGR image arrays; None entries score 0
+            batch_size: Images per inference call (dynamic-batch models)
+
+        Returns:
+            One score per image (all 0.0 if NIMA is not loaded)
+        """
+        scores = [0.0] * len(images)
+        if self.nima_session is None:
+            return scores
+
+        valid = [i for i, image in enumerate(images) if image is not None]
+        step = self._nima_fixed_batch or max(1, batch_size)
+        size = self._nima_size
+        buckets = np.arange(1, 11, dtype=np.float32)
+
+        for start in range(0, len(valid), step):
+            chunk = valid[start:start + step]
+            rows = self._nima_fixed_batch or len(chunk)
+            batch = self._buffers.get(('nima', rows))
+            if batch is None:
+                batch = self._buffers[('nima', rows)] = np.zeros((rows, size, size, 3), dtype=np.uint8)
+
+            for row, index in enumerate(chunk):
+                cv2.resize(images[index], (size, size), dst=batch[row], interpolation=cv2.INTER_AREA)
+
+            # BGR -> RGB, scale and layout for the whole batch at once
+            inputs = batch[..., ::-1].astype(np.float32)
+            if self._nima_preprocessing == 'inception':
+                inputs = inputs / 127.5 - 1.0
+            else:
+                inputs = (inputs / 255.0 - self._IMAGENET_MEAN) / self._IMAGENET_STD
+            if not self._nima_channels_last:
+                inputs = inputs.transpose(0, 3, 1, 2)
+
+            distribution = self.nima_session.run(None, {self._nima_input: np.ascontiguousarray(inputs)})[0]
+            distribution = distribution[:len(chunk)].astype(np.float32)
+
+            # Exports without the final softmax return logits
+            if not np.allclose(distribution.sum(axis=1), 1.0, atol=1e-3):
+                distribution = np.exp(distribution - distribution.max(axis=1, keepdims=True))
+                distribution /= distribution.sum(axis=1, keepdims=True)
+
+            for index, score in zip(chunk, distribution @ buckets):
+                scores[index] = float(score)
+
+        return scores
 
     def compute_sharpness(self, image: np.ndarray) -> float:
         """
         Compute sharpness using Laplacian variance.
 
+        Laplacian variance grows with pixel density, so frames larger than
+        SHARPNESS_REFERENCE_SIZE on the long edge are area-downscaled to it
+        first. Thresholds tuned on 1080p therefore hold for 4K/6K sources and
+        for reduced-resolution analysis frames. Smaller frames are measured
+        as-is (upscaling adds no detail).
+
         Args:
             image: BGR image array
 
         Returns:
             Sharpness score (higher = sharper)
         """
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-        return float(laplacian.var())
+        return self.compute_quality(image)['sharpness']
+
+    def compute_quality(self, image: np.ndarray) -> Dict[str, float]:
+        """All quality metrics for one BGR image (see compute_quality_batch)."""
+        return self.compute_quality_batch([image])[0]
+
+    def compute_quality_batch(self, images: List[np.ndarray]) -> List[Dict[str, float]]:
+        """
+        Compute all quality metrics for a batch of frames.
+
+        Each frame is converted to grayscale at SHARPNESS_REFERENCE_SIZE once
+        (as in compute_sharpness), and every metric is taken from that image
+        and its float32 Laplacian. Filter outputs go into work buffers that
+        are kept between calls, so a batch allocates nothing per frame.
+
+        Metrics:
+        - sharpness: Laplacian variance of the whole frame
+        - tile_sharpness: highest Laplacian variance of a TILES x TILES grid
+          (a sharp subject against a soft background still scores high)
+        - luminance: mean gray level (0-255)
+        - clipping: percentage of pixels crushed to black or blown to white
+        - contrast: RMS contrast (gray level standard deviation)
+        - noise: Gaussian noise sigma in gray levels (Immerkaer's estimator)
+
+        Args:
+            images: BGR (or grayscale) image arrays; None entries score 0
+
+        Returns:
+            One metrics dict per image, in input order
+        """
+        results = []
+        for image in images:
+            if image is None or min(image.shape[:2]) < 3:
+                results.append(dict.fromkeys(self.METRICS, 0.0))
+                continue
+
+            gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            height, width = gray.shape[:2]
+            ref_size = fit_long_edge(width, height, SHARPNESS_REFERENCE_SIZE)
+            if ref_size != (width, height):
+                gray = cv2.resize(gray, ref_size, interpolation=cv2.INTER_AREA)
+            results.append(self._frame_quality(gray))
+
+        return results
+
+    def _buffer(self, name: str, shape: Tuple[int, int]) -> np.ndarray:
+        """Reusable float32 work buffer for one frame size."""
+        buffer = self._buffers.get((name, shape))
+        if buffer is None:
+            buffer = self._buffers[(name, shape)] = np.empty(shape, dtype=np.float32)
+        return buffer
+
+    def _frame_quality(self, gray: np.ndarray) -> Dict[str, float]:
+        """Metrics for one uint8 gray frame at the reference size."""
+        height, width = gray.shape
+        pixels = height * width
+
+        mean, std = cv2.meanStdDev(gray)
+        unclipped = cv2.countNonZero(cv2.inRange(gray, self.CLIP_LOW + 1, self.CLIP_HIGH - 1))
+
+        # 4-neighbour Laplacian (ksize=1), same kernel and border as before
+        laplacian = cv2.Laplacian(gray, cv2.CV_32F, dst=self._buffer('laplacian', gray.shape))
+        sharpness = float(cv2.meanStdDev(laplacian)[1][0, 0]) ** 2
+
+        tile_sharpness = 0.0
+        tile_h, tile_w = height // self.TILES, width // self.TILES
+        if tile_h and tile_w:
+            for y in range(0, tile_h * self.TILES, tile_h):
+                for x in range(0, tile_w * self.TILES, tile_w):
+                    tile_std = cv2.meanStdDev(laplacian[y:y + tile_h, x:x + tile_w])[1][0, 0]
+                    tile_sharpness = max(tile_sharpness, float(tile_std) ** 2)
+
+        # Immerkaer noise estimate: the separable [1 -2 1] x [1 -2 1] mask
+        # cancels image structure up to second order and leaves noise
+        second = cv2.sepFilter2D(
+            gray, cv2.CV_32F, self._NOISE_KERNEL, self._NOISE_KERNEL,
+            dst=self._buffer('second', gray.shape)
+        )
+        noise = np.sqrt(np.pi / 2) / 6.0 * cv2.norm(second, cv2.NORM_L1) / pixels
+
+        return {
+            'sharpness': sharpness,
+            'tile_sharpness': tile_sharpness,
+            'luminance': float(mean[0, 0]),
+            'clipping': 100.0 * (pixels - unclipped) / pixels,
+            'contrast': float(std[0, 0]),
+            'noise': float(noise),
+        }
 
     def compute_sharpness_from_path(self, image_path: str) -> float:
         """Compute sharpness from image file."""
-        image = cv2.imread(image_path)
-        if image is None:
-            return 0.0
-        return self.compute_sharpness(image)
+        return self.compute_quality_from_path(image_path)['sharpness']
+
+    def compute_quality_from_path(self, image_path: str) -> Dict[str, float]:
+        """Compute all quality metrics from image file (zeros if unreadable)."""
+        return self.compute_quality(cv2.imread(image_path))
 
     def is_sharp(self, image_path: str, threshold: float = 100.0) -> bool:
         """Check if image passes sharpness threshold."""
@@ -196,9 +1031,48 @@ class QualityFilter:
 class FaceDetector:
     """InsightFace-based face detection."""
 
-    def __init__(self, device: str = None):
+    # buffalo_l modules that run on each detected face
+    MODULES = ('landmark_3d_68', 'landmark_2d_106', 'genderage', 'recognition')
+
+    def __init__(
+        self,
+        device: str = None,
+        modules: List[str] = None,
+        min_face_area: float = 0.0,
+        min_face_score: float = 0.0
+    ):
+        """
+        Args:
+            device: Device for ONNX Runtime providers (default: auto-detect)
+            modules: Face modules to run after detection (default: all of MODULES)
+            min_face_area: Minimum face box area, as a fraction of the frame,
+                for the face modules to run (0.005 = 0.5%)
+            min_face_score: Minimum detection score for the face modules to run
+        """
         self.device = device or get_device()
         self.app = None
+        self.configure(modules, min_face_area, min_face_score)
+        self.reset_counters()
+
+    def configure(self, modules: List[str] = None, min_face_area: float = 0.0, min_face_score: float = 0.0):
+        """
+        Choose the face modules and the gate a face must pass to get them.
+
+        Faces below the gate keep their detection results (box, 5 keypoints,
+        score) but get no landmarks, age/gender or embedding. Modules left out
+        of a loaded model are skipped; load() only loads the listed modules.
+        """
+        modules = tuple(modules) if modules is not None else self.MODULES
+        unknown = set(modules) - set(self.MODULES)
+        if unknown:
+            raise ValueError(f"Unknown face modules: {sorted(unknown)} (expected {list(self.MODULES)})")
+        self.modules = modules
+        self.min_face_area = min_face_area
+        self.min_face_score = min_face_score
+
+    def reset_counters(self):
+        """Zero the per-job face counters."""
+        self.counters = {'faces': 0, 'analyzed': 0, 'gated': 0, 'tracks': 0, 'skipped_inference': {}}
 
     def load(self):
         """Load the InsightFace model."""
@@ -212,7 +1086,9 @@ class FaceDetector:
             if self.device == 'cuda':
                 providers = ['CUDAExecutionProvider', 'CPUExecutionProvider']
 
-            self.app = FaceAnalysis(name='buffalo_l', providers=providers)
+            self.app = FaceAnalysis(
+                name='buffalo_l', allowed_modules=['detection', *self.modules], providers=providers
+            )
             self.app.prepare(ctx_id=0 if self.device == 'cuda' else -1, det_size=(640, 640))
             logger.info("InsightFace loaded successfully")
         except ImportError as e:
@@ -236,120 +1112,366 @@ class FaceDetector:
         if image is None:
             return []
 
-        faces = self.app.get(image)
-        results = []
+        return self.detect_array(image)
 
-        for face in faces:
-            face_data = FaceData(
-                bbox=face.bbox.tolist(),
-                confidence=float(face.det_score),
-                landmarks=face.kps.tolist() if face.kps is not None else None,
-                embedding=face.embedding.tolist() if face.embedding is not None else None,
-                age=int(face.age) if face.age is not None else None,
-                gender='M' if face.gender == 1 else 'F' if face.gender == 0 else None,
-                pose=face.pose.tolist() if face.pose is not None else None,
-            )
+    def detect_array(self, image: np.ndarray) -> List[FaceData]:
+        """
+        Detect faces in an already decoded image.
 
-            # Estimate smile - prefer 106-point landmarks if available
-            landmark_106 = getattr(face, 'landmark_2d_106', None)
-            if landmark_106 is not None:
-                face_data.smile_score = self._estimate_smile_106(landmark_106)
-            elif face_data.landmarks and len(face_data.landmarks) >= 5:
-                face_data.smile_score = self._estimate_smile_5pt(face_data.landmarks)
+        Args:
+            image: BGR image array
 
-            results.append(face_data)
+        Returns:
+            List of FaceData objects
+        """
+        if self.app is None or image is None:
+            return []
 
-        return results
+        return self.detect_batch([image])[0]
 
-    def _estimate_smile_106(self, landmarks: np.ndarray) -> float:
+    def detect_batch(
+        self,
+        images: List[np.ndarray],
+        batch_size: int = 64,
+        tracker: 'FaceTracker' = None,
+        scene_indices: List[int] = None,
+        store: FaceStore = None
+    ) -> List[list]:
         """
-        Estimate smile score from 106-point landmarks.
+        Detect faces in several decoded images, batching the face models.
+
+        Detection runs once per image. The crops of all faces that pass the
+        size and score gate are then stacked so the enabled landmark,
+        gender/age and recognition models each run once per batch_size faces
+        instead of once per face. Ungated, the results match a per-image
+        FaceAnalysis.get().
+
+        With a tracker, faces are linked to the same person in the previous
+        sample of the scene and carry a track_id. Recognition is then left
+        to embed_tracks(), which embeds one observation per track, so
+        embeddings come back as None here.
 
-        Uses mouth shape analysis:
-        - Lip curvature (corners up = smile)
-        - Mouth openness
-        - Lip stretch ratio
+        Args:
+            images: BGR image arrays in sample order; None entries get no faces
+            batch_size: Face crops per inference call (dynamic-batch models)
+            tracker: FaceTracker carried across calls for one job
+            scene_indices: Scene of each image (default: all scene 0)
+            store: FaceStore to add the faces to, returning FaceRecords
 
-        106-point landmark indices for mouth:
-        - 52-71: Outer lip contour
-        - 72-82: Inner lip contour (upper)
-        - 84-90: Inner lip contour (lower)
+        Returns:
+            One list of FaceData objects (FaceRecords with a store) per image
         """
-        try:
-            if landmarks is None or len(landmarks) < 106:
-                return 0.0
-
-            # Key mouth points
-            left_corner = np.array(landmarks[52])   # Left mouth corner
-            right_corner = np.array(landmarks[61])  # Right mouth corner
-            upper_lip_center = np.array(landmarks[57])  # Upper lip center
-            lower_lip_center = np.array(landmarks[66])  # Lower lip center
-
-            # Eye points for face height reference
-            left_eye = np.array(landmarks[38])   # Left eye center
-            right_eye = np.array(landmarks[88])  # Right eye center
-
-            # Calculate metrics
-            mouth_width = np.linalg.norm(right_corner - left_corner)
-            eye_distance = np.linalg.norm(right_eye - left_eye)
-
-            # 1. Mouth width to eye distance ratio (wider = more smile)
-            width_ratio = mouth_width / eye_distance if eye_distance > 0 else 0
-            width_score = np.clip((width_ratio - 0.9) * 3, 0.0, 1.0)
-
-            # 2. Corner elevation (corners up relative to center = smile)
-            mouth_center_y = (upper_lip_center[1] + lower_lip_center[1]) / 2
-            left_corner_lift = mouth_center_y - left_corner[1]
-            right_corner_lift = mouth_center_y - right_corner[1]
-            avg_lift = (left_corner_lift + right_corner_lift) / 2
-            face_height = eye_distance * 1.5  # Approximate
-            lift_score = np.clip(avg_lift / (face_height * 0.03) + 0.5, 0.0, 1.0)
-
-            # 3. Mouth openness (teeth showing = often smiling)
-            mouth_height = np.linalg.norm(upper_lip_center - lower_lip_center)
-            openness_ratio = mouth_height / mouth_width if mouth_width > 0 else 0
-            openness_score = np.clip(openness_ratio * 2, 0.0, 0.5)  # Cap contribution
-
-            # Combined score: weighted average
-            smile_score = width_score * 0.4 + lift_score * 0.4 + openness_score * 0.2
-            return float(np.clip(smile_score, 0.0, 1.0))
+        if self.app is None:
+            return [[] for _ in images]
 
-        except Exception as e:
-            logger.warning(f"Error in smile estimation: {e}")
-            return 0.0
+        from insightface.app.common import Face
+
+        detected = []  # (image index, Face)
+        for index, image in enumerate(images):
+            if image is None:
+                continue
+            bboxes, kpss = self.app.det_model.detect(image, max_num=0, metric='default')
+            for i in range(bboxes.shape[0]):
+                detected.append((index, Face(
+                    bbox=bboxes[i, 0:4],
+                    kps=kpss[i] if kpss is not None else None,
+                    det_score=bboxes[i, 4],
+                )))
+
+        if tracker is not None:
+            for index, image in enumerate(images):
+                if image is not None:
+                    scene_index = scene_indices[index] if scene_indices else 0
+                    tracker.update(scene_index, [face for i, face in detected if i == index])
+
+        # Tiny and low-confidence faces only keep their detection results
+        analyzed = [(i, face) for i, face in detected if self._passes_gate(face, images[i].shape)]
+        self.counters['faces'] += len(detected)
+        self.counters['analyzed'] += len(analyzed)
+        self.counters['gated'] += len(detected) - len(analyzed)
+
+        for taskname, model in self.app.models.items():
+            if taskname == 'detection':
+                continue
+            targets = analyzed if taskname in self.modules else []
+            skipped = self.counters['skipped_inference']
+            skipped[taskname] = skipped.get(taskname, 0) + len(detected) - len(targets)
+            if not targets:
+                continue
+            if taskname == 'recognition' and tracker is not None:
+                # Keep the best crop of each track for embed_tracks()
+                from insightface.utils import face_align
+                size = model.input_size[0]
+                for i, face in targets:
+                    tracker.offer(
+                        face['track_id'], tracker.observation_quality(face),
+                        lambda image=images[i], kps=face.kps: face_align.norm_crop(image, landmark=kps, image_size=size)
+                    )
+            else:
+                self._run_face_model(model, images, targets, batch_size)
+
+        self._score_expressions([face for _, face in detected])
 
-    def _estimate_smile_5pt(self, landmarks: List[List[float]]) -> float:
+        results = [[] for _ in images]
+        for index, face in detected:
+            if store is None:
+                results[index].append(self._face_data(face))
+            else:
+                results[index].append(store.add(
+                    bbox=face.bbox,
+                    confidence=face.det_score,
+                    landmarks=face.kps,
+                    embedding=face.embedding,
+                    age=face.age,
+                    gender=face.gender,
+                    pose=face.pose,
+                    smile_score=face.get('smile_score'),
+                    mouth_open=face.get('mouth_open'),
+                    eye_open=face.get('eye_open'),
+                    track_id=face.get('track_id'),
+                ))
+        return results
+
+    def embed_tracks(self, tracker: 'FaceTracker', batch_size: int = 64) -> Dict[int, np.ndarray]:
         """
-        Fallback: Estimate smile score from 5-point landmarks.
+        Run recognition once per track, on its best observation.
 
-        Landmarks order: left_eye, right_eye, nose, left_mouth, right_mouth
+        Returns:
+            track_id -> embedding for every track with a recognition crop
         """
-        if len(landmarks) < 5:
-            return 0.0
+        model = self.app.models.get('recognition') if self.app is not None else None
+        if model is None or not tracker.best:
+            return {}
+
+        track_ids = list(tracker.best)
+        outputs = self._run_crops(model, [tracker.best[t][1] for t in track_ids], batch_size)
+
+        skipped = self.counters['skipped_inference']
+        skipped['recognition'] = skipped.get('recognition', 0) + tracker.observations - len(track_ids)
+        self.counters['tracks'] += len(track_ids)
+        return {t: outputs[row].flatten() for row, t in enumerate(track_ids)}
+
+    def _passes_gate(self, face, shape: Tuple[int, ...]) -> bool:
+        """Whether a detected face is large and confident enough for the face modules."""
+        bbox = face.bbox
+        area = max(0.0, bbox[2] - bbox[0]) * max(0.0, bbox[3] - bbox[1])
+        return (
+            area >= self.min_face_area * shape[0] * shape[1]
+            and float(face.det_score) >= self.min_face_score
+        )
 
-        left_eye = np.array(landmarks[0])
-        right_eye = np.array(landmarks[1])
-        left_mouth = np.array(landmarks[3])
-        right_mouth = np.array(landmarks[4])
+    def _run_face_model(self, model, images: List[np.ndarray], detected: List[tuple], batch_size: int):
+        """Run one InsightFace model over all detected faces, as model.get() would per face."""
+        from insightface.utils import face_align
+
+        taskname = model.taskname
+        size = model.input_size[0]
+
+        if taskname == 'recognition':
+            crops = [face_align.norm_crop(images[i], landmark=face.kps, image_size=size) for i, face in detected]
+        elif taskname == 'genderage' or taskname.startswith('landmark'):
+            crops, transforms = [], []
+            for i, face in detected:
+                bbox = face.bbox
+                w, h = (bbox[2] - bbox[0]), (bbox[3] - bbox[1])
+                center = (bbox[2] + bbox[0]) / 2, (bbox[3] + bbox[1]) / 2
+                crop, M = face_align.transform(images[i], center, size, size / (max(w, h) * 1.5), 0)
+                crops.append(crop)
+                transforms.append(M)
+        else:
+            # Unknown model types keep their own per-face path
+            for i, face in detected:
+                model.get(images[i], face)
+            return
 
-        # Face width approximation
-        face_width = np.linalg.norm(right_eye - left_eye)
-        mouth_width = np.linalg.norm(right_mouth - left_mouth)
+        outputs = self._run_crops(model, crops, batch_size)
 
-        # Mouth width ratio (wider = more smile)
-        width_ratio = mouth_width / face_width if face_width > 0 else 0
+        for row, (_, face) in enumerate(detected):
+            pred = outputs[row]
+            if taskname == 'recognition':
+                face.embedding = pred.flatten()
+            elif taskname == 'genderage':
+                face['gender'] = np.argmax(pred[:2])
+                face['age'] = int(np.round(pred[2] * 100))
+            else:
+                face[taskname], pose = self._landmarks_from_prediction(model, pred, transforms[row])
+                if pose is not None:
+                    face['pose'] = pose
+
+    @staticmethod
+    def _run_crops(model, crops: List[np.ndarray], batch_size: int) -> np.ndarray:
+        """Stack crops into blobs and run the model's ONNX session once per batch."""
+        model_input = model.session.get_inputs()[0]
+        fixed_batch = model_input.shape[0] if isinstance(model_input.shape[0], int) and model_input.shape[0] > 0 else None
+        step = fixed_batch or max(1, batch_size)
+        mean = (model.input_mean, model.input_mean, model.input_mean)
+        dtype = getattr(model, 'input_dtype', np.float32)
+
+        outputs = []
+        for start in range(0, len(crops), step):
+            chunk = crops[start:start + step]
+            blob = cv2.dnn.blobFromImages(chunk, 1.0 / model.input_std, tuple(model.input_size), mean, swapRB=True)
+            if fixed_batch and len(chunk) < fixed_batch:
+                blob = np.concatenate([blob, np.zeros((fixed_batch - len(chunk),) + blob.shape[1:], blob.dtype)])
+            blob = np.ascontiguousarray(blob, dtype=dtype)
+            outputs.append(model.session.run(model.output_names, {model.input_name: blob})[0][:len(chunk)])
+        return np.concatenate(outputs)
+
+    @staticmethod
+    def _landmarks_from_prediction(model, pred: np.ndarray, M: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Map a landmark model's output back to image pixels (and pose for 3D models)."""
+        from insightface.utils import face_align
+
+        pred = pred.reshape((-1, 3) if pred.shape[0] >= 3000 else (-1, 2)).copy()
+        if model.lmk_num < pred.shape[0]:
+            pred = pred[model.lmk_num * -1:, :]
+        pred[:, 0:2] += 1
+        pred[:, 0:2] *= (model.input_size[0] // 2)
+        if pred.shape[1] == 3:
+            pred[:, 2] *= (model.input_size[0] // 2)
+        pred = face_align.trans_points(pred, cv2.invertAffineTransform(M))
+
+        pose = None
+        if model.require_pose:
+            from insightface.utils import transform
+            P = transform.estimate_affine_matrix_3d23d(model.mean_lmk, pred)
+            s, R, t = transform.P2sRt(P)
+            pose = np.array(transform.matrix2angle(R), dtype=np.float32)  # pitch, yaw, roll
+        return pred, pose
+
+    def _face_data(self, face) -> FaceData:
+        """Convert an InsightFace Face to FaceData."""
+        return FaceData(
+            bbox=face.bbox.tolist(),
+            confidence=float(face.det_score),
+            landmarks=face.kps.tolist() if face.kps is not None else None,
+            embedding=face.embedding.tolist() if face.embedding is not None else None,
+            age=int(face.age) if face.age is not None else None,
+            gender='M' if face.gender == 1 else 'F' if face.gender == 0 else None,
+            pose=face.pose.tolist() if face.pose is not None else None,
+            smile_score=face.get('smile_score'),
+            mouth_open=face.get('mouth_open'),
+            eye_open=face.get('eye_open'),
+            track_id=face.get('track_id'),
+        )
 
-        # Normalize to 0-1 range
-        smile_score = np.clip((width_ratio - 0.4) * 2, 0.0, 1.0)
-        return float(smile_score)
+    @staticmethod
+    def _score_expressions(faces: list):
+        """Set smile_score, mouth_open and eye_open on faces, one NumPy pass per landmark set."""
+        with_106 = [f for f in faces if getattr(f, 'landmark_2d_106', None) is not None]
+        with_kps = [f for f in faces if getattr(f, 'landmark_2d_106', None) is None and f.kps is not None]
+        for group, landmarks in ((with_106, 'landmark_2d_106'), (with_kps, 'kps')):
+            if not group:
+                continue
+            scores = score_expressions(np.stack([f[landmarks] for f in group]))
+            for row, face in enumerate(group):
+                for name, key in (('smile', 'smile_score'), ('mouth_open', 'mouth_open'), ('eye_open', 'eye_open')):
+                    value = scores[name][row]
+                    face[key] = None if np.isnan(value) else float(value)
+
+
+class FaceTracker:
+    """
+    Links faces across consecutive samples of a scene.
+
+    A face continues a track from the previous sample when the boxes overlap
+    by at least min_iou and the five keypoints moved less than
+    max_landmark_motion face widths on average; greedy matching takes the
+    highest overlaps first. Every other face starts a new track, and a new
+    scene ends all tracks. The best observation of each track (confident,
+    large faces first) keeps its recognition crop for a single embedding.
+    """
+
+    def __init__(self, min_iou: float = 0.3, max_landmark_motion: float = 0.25):
+        self.min_iou = min_iou
+        self.max_landmark_motion = max_landmark_motion
+        self.reset()
+
+    def reset(self):
+        """Forget all tracks (start of a job)."""
+        self.next_id = 0
+        self.scene = None
+        self.active: List[tuple] = []  # (track_id, bbox, kps) seen in the previous sample
+        self.best: Dict[int, tuple] = {}  # track_id -> (quality, recognition crop)
+        self.observations = 0
+
+    @staticmethod
+    def iou(a: np.ndarray, b: np.ndarray) -> float:
+        """Intersection over union of two x1, y1, x2, y2 boxes."""
+        width = min(a[2], b[2]) - max(a[0], b[0])
+        height = min(a[3], b[3]) - max(a[1], b[1])
+        if width <= 0 or height <= 0:
+            return 0.0
+        inter = width * height
+        union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+        return float(inter / union) if union > 0 else 0.0
+
+    @staticmethod
+    def observation_quality(face) -> float:
+        """Detection score, discounted for faces smaller than an ArcFace crop."""
+        bbox = face.bbox
+        side = np.sqrt(max(0.0, bbox[2] - bbox[0]) * max(0.0, bbox[3] - bbox[1]))
+        return float(face.det_score) * min(1.0, side / 112.0)
+
+    def update(self, scene_index: int, faces: list):
+        """Set face['track_id'] for the faces of the next sample."""
+        if scene_index != self.scene:
+            self.scene = scene_index
+            self.active = []
+
+        pairs = []
+        for fi, face in enumerate(faces):
+            for ti, (_, bbox, kps) in enumerate(self.active):
+                overlap = self.iou(face.bbox, bbox)
+                if overlap < self.min_iou:
+                    continue
+                if kps is not None and face.kps is not None:
+                    width = max(1.0, float(face.bbox[2] - face.bbox[0]))
+                    motion = np.linalg.norm(face.kps - kps, axis=1).mean() / width
+                    if motion > self.max_landmark_motion:
+                        continue
+                pairs.append((overlap, fi, ti))
+
+        assigned, used = {}, set()
+        for _, fi, ti in sorted(pairs, reverse=True):
+            if fi not in assigned and ti not in used:
+                assigned[fi] = self.active[ti][0]
+                used.add(ti)
+
+        active = []
+        for fi, face in enumerate(faces):
+            track_id = assigned.get(fi)
+            if track_id is None:
+                track_id = self.next_id
+                self.next_id += 1
+            face['track_id'] = track_id
+            active.append((track_id, face.bbox.copy(), face.kps.copy() if face.kps is not None else None))
+        self.active = active
+
+    def offer(self, track_id: int, quality: float, make_crop: Callable[[], np.ndarray]):
+        """Keep an observation's recognition crop if it is the track's best so far."""
+        self.observations += 1
+        best = self.best.get(track_id)
+        if best is None or quality > best[0]:
+            self.best[track_id] = (quality, make_crop())
 
 
 class ContentTagger:
     """RAM++ based content tagging."""
 
+    IMAGE_SIZE = 384  # RAM++ Swin-L input size
+    _IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+    _IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+    # Rough peak inference memory per 384px image for Swin-L (activations and
+    # attention maps in float32). Used to size batches to the free memory.
+    BYTES_PER_IMAGE = 160 * 1024 * 1024
+    MAX_BATCH_SIZE = 32
+
     def __init__(self, device: str = None):
         self.device = device or get_device()
         self.model = None
+        self._buffers: Dict[int, np.ndarray] = {}
 
     def load(self, model_path: str = None):
         """Load the RAM++ model."""
@@ -385,33 +1507,105 @@ class ContentTagger:
             logger.error(f"RAM++ not available: {e}")
             self.model = None
 
-    def tag(self, image_path: str) -> List[str]:
+    def tag(self, image_path: str) -> List[str]:
+        """
+        Generate tags for an image.
+
+        Args:
+            image_path: Path to image file
+
+        Returns:
+            List of tags
+        """
+        if self.model is None:
+            return []
+
+        return self.tag_array(cv2.imread(image_path))
+
+    def tag_array(self, image: np.ndarray) -> List[str]:
+        """
+        Generate tags for an already decoded image.
+
+        Args:
+            image: BGR image array
+
+        Returns:
+            List of tags
         """
-        Generate tags for an image.
+        return self.tag_batch([image])[0]
+
+    def tag_batch(self, images: List[np.ndarray], batch_size: int = None) -> List[List[str]]:
+        """
+        Generate tags for many decoded images, one RAM++ call per batch.
+
+        Images are resized into a reused uint8 batch buffer, then colour
+        conversion and ImageNet normalization run once per batch. tag() and
+        tag_array() go through here with a batch of one, so every path
+        shares the same preprocessing and tag parsing.
 
         Args:
-            image_path: Path to image file
+            images: BGR image arrays; None entries get no tags
+            batch_size: Images per inference call (None = sized to free memory)
 
         Returns:
-            List of tags
+            One tag list per image (all empty if RAM++ is not loaded)
         """
+        results: List[List[str]] = [[] for _ in images]
         if self.model is None:
-            return []
+            return results
+
+        valid = [i for i, image in enumerate(images) if image is not None]
+        step = max(1, batch_size or self.auto_batch_size())
+
+        for start in range(0, len(valid), step):
+            chunk = valid[start:start + step]
+            try:
+                with torch.no_grad():
+                    tags, _ = self.model.generate_tag(self._preprocess([images[i] for i in chunk]))
+            except Exception as e:
+                logger.error(f"Tagging failed: {e}")
+                continue
+
+            for index, text in zip(chunk, tags):
+                results[index] = self._parse_tags(text)
 
+        return results
+
+    def auto_batch_size(self) -> int:
+        """Images per RAM++ call that fit in half of the free device memory."""
+        free = None
         try:
-            from PIL import Image
-            from ram.inference import inference_ram
+            if self.device == 'cuda':
+                free = torch.cuda.mem_get_info()[0]
+            else:
+                # CPU and MPS (unified memory) both draw on system RAM
+                free = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (AttributeError, ValueError, OSError, RuntimeError):
+            pass
 
-            image = Image.open(image_path).convert('RGB')
+        if not free:
+            return 8
+        return int(np.clip(free // 2 // self.BYTES_PER_IMAGE, 1, self.MAX_BATCH_SIZE))
 
-            with torch.no_grad():
-                tags_str = inference_ram(image, self.model)
+    def _preprocess(self, images: List[np.ndarray]) -> torch.Tensor:
+        """Stack BGR images into one normalized (N, 3, 384, 384) RGB tensor."""
+        size = self.IMAGE_SIZE
+        batch = self._buffers.get(len(images))
+        if batch is None:
+            batch = self._buffers[len(images)] = np.zeros((len(images), size, size, 3), dtype=np.uint8)
 
-            tags = [t.strip() for t in tags_str.split(',') if t.strip()]
-            return tags
-        except Exception as e:
-            logger.error(f"Tagging failed: {e}")
-            return []
+        for row, image in enumerate(images):
+            cv2.resize(image, (size, size), dst=batch[row], interpolation=cv2.INTER_AREA)
+
+        # BGR -> RGB, scale, normalize and layout for the whole batch at once
+        inputs = (batch[..., ::-1].astype(np.float32) / 255.0 - self._IMAGENET_MEAN) / self._IMAGENET_STD
+        tensor = torch.from_numpy(np.ascontiguousarray(inputs.transpose(0, 3, 1, 2)))
+        return tensor.cuda() if self.device == 'cuda' else tensor
+
+    @staticmethod
+    def _parse_tags(text: str) -> List[str]:
+        """Split RAM++ output ('a | b | c') into a tag list."""
+        return [t.strip() for t in re.split(r'[|,]', text or '') if t.strip()]
 
 
 class SmartCropper:
@@ -449,15 +1643,40 @@ class SmartCropper:
 
         try:
             from PIL import Image
-            from rembg import remove
 
-            image = Image.open(image_path).convert('RGB')
-            mask = remove(image, session=self.session, only_mask=True)
-            return np.array(mask)
+            return self._saliency_pil(Image.open(image_path).convert('RGB'))
+        except Exception as e:
+            logger.error(f"Saliency detection failed: {e}")
+            return None
+
+    def get_saliency_mask_array(self, image: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Get saliency mask for an already decoded image.
+
+        Args:
+            image: BGR image array
+
+        Returns:
+            Grayscale mask (white = salient)
+        """
+        if self.session is None or image is None:
+            return None
+
+        try:
+            from PIL import Image
+
+            return self._saliency_pil(Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
         except Exception as e:
             logger.error(f"Saliency detection failed: {e}")
             return None
 
+    def _saliency_pil(self, image) -> Optional[np.ndarray]:
+        """Run U2-Net on an RGB PIL image."""
+        from rembg import remove
+
+        mask = remove(image, session=self.session, only_mask=True)
+        return np.array(mask)
+
     def get_subject_bbox(self, mask: np.ndarray, threshold: int = 128) -> tuple:
         """Get bounding box of salient subject."""
         binary = (mask > threshold).astype(np.uint8) * 255
@@ -491,6 +1710,41 @@ class SmartCropper:
         image = Image.open(image_path)
         img_width, img_height = image.size
 
+        return self._generate_crops(
+            img_width, img_height, faces,
+            lambda: self.get_saliency_mask(image_path)
+        )
+
+    def generate_crops_array(
+        self,
+        image: np.ndarray,
+        faces: List[FaceData] = None
+    ) -> Dict[str, CropCoordinates]:
+        """
+        Generate smart crops for an already decoded image.
+
+        Args:
+            image: BGR image array
+            faces: Optional list of detected faces for priority cropping
+
+        Returns:
+            Dictionary of crop coordinates by aspect ratio
+        """
+        img_height, img_width = image.shape[:2]
+
+        return self._generate_crops(
+            img_width, img_height, faces,
+            lambda: self.get_saliency_mask_array(image)
+        )
+
+    def _generate_crops(
+        self,
+        img_width: int,
+        img_height: int,
+        faces: Optional[List[FaceData]],
+        saliency_fn: Callable[[], Optional[np.ndarray]]
+    ) -> Dict[str, CropCoordinates]:
+        """Compute crops around faces, or the salient subject if there are none."""
         # Determine subject center
         if faces and len(faces) > 0:
             # Use face center as subject center
@@ -510,7 +1764,7 @@ class SmartCropper:
                 subj_cy = img_height // 2
         else:
             # Use saliency detection
-            mask = self.get_saliency_mask(image_path)
+            mask = saliency_fn()
             if mask is not None:
                 x1, y1, x2, y2 = self.get_subject_bbox(mask)
                 subj_cx = (x1 + x2) // 2
@@ -574,7 +1828,7 @@ class FaceClusterer:
         Cluster face embeddings.
 
         Args:
-            embeddings: List of 512-dim face embeddings
+            embeddings: 512-dim face embeddings (list or an (n, 512) matrix)
             eps: DBSCAN epsilon (distance threshold)
             min_samples: Minimum samples per cluster
 
@@ -584,10 +1838,10 @@ class FaceClusterer:
         from sklearn.cluster import DBSCAN, AgglomerativeClustering
         from sklearn.metrics.pairwise import cosine_distances
 
-        if not embeddings:
+        if len(embeddings) == 0:
             return np.array([])
 
-        self.embeddings = np.array(embeddings)
+        self.embeddings = np.asarray(embeddings)
         distances = cosine_distances(self.embeddings)
 
         if self.method == 'dbscan':
@@ -947,6 +2201,32 @@ class AudioAnalyzer:
         return False
 
 
+def has_clear_face(faces: List[Dict], image_width: int = 1920, image_height: int = 1080) -> bool:
+    """
+    Whether the faces make a frame 'people_face' whatever its tags.
+
+    True when the average face box covers at least 0.5% of the frame
+    (roughly 100x100 pixels on 1080p).
+    """
+    frame_area = image_width * image_height
+    total_face_area = 0
+    valid_faces = 0
+
+    for face in faces or []:
+        bbox = face.get('bbox', [0, 0, 0, 0])
+        if len(bbox) >= 4:
+            face_width = bbox[2] - bbox[0]
+            face_height = bbox[3] - bbox[1]
+            face_area = face_width * face_height
+            if face_area > 0:
+                total_face_area += face_area
+                valid_faces += 1
+
+    if valid_faces == 0 or frame_area <= 0:
+        return False
+    return (total_face_area / valid_faces) / frame_area * 100 >= 0.5
+
+
 def classify_frame_category(faces: List[Dict], tags: List[str], image_width: int = 1920, image_height: int = 1080) -> str:
     """
     Classify frame into one of 4 categories.
@@ -1006,29 +2286,8 @@ def classify_frame_category(faces: List[Dict], tags: List[str], image_width: int
     ]
 
     # Check for faces first
-    if faces and len(faces) > 0:
-        # Calculate average face size as % of frame
-        frame_area = image_width * image_height
-        total_face_area = 0
-        valid_faces = 0
-
-        for face in faces:
-            bbox = face.get('bbox', [0, 0, 0, 0])
-            if len(bbox) >= 4:
-                face_width = bbox[2] - bbox[0]
-                face_height = bbox[3] - bbox[1]
-                face_area = face_width * face_height
-                if face_area > 0:
-                    total_face_area += face_area
-                    valid_faces += 1
-
-        if valid_faces > 0:
-            avg_face_pct = (total_face_area / valid_faces) / frame_area * 100
-
-            # Face is "visible" if it's at least 0.5% of frame
-            # (roughly 100x100 pixels on 1080p)
-            if avg_face_pct >= 0.5:
-                return 'people_face'
+    if has_clear_face(faces, image_width, image_height):
+        return 'people_face'
 
     # No clear faces - check tags for category
     # Priority: detail > people_roll > broll
@@ -1096,9 +2355,13 @@ class VarietySelector:
                 height = bbox[3] - bbox[1]
                 total_face_area += width * height
 
-        # Heuristic based on face area (assuming ~1080p frames)
+        # Heuristic based on face area at 1080p; bboxes are in source
+        # pixels, so normalize other resolutions to 1080p-equivalent area
         # Large face = close-up, medium = medium shot, small = wide
         avg_face_area = total_face_area / len(faces)
+        source_height = candidate.get('source_height')
+        if source_height:
+            avg_face_area *= (1080 / source_height) ** 2
 
         if avg_face_area > 100000:  # ~316x316 pixels
             return 'close'
@@ -1206,12 +2469,22 @@ class VarietySelector:
             self.seen_compositions[scene_idx] = set()
         self.seen_compositions[scene_idx].add(self.classify_composition(candidate))
 
+    @staticmethod
+    def is_blinking(candidate: Dict, min_eye_open: float) -> bool:
+        """Whether any face with measured eyes is below min_eye_open."""
+        return any(
+            (f.get('eye_open') is not None and f.get('eye_open') < min_eye_open)
+            for f in candidate.get('faces', [])
+        )
+
     def compute_quality_score(self, candidate: Dict) -> float:
         """
         Compute overall quality score for a frame.
 
         Score components:
         - Sharpness (normalized to 0-1)
+        - NIMA aesthetic score (normalized to 0-1), sharing sharpness's
+          weight when available
         - Smile score (0-1)
         - Audio peak bonus
         - Face count bonus (more faces = more interesting)
@@ -1220,6 +2493,13 @@ class VarietySelector:
         sharpness = candidate.get('sharpness_score', 0)
         sharpness_norm = min(1.0, max(0, (sharpness - 50) / 450))
 
+        # NIMA: mean scores rarely leave 3-7, so normalize over that range
+        nima = candidate.get('nima_score', 0)
+        if nima > 0:
+            image_quality = 0.5 * sharpness_norm + 0.5 * min(1.0, max(0, (nima - 3) / 4))
+        else:
+            image_quality = sharpness_norm
+
         # Smile score
         faces = candidate.get('faces', [])
         smile = 0.0
@@ -1233,13 +2513,14 @@ class VarietySelector:
         # Face count bonus (slight boost for group shots)
         face_boost = min(0.15, len(faces) * 0.05) if faces else 0
 
-        return sharpness_norm * 0.4 + smile * 0.3 + audio_boost + face_boost
+        return image_quality * 0.4 + smile * 0.3 + audio_boost + face_boost
 
     def select(
         self,
         candidates: List[Dict],
         min_per_scene: int = 1,
-        max_per_scene: int = 3
+        max_per_scene: int = 3,
+        min_eye_open: float = 0.0
     ) -> List[Dict]:
         """
         Select the BEST frames per scene with category diversity.
@@ -1254,6 +2535,8 @@ class VarietySelector:
             candidates: List of candidate frames
             min_per_scene: Minimum frames per scene
             max_per_scene: HARD maximum per scene (default 3)
+            min_eye_open: Reject frames where a face's eye_open is below this
+                before scoring, unless every frame of the scene blinks (0 = off)
 
         Returns:
             List of selected candidates with 'selection_reasons' added
@@ -1268,7 +2551,15 @@ class VarietySelector:
 
         selected = []
 
+        blinks = 0
         for scene_idx, scene_candidates in scenes.items():
+            # Early rejection of blinks, keeping the scene covered
+            if min_eye_open > 0:
+                open_eyes = [c for c in scene_candidates if not self.is_blinking(c, min_eye_open)]
+                if open_eyes:
+                    blinks += len(scene_candidates) - len(open_eyes)
+                    scene_candidates = open_eyes
+
             # Score all candidates in this scene
             for c in scene_candidates:
                 c['_quality_score'] = self.compute_quality_score(c)
@@ -1355,182 +2646,756 @@ class VarietySelector:
             category_counts[cat] = category_counts.get(cat, 0) + 1
 
         logger.info(f"Variety selection: {len(selected)}/{len(candidates)} frames selected")
+        if blinks:
+            logger.info(f"Rejected {blinks} frames with closed eyes")
         logger.info(f"By category: {category_counts}")
         logger.info(f"Scenes covered: {len(scenes)}")
 
         return selected
 
 
-class ScreenshotPipeline:
-    """
-    Complete pipeline for screenshot extraction and analysis.
-    """
+class ScreenshotPipeline:
+    """
+    Complete pipeline for screenshot extraction and analysis.
+    """
+
+    def __init__(self, device: str = None, scene_cache_dir: str = None):
+        self.device = device or get_device()
+        self.models_loaded = False
+        self.last_scenes: List[tuple] = []
+        self.last_dedupe: Dict[str, Any] = {}
+        self.last_face_analysis: Dict[str, Any] = {}
+        self.last_tagging: Dict[str, Any] = {}
+
+        # Scene predictions survive restarts; without a writable cache dir
+        # every detection runs inference
+        try:
+            scene_cache = ScenePredictionCache(scene_cache_dir)
+        except OSError as e:
+            logger.warning(f"Scene prediction cache disabled: {e}")
+            scene_cache = None
+
+        # Initialize components
+        self.scene_detector = SceneDetector(self.device, cache=scene_cache)
+        self.quality_filter = QualityFilter()
+        self.face_detector = FaceDetector(self.device)
+        self.face_tracker = FaceTracker()
+        self.tagger = ContentTagger(self.device)
+        self.cropper = SmartCropper()
+        self.clusterer = FaceClusterer()
+        self.audio_analyzer = AudioAnalyzer()
+        self.variety_selector = VarietySelector()
+
+    def load_models(self, ram_model_path: str = None, nima_model_path: str = None):
+        """Load all ML models."""
+        if self.models_loaded:
+            return
+
+        logger.info("Loading models...")
+
+        self.scene_detector.load()
+        self.face_detector.load()
+        self.tagger.load(ram_model_path)
+        self.cropper.load()
+        self.quality_filter.load_nima(nima_model_path)
+
+        self.models_loaded = True
+        logger.info("All models loaded")
+
+    def extract_frames(
+        self,
+        video_path: str,
+        scenes: List[tuple],
+        output_dir: str,
+        fps: float = None,
+        lut_path: str = None,
+        sample_interval: float = 0.5,
+        extraction_mode: str = 'in_process',
+        seek_strategy: str = 'auto',
+        memory_budget_mb: float = 0,
+        export_raw: bool = True,
+        analysis_max_side: int = 0,
+        sampling: str = 'grid',
+        max_per_scene: int = 0
+    ) -> List[Dict]:
+        """
+        Extract candidate frames from each scene.
+
+        Every returned frame dict carries an AnalysisFrame under 'frame'.
+        Without a LUT, up to `memory_budget_mb` of decoded frames are kept in
+        memory and only written to disk when saved; frames beyond the budget
+        are written immediately.
+
+        When a LUT is provided, extracts TWO versions:
+        - preview/ folder: LUT-graded frames for ML analysis
+        - raw/ folder: Original LOG/RAW frames for final export
+
+        With `analysis_max_side`, frames are scaled down once at extraction
+        and every ML stage works on the smaller image; AnalysisFrame.scale
+        maps results back to source pixels. Full-resolution frames for
+        export then come from raw/ even without a LUT. FFmpeg previews are
+        not scaled below SHARPNESS_REFERENCE_SIZE, since sharpness is scored
+        on the preview itself.
+
+        Args:
+            video_path: Path to video file
+            scenes: List of (start_frame, end_frame) tuples
+            output_dir: Directory to save frames
+            fps: Video FPS (auto-detected if None)
+            lut_path: Optional path to LUT file for LOG footage
+            sample_interval: Seconds between frame samples (default 0.5s)
+            extraction_mode: How to produce LUT previews - 'in_process' (one
+                OpenCV decode, .cube LUT applied in NumPy), 'single_pass' (one
+                FFmpeg decode for all frames) or 'per_frame' (two FFmpeg
+                processes per frame). Non-.cube LUTs use 'single_pass'.
+            seek_strategy: OpenCV extraction strategy without a LUT:
+                'auto', 'seek' or 'sequential'
+            memory_budget_mb: Decoded frames to hold in memory (0 = write all)
+            export_raw: Write RAW frames for every candidate alongside the
+                previews. When False, only previews are produced and RAW
+                frames come later from export_raw_frames().
+            analysis_max_side: Long edge of analysis frames in pixels
+                (0 = source resolution)
+            sampling: 'grid' (every sample_interval plus start/middle/end) or
+                'motion' (placed by a low-resolution change signal, see
+                _motion_samples)
+            max_per_scene: Cap on candidates per scene, thinned evenly (0 = no cap)
+        """
+        import subprocess
+
+        os.makedirs(output_dir, exist_ok=True)
+
+        cap = cv2.VideoCapture(video_path)
+        if fps is None:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        source_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        cap.release()
+
+        analysis_size = fit_long_edge(*source_size, analysis_max_side)
+        if analysis_size == source_size:
+            analysis_size = None
+        else:
+            logger.info(f"Analysis resolution: {analysis_size[0]}x{analysis_size[1]} "
+                        f"(source {source_size[0]}x{source_size[1]})")
+
+        frames_info = []
+        preview_size = None  # Size of frames FFmpeg writes, if scaled
+
+        # Collect all frame numbers to extract
+        frame_numbers = []
+        frame_to_scene = {}
+
+        # Calculate frame interval from sample_interval
+        frame_interval = max(1, int(fps * sample_interval))
+
+        motion = None
+        if sampling == 'motion':
+            motion = self._motion_signal(video_path)
+            if len(motion) == 0:
+                logger.warning("No motion signal, falling back to grid sampling")
+                motion = None
+
+        for scene_idx, (start, end) in enumerate(scenes):
+            scene_length = end - start
+            scene_duration = scene_length / fps
+
+            # Skip very short scenes (< 0.3 seconds)
+            if scene_duration < 0.3:
+                continue
+
+            if motion is not None:
+                candidates = set(self._motion_samples(
+                    motion, start, min(end, len(motion) - 1), fps, sample_interval, max_per_scene
+                ))
+            else:
+                candidates = self._grid_samples(start, end, fps, frame_interval)
+
+            if max_per_scene and len(candidates) > max_per_scene:
+                ordered = sorted(candidates)
+                keep = np.linspace(0, len(ordered) - 1, max_per_scene).round().astype(int)
+                candidates = {ordered[i] for i in keep}
+
+            # Add all valid candidates
+            for frame_num in sorted(candidates):
+                if frame_num < 0 or frame_num >= total_frames:
+                    continue
+                if frame_num not in frame_to_scene:
+                    frame_numbers.append(frame_num)
+                    frame_to_scene[frame_num] = scene_idx
+
+        if motion is not None:
+            logger.info(f"Motion sampling: {len(frame_numbers)} candidates in {len(scenes)} scenes")
+
+        # Extract frames
+        if lut_path and os.path.exists(lut_path):
+            # LUT preview for analysis; RAW for final export now or after selection
+            logger.info("Extracting frames with LUT (preview)" + (" and RAW (export)" if export_raw else ""))
+
+            preview_dir = os.path.join(output_dir, 'preview')
+            raw_dir = os.path.join(output_dir, 'raw') if export_raw else None
+            os.makedirs(preview_dir, exist_ok=True)
+            if raw_dir:
+                os.makedirs(raw_dir, exist_ok=True)
+
+            # Parse .cube LUTs once and grade decoded frames in-process
+            lut = None
+            if extraction_mode == 'in_process':
+                lut = self._load_lut(lut_path)
+
+            # Extract LUT-graded previews for ML analysis
+            if lut is not None:
+                frames_info = self._extract_frames_opencv(
+                    video_path, frame_numbers, frame_to_scene,
+                    preview_dir, fps, strategy=seek_strategy,
+                    memory_budget_mb=memory_budget_mb,
+                    lut=lut, raw_dir=raw_dir, analysis_size=analysis_size
+                )
+            else:
+                if analysis_size:
+                    preview_size = analysis_size
+                    if max(analysis_size) < SHARPNESS_REFERENCE_SIZE:
+                        preview_size = fit_long_edge(*source_size, SHARPNESS_REFERENCE_SIZE)
+                    if preview_size == source_size:
+                        preview_size = None
+
+                if extraction_mode in ('single_pass', 'in_process'):
+                    frames_info = self._extract_frames_ffmpeg_single_pass(
+                        video_path, frame_numbers, frame_to_scene,
+                        preview_dir, raw_dir, fps, lut_path, preview_size
+                    )
+                else:
+                    frames_info = self._extract_frames_ffmpeg_dual(
+                        video_path, frame_numbers, frame_to_scene,
+                        preview_dir, raw_dir, fps, lut_path, preview_size
+                    )
+        else:
+            if lut_path:
+                logger.warning(f"LUT file not found: {lut_path}, extracting without LUT")
+
+            # Scaled-down analysis frames are not fit for export
+            raw_dir = None
+            if analysis_size and export_raw:
+                raw_dir = os.path.join(output_dir, 'raw')
+                os.makedirs(raw_dir, exist_ok=True)
+
+            frames_info = self._extract_frames_opencv(
+                video_path, frame_numbers, frame_to_scene,
+                output_dir, fps, strategy=seek_strategy,
+                memory_budget_mb=memory_budget_mb,
+                raw_dir=raw_dir, analysis_size=analysis_size
+            )
+
+        # Frames FFmpeg wrote to disk are decoded lazily, once
+        for frame in frames_info:
+            if 'frame' not in frame:
+                scale = source_size[0] / preview_size[0] if preview_size else 1.0
+                frame['frame'] = AnalysisFrame(frame['path'], scale=scale)
+
+        return frames_info
+
+    @staticmethod
+    def _grid_samples(start: int, end: int, fps: float, frame_interval: int) -> set:
+        """Fixed-interval samples plus start, middle and end of a scene."""
+        scene_length = end - start
+        candidates = set()
+
+        # Always get start (offset by a few frames to avoid transition)
+        offset = min(3, scene_length // 4)
+        candidates.add(start + offset)
+
+        # Always get middle
+        candidates.add((start + end) // 2)
+
+        # Always get near-end
+        candidates.add(end - offset)
+
+        # Sample at regular intervals for longer scenes
+        if scene_length / fps > 1.0:
+            current = start + offset
+            while current < end - offset:
+                candidates.add(current)
+                current += frame_interval
+
+        return candidates
+
+    def _motion_signal(self, video_path: str) -> np.ndarray:
+        """
+        Per-frame mean absolute luma change (0-1) at thumbnail size.
+
+        One streaming pass with the cut detector's signal reader; the result
+        is cached next to the scene predictions, keyed by video content.
+        """
+        cache = self.scene_detector.cache
+        key = f"motion_{video_fingerprint(video_path)}" if cache else None
+        if cache:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        _, motion, _ = FastCutDetector().read_signals(video_path)
+        if cache and len(motion):
+            cache.put(key, motion)
+        return motion
+
+    MOTION_NOISE_FLOOR = 0.002  # Thumbnail luma change (0-1) of a static shot with sensor noise
+    MOTION_GRID_CHANGE = 0.015  # Change per frame above the floor that earns the grid's density
+    MOTION_STATIC_FACTOR = 4  # Unchanging content is sampled every sample_interval x this
+    MOTION_MAX_DENSITY = 4  # At most this many times the grid's density
+
+    @classmethod
+    def _motion_samples(
+        cls,
+        motion: np.ndarray,
+        start: int,
+        end: int,
+        fps: float,
+        sample_interval: float,
+        max_samples: int = 0
+    ) -> List[int]:
+        """
+        Place a scene's samples by how much its content changes.
+
+        Unchanging content gets a sparse base rate (one sample every
+        sample_interval x MOTION_STATIC_FACTOR); change above the noise floor
+        adds samples where it happens, reaching the grid's density at
+        MOTION_GRID_CHANGE per frame and at most MOTION_MAX_DENSITY times it.
+        A static vows shot therefore gets a few frames and a first dance
+        many. Each sample is then moved to the stillest frame nearby, where
+        motion blur is least likely.
+
+        Args:
+            motion: Per-frame change signal for the whole video
+            start: First frame of the scene
+            end: Last frame of the scene (inclusive)
+            fps: Video FPS
+            sample_interval: Grid spacing in seconds the rates are relative to
+            max_samples: Cap on samples (0 = no cap)
+
+        Returns:
+            Sorted frame numbers
+        """
+        offset = min(3, (end - start) // 4)
+        first, last = start + offset, end - offset
+        if last <= first:
+            return [(start + end) // 2]
+
+        signal = motion[first:last + 1].astype(np.float64)
+        if len(signal) >= 3:
+            signal = np.convolve(signal, np.ones(3) / 3, mode='same')
+        change = np.maximum(signal - cls.MOTION_NOISE_FLOOR, 0.0)
+
+        grid_frames = fps * sample_interval
+        base_count = len(signal) / (grid_frames * cls.MOTION_STATIC_FACTOR)
+        change_count = change.sum() / (cls.MOTION_GRID_CHANGE * grid_frames)
+        densest = max(1, int(len(signal) * cls.MOTION_MAX_DENSITY / grid_frames))
+        count = max(1, min(int(np.ceil(base_count + change_count)), densest, max_samples or densest))
+
+        # Sample density: the base rate spread evenly plus the rest where content changes
+        weights = np.full(len(signal), base_count / len(signal))
+        if change_count > 0:
+            weights += change_count * change / change.sum()
+        cumulative = np.cumsum(weights)
+        targets = np.searchsorted(cumulative / cumulative[-1], (np.arange(count) + 0.5) / count)
+
+        # Snap to the stillest frame within a quarter second (or half a
+        # spacing), keeping snapped samples at least half the densest spacing apart
+        window = max(1, int(min(0.25 * fps, len(signal) / count / 2)))
+        min_gap = max(1, int(grid_frames / cls.MOTION_MAX_DENSITY / 2))
+        samples = []
+        for target in np.minimum(targets, len(signal) - 1):
+            low, high = max(0, int(target) - window), min(len(signal), int(target) + window + 1)
+            frame = first + low + int(np.argmin(signal[low:high]))
+            if not samples or frame - samples[-1] >= min_gap:
+                samples.append(frame)
+
+        return samples
+
+    def export_raw_frames(
+        self,
+        video_path: str,
+        frame_numbers: List[int],
+        raw_dir: str,
+        fps: float = None,
+        seek_strategy: str = 'auto'
+    ) -> Dict[int, str]:
+        """
+        Write full-quality RAW/LOG frames for the given frame numbers.
+
+        Used after selection (or on demand from the server) so only frames
+        that are actually kept pay for a full-quality encode. All frames come
+        from one OpenCV decode pass.
+
+        Args:
+            video_path: Source video
+            frame_numbers: Frames to export
+            raw_dir: Output directory for RAW frames
+            fps: Video FPS (auto-detected if None)
+            seek_strategy: 'auto', 'seek' or 'sequential'
+
+        Returns:
+            Mapping of frame number to written RAW path
+        """
+        if not frame_numbers:
+            return {}
+
+        os.makedirs(raw_dir, exist_ok=True)
+
+        if fps is None:
+            cap = cv2.VideoCapture(video_path)
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            cap.release()
+
+        exported = self._extract_frames_opencv(
+            video_path, frame_numbers, {n: 0 for n in frame_numbers},
+            raw_dir, fps, strategy=seek_strategy, jpeg_quality=100
+        )
+
+        raw_paths = {f['frame_number']: f['path'] for f in exported}
+        for frame_num in frame_numbers:
+            if frame_num not in raw_paths:
+                logger.warning(f"RAW export failed for frame {frame_num}")
+
+        return raw_paths
+
+    def _load_lut(self, lut_path: str) -> Optional[Lut3D]:
+        """Parse a .cube LUT for in-process grading (None if unsupported)."""
+        if not lut_path.lower().endswith('.cube'):
+            return None
+
+        try:
+            return get_lut(lut_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not parse LUT {lut_path} ({e}), grading with FFmpeg instead")
+            return None
+
+    def _estimate_gop_frames(self, video_path: str, fps: float, probe_seconds: float = 60.0) -> int:
+        """
+        Estimate keyframe spacing (GOP length in frames) with ffprobe.
+
+        Only the first `probe_seconds` of the file are scanned, keyframes only.
+        Falls back to a one-second GOP (typical for camera long-GOP codecs)
+        when ffprobe is unavailable or finds fewer than two keyframes.
+        """
+        import subprocess
 
-    def __init__(self, device: str = None):
-        self.device = device or get_device()
-        self.models_loaded = False
+        default_gop = max(1, int(round(fps)))
 
-        # Initialize components
-        self.scene_detector = SceneDetector(self.device)
-        self.quality_filter = QualityFilter()
-        self.face_detector = FaceDetector(self.device)
-        self.tagger = ContentTagger(self.device)
-        self.cropper = SmartCropper()
-        self.clusterer = FaceClusterer()
-        self.audio_analyzer = AudioAnalyzer()
-        self.variety_selector = VarietySelector()
+        cmd = [
+            'ffprobe', '-v', 'error',
+            '-select_streams', 'v:0',
+            '-skip_frame', 'nokey',
+            '-show_entries', 'frame=pts_time',
+            '-read_intervals', f'%+{probe_seconds}',
+            '-of', 'csv=p=0',
+            video_path
+        ]
 
-    def load_models(self, ram_model_path: str = None):
-        """Load all ML models."""
-        if self.models_loaded:
-            return
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            if result.returncode != 0:
+                return default_gop
+
+            times = []
+            for line in result.stdout.splitlines():
+                value = line.strip().strip(',')
+                try:
+                    times.append(float(value))
+                except ValueError:
+                    continue
 
-        logger.info("Loading models...")
+            if len(times) < 2:
+                return default_gop
 
-        self.scene_detector.load()
-        self.face_detector.load()
-        self.tagger.load(ram_model_path)
-        self.cropper.load()
+            gop_seconds = float(np.median(np.diff(sorted(times))))
+            return max(1, int(round(gop_seconds * fps)))
 
-        self.models_loaded = True
-        logger.info("All models loaded")
+        except Exception as e:
+            logger.debug(f"GOP estimation failed: {e}")
+            return default_gop
 
-    def extract_frames(
+    def _extract_frames_opencv(
         self,
         video_path: str,
-        scenes: List[tuple],
+        frame_numbers: List[int],
+        frame_to_scene: Dict[int, int],
         output_dir: str,
-        fps: float = None,
-        lut_path: str = None,
-        sample_interval: float = 0.5
+        fps: float,
+        strategy: str = 'auto',
+        memory_budget_mb: float = 0,
+        lut: Optional[Lut3D] = None,
+        raw_dir: str = None,
+        jpeg_quality: int = 95,
+        analysis_size: Optional[Tuple[int, int]] = None
     ) -> List[Dict]:
         """
-        Extract candidate frames from each scene.
+        Extract frames using OpenCV.
 
-        When a LUT is provided, extracts TWO versions:
-        - preview/ folder: LUT-graded frames for ML analysis
-        - raw/ folder: Original LOG/RAW frames for final export
+        Decoded frames are kept in memory as AnalysisFrame objects until
+        `memory_budget_mb` is used up; after that they are written to disk
+        straight away and decoded again on first use.
+
+        With a LUT, the same decode yields both versions: the RAW frame is
+        written to `raw_dir` and the in-process graded frame becomes the
+        analysis preview.
+
+        With `analysis_size`, the RAW frame is written at full resolution and
+        the preview is area-downscaled once (before grading, so the LUT runs
+        on fewer pixels). When that is below SHARPNESS_REFERENCE_SIZE, the
+        quality metrics are taken at the reference size on the way down.
+
+        Strategies:
+        - 'seek': cap.set() to every frame (each seek decodes from the
+          previous keyframe, so cost grows with candidates x GOP length)
+        - 'sequential': one pass over the sorted frames with grab(), calling
+          retrieve() only on wanted frames
+        - 'auto': walk the sorted frames and seek only across gaps longer
+          than the keyframe spacing, grabbing through shorter gaps
 
         Args:
             video_path: Path to video file
-            scenes: List of (start_frame, end_frame) tuples
+            frame_numbers: Frames to extract
+            frame_to_scene: Mapping of frame number to scene index
             output_dir: Directory to save frames
-            fps: Video FPS (auto-detected if None)
-            lut_path: Optional path to LUT file for LOG footage
-            sample_interval: Seconds between frame samples (default 0.5s)
+            fps: Video FPS
+            strategy: 'auto', 'seek' or 'sequential'
+            memory_budget_mb: Decoded frames to hold in memory (0 = write all)
+            lut: Optional parsed LUT for LOG footage
+            raw_dir: Output dir for RAW/LOG frames (None skips RAW export)
+            jpeg_quality: JPEG quality for frames written to output_dir
+            analysis_size: (width, height) of the analysis frames (None = source size)
         """
-        import subprocess
-
-        os.makedirs(output_dir, exist_ok=True)
+        if strategy == 'seek':
+            seek_gap = 0
+        elif strategy == 'sequential':
+            seek_gap = float('inf')
+        else:
+            # Seeking lands on the previous keyframe and decodes forward,
+            # so it only pays off when the gap exceeds the GOP length
+            seek_gap = self._estimate_gop_frames(video_path, fps)
+            logger.info(f"OpenCV extraction: seeking across gaps > {seek_gap} frames")
 
         cap = cv2.VideoCapture(video_path)
-        if fps is None:
-            fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        cap.release()
-
-        frames_info = []
-
-        # Collect all frame numbers to extract
-        frame_numbers = []
-        frame_to_scene = {}
+        extracted = {}
+        position = 0  # Index of the next frame grab() will return
+        needs_seek = False
+        memory_left = memory_budget_mb * 1024 * 1024
+
+        for frame_num in sorted(set(frame_numbers)):
+            if needs_seek or frame_num < position or frame_num - position > seek_gap:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+                position = frame_num
+                needs_seek = False
+
+            # Decode (without colour conversion) up to the wanted frame
+            while position < frame_num and cap.grab():
+                position += 1
+
+            ret = position == frame_num and cap.grab()
+            frame = cap.retrieve()[1] if ret else None
+            position += 1
+
+            if frame is None:
+                # Position is unknown after a failed read
+                needs_seek = True
+                continue
 
-        # Calculate frame interval from sample_interval
-        frame_interval = max(1, int(fps * sample_interval))
+            frame_filename = f"frame_{frame_num:08d}.jpg"
+            frame_path = os.path.join(output_dir, frame_filename)
+            raw_path = None
 
-        for scene_idx, (start, end) in enumerate(scenes):
-            scene_length = end - start
-            scene_duration = scene_length / fps
+            if raw_dir:
+                raw_path = os.path.join(raw_dir, frame_filename)
+                cv2.imwrite(raw_path, frame, [cv2.IMWRITE_JPEG_QUALITY, 100])  # RAW for final export
 
-            # Skip very short scenes (< 0.3 seconds)
-            if scene_duration < 0.3:
-                continue
+            source_width = frame.shape[1]
+            quality = None
+            graded = False
 
-            # Extract frames at regular intervals throughout the scene
-            # Plus key positions (start, middle, end)
-            candidates = set()
+            if analysis_size and analysis_size != (frame.shape[1], frame.shape[0]):
+                if max(analysis_size) < SHARPNESS_REFERENCE_SIZE:
+                    ref_size = fit_long_edge(frame.shape[1], frame.shape[0], SHARPNESS_REFERENCE_SIZE)
+                    frame = cv2.resize(frame, ref_size, interpolation=cv2.INTER_AREA)
+                    if lut is not None:
+                        frame = lut.apply(frame)
+                        graded = True
+                    quality = self.quality_filter.compute_quality(frame)
+                frame = cv2.resize(frame, analysis_size, interpolation=cv2.INTER_AREA)
 
-            # Always get start (offset by a few frames to avoid transition)
-            offset = min(3, scene_length // 4)
-            candidates.add(start + offset)
+            if lut is not None and not graded:
+                frame = lut.apply(frame)
 
-            # Always get middle
-            candidates.add((start + end) // 2)
+            analysis_frame = AnalysisFrame(frame_path, image=frame, scale=source_width / frame.shape[1])
 
-            # Always get near-end
-            candidates.add(end - offset)
+            if frame.nbytes <= memory_left:
+                memory_left -= frame.nbytes
+            else:
+                analysis_frame.save(quality=jpeg_quality)
+                analysis_frame.release()
 
-            # Sample at regular intervals for longer scenes
-            if scene_duration > 1.0:
-                current = start + offset
-                while current < end - offset:
-                    candidates.add(current)
-                    current += frame_interval
+            extracted[frame_num] = {
+                'frame_number': frame_num,
+                'timestamp': frame_num / fps,
+                'path': frame_path,
+                'scene_index': frame_to_scene[frame_num],
+                'frame': analysis_frame,
+            }
+            if raw_path:
+                extracted[frame_num]['raw_path'] = raw_path
+            if quality is not None:
+                extracted[frame_num]['quality'] = quality
+                extracted[frame_num]['sharpness_score'] = quality['sharpness']
 
-            # Add all valid candidates
-            for frame_num in sorted(candidates):
-                if frame_num < 0 or frame_num >= total_frames:
-                    continue
-                if frame_num not in frame_to_scene:
-                    frame_numbers.append(frame_num)
-                    frame_to_scene[frame_num] = scene_idx
+        cap.release()
 
-        # Extract frames
-        if lut_path and os.path.exists(lut_path):
-            # Extract BOTH: LUT preview for analysis + RAW for final export
-            logger.info(f"Extracting frames with LUT (preview) and RAW (export)")
+        # Preserve the caller's frame order
+        return [extracted[n] for n in frame_numbers if n in extracted]
 
-            preview_dir = os.path.join(output_dir, 'preview')
-            raw_dir = os.path.join(output_dir, 'raw')
-            os.makedirs(preview_dir, exist_ok=True)
-            os.makedirs(raw_dir, exist_ok=True)
+    @staticmethod
+    def _build_select_expr(frame_numbers: List[int]) -> str:
+        """
+        Build an FFmpeg select expression matching exactly the given frames.
 
-            # Extract LUT-graded previews for ML analysis
-            frames_info = self._extract_frames_ffmpeg_dual(
-                video_path, frame_numbers, frame_to_scene,
-                preview_dir, raw_dir, fps, lut_path
-            )
-        else:
-            if lut_path:
-                logger.warning(f"LUT file not found: {lut_path}, extracting without LUT")
-            frames_info = self._extract_frames_opencv(
-                video_path, frame_numbers, frame_to_scene,
-                output_dir, fps
-            )
+        Evenly spaced runs (the regular sampling grid inside a scene) collapse
+        into a single between()/mod() term, so the expression stays short even
+        with thousands of candidates.
+        """
+        frames = sorted(set(frame_numbers))
+        terms = []
+        i = 0
+
+        while i < len(frames):
+            # Extend the run while the step stays constant
+            j = i + 1
+            if j < len(frames):
+                step = frames[j] - frames[i]
+                while j + 1 < len(frames) and frames[j + 1] - frames[j] == step:
+                    j += 1
+
+            if j - i >= 2:
+                start, end = frames[i], frames[j]
+                terms.append(f"between(n,{start},{end})*not(mod(n-{start},{step}))")
+                i = j + 1
+            else:
+                terms.append(f"eq(n,{frames[i]})")
+                i += 1
 
-        return frames_info
+        return '+'.join(terms)
 
-    def _extract_frames_opencv(
+    def _extract_frames_ffmpeg_single_pass(
         self,
         video_path: str,
         frame_numbers: List[int],
         frame_to_scene: Dict[int, int],
-        output_dir: str,
-        fps: float
+        preview_dir: str,
+        raw_dir: str,
+        fps: float,
+        lut_path: str,
+        preview_size: Optional[Tuple[int, int]] = None
     ) -> List[Dict]:
-        """Extract frames using OpenCV (no LUT)."""
-        cap = cv2.VideoCapture(video_path)
+        """
+        Extract LUT preview and RAW versions in a single FFmpeg decode pass.
+
+        The video is opened once, the requested frames are picked with a
+        select filter and the stream is split so RAW and LUT-graded JPEGs are
+        written by the same process. Output files are named by source frame
+        number, so frames FFmpeg could not produce are reported individually.
+
+        Args:
+            video_path: Source video
+            frame_numbers: Frames to extract
+            frame_to_scene: Mapping of frame number to scene index
+            preview_dir: Output dir for LUT-graded previews (used for ML)
+            raw_dir: Output dir for RAW/LOG frames (None skips RAW export)
+            fps: Video FPS
+            lut_path: Path to LUT file
+            preview_size: (width, height) to scale previews to (None = source size)
+
+        Returns:
+            List of frame info dicts with both 'path' (preview) and 'raw_path'
+        """
+        import subprocess
+
+        if not frame_numbers:
+            return []
+
+        select_expr = self._build_select_expr(frame_numbers)
+
+        # settb/setpts before select stamps each frame with its source index,
+        # which -frame_pts then uses as the output file number
+        selected = f"[0:v]settb=1,setpts=N,select='{select_expr}'"
+        grade = f"lut3d=file='{lut_path}'"
+        if preview_size:
+            grade += f",scale={preview_size[0]}:{preview_size[1]}:flags=area"
+        if raw_dir:
+            filter_graph = f"{selected},split=2[raw][pre];[pre]{grade}[preview]"
+        else:
+            filter_graph = f"{selected},{grade}[preview]"
+
+        cmd = ['ffmpeg', '-y', '-i', video_path, '-filter_complex', filter_graph]
+
+        if raw_dir:
+            cmd += [
+                '-map', '[raw]',
+                '-fps_mode', 'passthrough',
+                '-frame_pts', '1',
+                '-frames:v', str(len(frame_numbers)),
+                '-q:v', '1',  # Highest quality JPEG
+                os.path.join(raw_dir, 'frame_%08d.jpg'),
+            ]
+
+        cmd += [
+            '-map', '[preview]',
+            '-fps_mode', 'passthrough',
+            '-frame_pts', '1',
+            '-frames:v', str(len(frame_numbers)),
+            '-q:v', '2',  # High quality JPEG
+            os.path.join(preview_dir, 'frame_%08d.jpg'),
+        ]
+
+        # One decode of the whole clip, allow roughly twice real time
+        timeout = 120 + 2 * (max(frame_numbers) / fps)
+
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            if result.returncode != 0:
+                logger.warning(f"Single-pass FFmpeg extraction failed: {result.stderr[-500:]}")
+        except subprocess.TimeoutExpired:
+            logger.warning("Single-pass FFmpeg extraction timed out")
+        except Exception as e:
+            logger.warning(f"Single-pass FFmpeg extraction error: {e}")
+
         frames_info = []
 
         for frame_num in frame_numbers:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-            ret, frame = cap.read()
+            frame_filename = f"frame_{frame_num:08d}.jpg"
+            preview_path = os.path.join(preview_dir, frame_filename)
+            raw_path = os.path.join(raw_dir, frame_filename) if raw_dir else None
 
-            if not ret or frame is None:
+            if not os.path.exists(preview_path):
+                logger.warning(f"FFmpeg failed for frame {frame_num}")
                 continue
 
-            frame_filename = f"frame_{frame_num:08d}.jpg"
-            frame_path = os.path.join(output_dir, frame_filename)
-            cv2.imwrite(frame_path, frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
-
-            frames_info.append({
+            frame_info = {
                 'frame_number': frame_num,
                 'timestamp': frame_num / fps,
-                'path': frame_path,
+                'path': preview_path,  # LUT preview for ML analysis
                 'scene_index': frame_to_scene[frame_num]
-            })
+            }
+
+            if raw_path and os.path.exists(raw_path):
+                frame_info['raw_path'] = raw_path  # RAW for final export
+
+            frames_info.append(frame_info)
+
+        if not frames_info:
+            # Filter graph unsupported by this FFmpeg build - use per-frame path
+            logger.warning("Single-pass extraction produced no frames, falling back to per-frame FFmpeg")
+            return self._extract_frames_ffmpeg_dual(
+                video_path, frame_numbers, frame_to_scene,
+                preview_dir, raw_dir, fps, lut_path, preview_size
+            )
 
-        cap.release()
         return frames_info
 
     def _extract_frames_ffmpeg_dual(
@@ -1541,7 +3406,8 @@ class ScreenshotPipeline:
         preview_dir: str,
         raw_dir: str,
         fps: float,
-        lut_path: str
+        lut_path: str,
+        preview_size: Optional[Tuple[int, int]] = None
     ) -> List[Dict]:
         """
         Extract frames using FFmpeg - both LUT preview and RAW versions.
@@ -1551,9 +3417,10 @@ class ScreenshotPipeline:
             frame_numbers: Frames to extract
             frame_to_scene: Mapping of frame number to scene index
             preview_dir: Output dir for LUT-graded previews (used for ML)
-            raw_dir: Output dir for RAW/LOG frames (used for final export)
+            raw_dir: Output dir for RAW/LOG frames (None skips RAW export)
             fps: Video FPS
             lut_path: Path to LUT file
+            preview_size: (width, height) to scale previews to (None = source size)
 
         Returns:
             List of frame info dicts with both 'path' (preview) and 'raw_path'
@@ -1562,11 +3429,15 @@ class ScreenshotPipeline:
 
         frames_info = []
 
+        preview_filter = f"lut3d='{lut_path}'"
+        if preview_size:
+            preview_filter += f",scale={preview_size[0]}:{preview_size[1]}:flags=area"
+
         for frame_num in frame_numbers:
             timestamp = frame_num / fps
             frame_filename = f"frame_{frame_num:08d}.jpg"
             preview_path = os.path.join(preview_dir, frame_filename)
-            raw_path = os.path.join(raw_dir, frame_filename)
+            raw_path = os.path.join(raw_dir, frame_filename) if raw_dir else None
 
             # Extract RAW frame (no LUT) - full quality for final export
             raw_cmd = [
@@ -1584,19 +3455,22 @@ class ScreenshotPipeline:
                 '-ss', str(timestamp),
                 '-i', video_path,
                 '-vframes', '1',
-                '-vf', f"lut3d='{lut_path}'",
+                '-vf', preview_filter,
                 '-q:v', '2',  # High quality JPEG
                 preview_path
             ]
 
             try:
-                # Extract both in sequence
-                raw_result = subprocess.run(
-                    raw_cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
+                # Extract both in sequence (RAW skipped when export is deferred)
+                raw_ok = False
+                if raw_path:
+                    raw_result = subprocess.run(
+                        raw_cmd,
+                        capture_output=True,
+                        text=True,
+                        timeout=30
+                    )
+                    raw_ok = raw_result.returncode == 0 and os.path.exists(raw_path)
 
                 preview_result = subprocess.run(
                     preview_cmd,
@@ -1605,7 +3479,6 @@ class ScreenshotPipeline:
                     timeout=30
                 )
 
-                raw_ok = raw_result.returncode == 0 and os.path.exists(raw_path)
                 preview_ok = preview_result.returncode == 0 and os.path.exists(preview_path)
 
                 if preview_ok:
@@ -1630,30 +3503,194 @@ class ScreenshotPipeline:
 
         return frames_info
 
-    def compute_sharpness_scores(self, frames_info: List[Dict]) -> List[Dict]:
-        """Compute sharpness scores for all frames (mutates frames_info)."""
+    def compute_quality_scores(self, frames_info: List[Dict], batch_size: int = 8) -> List[Dict]:
+        """
+        Compute quality metrics for all frames (mutates frames_info).
+
+        Frames without metrics are scored in batches with
+        QualityFilter.compute_quality_batch, using their decoded
+        AnalysisFrame if present. Each frame gets a 'quality' dict and a
+        'sharpness_score'.
+        """
+        pending = [f for f in frames_info if 'quality' not in f]
+
+        for start in range(0, len(pending), max(1, batch_size)):
+            batch = pending[start:start + max(1, batch_size)]
+            images = [
+                f['frame'].image if f.get('frame') is not None else cv2.imread(f['path'])
+                for f in batch
+            ]
+            for frame, quality in zip(batch, self.quality_filter.compute_quality_batch(images)):
+                frame['quality'] = quality
+                frame['sharpness_score'] = quality['sharpness']
+
+                # Disk-backed frames are decoded again only if they reach analysis
+                analysis_frame = frame.get('frame')
+                if analysis_frame is not None and analysis_frame.on_disk:
+                    analysis_frame.release()
+
+        return frames_info
+
+    @staticmethod
+    def dedupe_frames(frames_info: List[Dict], radius: int = 6) -> List[Dict]:
+        """
+        Mark near-duplicate frames within each scene (mutates frames_info).
+
+        Frames are visited sharpest first; each one joins the first group in
+        its scene whose leader's dHash is within `radius` bits, otherwise it
+        leads a new group. Members get 'duplicate_of' set to their leader's
+        frame number and skip the heavy models, inheriting the leader's
+        results instead.
+
+        Args:
+            frames_info: Frame dicts with sharpness scores
+            radius: Maximum Hamming distance (of 64 bits) to count as a duplicate
+
+        Returns:
+            Group leaders, in input order
+        """
+        for frame in frames_info:
+            if 'dhash' in frame:
+                continue
+            analysis_frame = frame.get('frame')
+            image = analysis_frame.image if analysis_frame is not None else cv2.imread(frame['path'])
+            frame['dhash'] = dhash(image) if image is not None else None
+            if analysis_frame is not None and analysis_frame.on_disk:
+                analysis_frame.release()
+
+        leaders_by_scene: Dict[int, List[Dict]] = {}
+        for frame in sorted(frames_info, key=lambda f: f.get('sharpness_score', 0.0), reverse=True):
+            frame.pop('duplicate_of', None)
+            leaders = leaders_by_scene.setdefault(frame.get('scene_index', 0), [])
+            if frame['dhash'] is not None:
+                for leader in leaders:
+                    if (frame['dhash'] ^ leader['dhash']).bit_count() <= radius:
+                        frame['duplicate_of'] = leader['frame_number']
+                        break
+            if 'duplicate_of' not in frame and frame['dhash'] is not None:
+                leaders.append(frame)
+
+        unique = [f for f in frames_info if 'duplicate_of' not in f]
+        logger.info(f"Dedupe: {len(frames_info) - len(unique)}/{len(frames_info)} frames are near-duplicates")
+        return unique
+
+    @staticmethod
+    def budget_score(frame: Dict) -> float:
+        """
+        Cheap pre-analysis rank of a frame from its quality metrics.
+
+        Sharpness uses VarietySelector's 50-500 normalization; the sharpest
+        tile adds credit for a sharp subject on a soft background, and
+        clipped pixels count against the frame.
+        """
+        quality = frame.get('quality', {})
+        sharpness = min(1.0, max(0.0, (frame.get('sharpness_score', 0.0) - 50) / 450))
+        tile = min(1.0, max(0.0, (quality.get('tile_sharpness', 0.0) - 50) / 1800))
+        return 0.7 * sharpness + 0.3 * tile - quality.get('clipping', 0.0) / 100
+
+    @classmethod
+    def budget_frames(cls, frames_info: List[Dict], per_scene: int) -> List[Dict]:
+        """
+        Keep the `per_scene` best frames of each scene by budget_score.
+
+        Args:
+            frames_info: Frame dicts with quality metrics
+            per_scene: Frames per scene allowed into the expensive stages
+
+        Returns:
+            Kept frames, in input order
+        """
+        by_scene: Dict[int, List[Dict]] = {}
         for frame in frames_info:
-            if 'sharpness_score' not in frame:
-                frame['sharpness_score'] = self.quality_filter.compute_sharpness_from_path(frame['path'])
+            by_scene.setdefault(frame.get('scene_index', 0), []).append(frame)
+
+        kept = set()
+        for scene_frames in by_scene.values():
+            ranked = sorted(scene_frames, key=cls.budget_score, reverse=True)
+            kept.update(id(f) for f in ranked[:per_scene])
+
+        budgeted = [f for f in frames_info if id(f) in kept]
+        logger.info(
+            f"Analysis budget: {len(budgeted)}/{len(frames_info)} frames "
+            f"({per_scene} per scene, {len(by_scene)} scenes)"
+        )
+        return budgeted
+
+    def compute_aesthetic_scores(self, frames_info: List[Dict], batch_size: int = 32) -> List[Dict]:
+        """
+        Score frames with NIMA in batches (mutates frames_info).
+
+        Sets 'nima_score' (1-10 mean of the predicted distribution) on every
+        frame. Disk-backed frames are decoded one batch at a time.
+        """
+        step = max(1, batch_size)
+        for start in range(0, len(frames_info), step):
+            batch = frames_info[start:start + step]
+            images = [
+                f['frame'].image if f.get('frame') is not None else cv2.imread(f['path'])
+                for f in batch
+            ]
+            for frame, score in zip(batch, self.quality_filter.score_aesthetics(images, batch_size=step)):
+                frame['nima_score'] = score
+
+                analysis_frame = frame.get('frame')
+                if analysis_frame is not None and analysis_frame.on_disk:
+                    analysis_frame.release()
+
         return frames_info
 
+    def compute_sharpness_scores(self, frames_info: List[Dict]) -> List[Dict]:
+        """Compute sharpness scores for all frames (mutates frames_info)."""
+        return self.compute_quality_scores(frames_info)
+
     def filter_by_quality(
         self,
         frames_info: List[Dict],
-        sharpness_threshold: float = 100.0
+        sharpness_threshold: float = 100.0,
+        quality_gates: Dict[str, Tuple[Optional[float], Optional[float]]] = None,
+        batch_size: int = 8
     ) -> List[Dict]:
-        """Filter frames by sharpness (assumes sharpness_score already computed)."""
+        """
+        Filter frames by sharpness and optional gates on other quality metrics.
+
+        Args:
+            frames_info: Frame dicts (metrics are computed if missing)
+            sharpness_threshold: Minimum 'sharpness' metric
+            quality_gates: Metric name -> (min, max), either bound may be None,
+                e.g. {'luminance': (20, 235), 'clipping': (None, 5.0)}.
+                Names are QualityFilter.METRICS.
+            batch_size: Frames per quality batch
+
+        Returns:
+            Frames passing every gate, in input order
+        """
+        gates = dict(quality_gates or {})
+        unknown = set(gates) - set(QualityFilter.METRICS)
+        if unknown:
+            raise ValueError(f"Unknown quality metrics: {sorted(unknown)} (expected {QualityFilter.METRICS})")
+
+        self.compute_quality_scores(frames_info, batch_size=batch_size)
+
         filtered = []
+        rejected = dict.fromkeys(['sharpness', *gates], 0)
 
         for frame in frames_info:
-            # Compute if not already done
-            if 'sharpness_score' not in frame:
-                frame['sharpness_score'] = self.quality_filter.compute_sharpness_from_path(frame['path'])
+            quality = frame['quality']
+            failed = [
+                name for name, (low, high) in gates.items()
+                if (low is not None and quality[name] < low) or (high is not None and quality[name] > high)
+            ]
+            if frame['sharpness_score'] < sharpness_threshold:
+                failed.append('sharpness')
 
-            if frame['sharpness_score'] >= sharpness_threshold:
+            for name in failed:
+                rejected[name] += 1
+            if not failed:
                 filtered.append(frame)
 
         logger.info(f"Quality filter: {len(filtered)}/{len(frames_info)} passed")
+        if gates:
+            logger.info("Quality filter rejections: " + ", ".join(f"{k}={v}" for k, v in rejected.items()))
         return filtered
 
     def run(
@@ -1684,7 +3721,7 @@ class ScreenshotPipeline:
 
         # Ensure models are loaded
         progress(5, "Loading models...")
-        self.load_models(options.get('ram_model_path'))
+        self.load_models(options.get('ram_model_path'), options.get('nima_model_path'))
 
         # Create output directories
         frames_dir = os.path.join(output_dir, 'frames')
@@ -1692,7 +3729,15 @@ class ScreenshotPipeline:
 
         # Phase 1: Scene Detection
         progress(10, "Detecting scenes...")
-        scenes = self.scene_detector.detect(video_path)
+        scenes = self.scene_detector.detect(
+            video_path,
+            threshold=options.get('scene_threshold', 0.5),
+            workers=options.get('scene_workers', 1),
+            on_progress=lambda done, total: progress(
+                10 + int(10 * done / total), f"Detecting scenes... {done}/{total} frames"
+            )
+        )
+        self.last_scenes = scenes
         logger.info(f"Found {len(scenes)} scenes")
 
         # Phase 2: Frame Extraction
@@ -1700,10 +3745,19 @@ class ScreenshotPipeline:
         progress(20, "Extracting frames...")
         lut_path = options.get('lut_path')
         sample_interval = options.get('sample_interval', 1.5)
+        # RAW frames: 'all' candidates, 'selected' after selection, or 'on_demand' via /export-raw
+        raw_export = options.get('raw_export', 'selected')
         frames_info = self.extract_frames(
             video_path, scenes, frames_dir,
             lut_path=lut_path,
-            sample_interval=sample_interval
+            sample_interval=sample_interval,
+            extraction_mode=options.get('extraction_mode', 'in_process'),
+            seek_strategy=options.get('seek_strategy', 'auto'),
+            memory_budget_mb=options.get('frame_memory_mb', 2048),
+            export_raw=raw_export == 'all',
+            analysis_max_side=options.get('analysis_max_side', 1920),
+            sampling=options.get('sampling', 'grid'),
+            max_per_scene=options.get('max_candidates_per_scene', 20 if options.get('sampling') == 'motion' else 0)
         )
         logger.info(f"Extracted {len(frames_info)} candidate frames")
 
@@ -1712,22 +3766,32 @@ class ScreenshotPipeline:
         # Sharpness scores typically range 50-150 for wedding footage
         progress(30, "Filtering by quality...")
 
-        # Compute sharpness for ALL frames first (needed for fallback)
-        self.compute_sharpness_scores(frames_info)
+        # Compute quality metrics for ALL frames first (needed for fallback)
+        quality_batch_size = options.get('quality_batch_size', 8)
+        self.compute_quality_scores(frames_info, batch_size=quality_batch_size)
         all_frames_with_sharpness = frames_info.copy()
 
         sharpness_threshold = options.get('sharpness_threshold', 50.0)
+        quality_gates = options.get('quality_gates')
         frames_info = self.filter_by_quality(
             frames_info,
-            sharpness_threshold=sharpness_threshold
+            sharpness_threshold=sharpness_threshold,
+            quality_gates=quality_gates,
+            batch_size=quality_batch_size
         )
 
         # Fallback: If no frames pass, guarantee at least 1 (best available)
         if not frames_info and all_frames_with_sharpness:
             logger.info("No frames passed threshold, selecting best available frame(s)")
+            # Prefer frames that at least pass the exposure/noise gates
+            fallback_pool = all_frames_with_sharpness
+            if quality_gates:
+                fallback_pool = self.filter_by_quality(
+                    all_frames_with_sharpness, sharpness_threshold=float('-inf'), quality_gates=quality_gates
+                ) or all_frames_with_sharpness
             # Sort by sharpness and take top frames
             sorted_frames = sorted(
-                all_frames_with_sharpness,
+                fallback_pool,
                 key=lambda f: f.get('sharpness_score', 0),
                 reverse=True
             )
@@ -1736,10 +3800,45 @@ class ScreenshotPipeline:
             frames_info = sorted_frames[:num_fallback]
             logger.info(f"Fallback: kept {len(frames_info)} best frames (sharpness: {frames_info[0].get('sharpness_score', 0):.1f})")
 
+        # Frames that failed the quality gate are never written
+        kept_numbers = {f['frame_number'] for f in frames_info}
+        for frame in all_frames_with_sharpness:
+            if frame['frame_number'] not in kept_numbers:
+                frame['frame'].release()
+        frames_by_number = {f['frame_number']: f['frame'] for f in frames_info}
+
         if not frames_info:
             logger.warning("No frames available")
             return []
 
+        # Phase 3.1: Near-duplicate suppression. Locked-off shots repeat the
+        # same picture every sample; only the sharpest of each group is analyzed
+        all_quality_frames = frames_info
+        dedupe_radius = options.get('dedupe_radius', 6)
+        if dedupe_radius is not None and dedupe_radius >= 0:
+            progress(31, "Removing near-duplicates...")
+            frames_info = self.dedupe_frames(frames_info, radius=dedupe_radius)
+
+        # Phase 3.2: Analysis budget. Selection keeps at most max_per_scene
+        # frames, so only the best few per scene (by cheap metrics) need the
+        # heavy models; cost then follows the scene count, not the duration
+        budget_factor = options.get('analysis_budget')
+        budget = {}
+        if budget_factor:
+            per_scene = max(1, int(np.ceil(budget_factor * options.get('max_per_scene', 3))))
+            eligible = len(frames_info)
+            frames_info = self.budget_frames(frames_info, per_scene)
+            budget = {'per_scene': per_scene, 'eligible': eligible, 'analyzed': len(frames_info)}
+
+        # Duplicates of frames left out by the budget are dropped with them
+        kept_leaders = {f['frame_number'] for f in frames_info}
+        duplicates = [f for f in all_quality_frames if f.get('duplicate_of') in kept_leaders]
+
+        # Phase 3.25: Aesthetic scoring (NIMA) on frames that passed the quality gate
+        if self.quality_filter.nima_session is not None:
+            progress(32, "Scoring aesthetics...")
+            self.compute_aesthetic_scores(frames_info, batch_size=options.get('nima_batch_size', 32))
+
         # Phase 3.5: Audio Analysis
         audio_events = []
         if options.get('analyze_audio', True):
@@ -1750,34 +3849,103 @@ class ScreenshotPipeline:
         # Phases 4-8: Analyze each frame
         candidates = []
         total_frames = len(frames_info)
-        all_embeddings = []
+        face_store = FaceStore()
+        embedding_rows = []  # FaceStore rows to cluster
         embedding_map = []  # (candidate_idx, face_idx)
+        analysis_start = time.perf_counter()
+        face_batch_size = max(1, options.get('face_batch_size', 16))
+        self.face_detector.configure(
+            modules=options.get('face_modules'),
+            min_face_area=options.get('face_min_area', 0.005),
+            min_face_score=options.get('face_min_score', 0.0),
+        )
+        self.face_detector.reset_counters()
+        self.face_tracker.reset()
+        tracker = self.face_tracker if options.get('face_tracking', True) else None
+        batch_faces = {}
+        batch_tags = {}
+        tagging = self.tagger.model is not None
+        tag_batch_size = max(1, options.get('tag_batch_size') or self.tagger.auto_batch_size()) if tagging else 1
+        lazy_tagging = tagging and options.get('lazy_tagging', True)
+        # Frames are analyzed a window at a time, large enough for a full
+        # face batch and a full tag batch
+        window = max(face_batch_size, tag_batch_size)
+        deferred = set()  # Frame numbers whose tags wait for selection
+        tag_calls = 0
 
         for i, frame in enumerate(frames_info):
             pct = 40 + int((i / total_frames) * 50)
             progress(pct, f"Analyzing frame {i+1}/{total_frames}")
 
-            # Face detection
-            faces = self.face_detector.detect(frame['path'])
+            # Face detection for the next window of frames at once, so the
+            # face models see all of their crops in a few batched calls
+            if i % window == 0:
+                batch = frames_info[i:i + window]
+                batch_faces = {}
+                for start in range(0, len(batch), face_batch_size):
+                    chunk = batch[start:start + face_batch_size]
+                    batch_faces.update(zip(
+                        range(i + start, i + start + len(chunk)),
+                        self.face_detector.detect_batch(
+                            [f['frame'].image for f in chunk],
+                            tracker=tracker,
+                            scene_indices=[f.get('scene_index', 0) for f in chunk],
+                            store=face_store
+                        )
+                    ))
+
+                # Tagging in one RAM++ call per tag batch, done early for
+                # category classification. With lazy_tagging, frames whose
+                # faces already make them 'people_face' wait: their tags
+                # cannot change the category or the selection
+                to_tag = []
+                for j, f in enumerate(batch, start=i):
+                    image = f['frame'].image
+                    if image is None or not tagging:
+                        continue
+                    if lazy_tagging and has_clear_face(batch_faces.get(j, []), image.shape[1], image.shape[0]):
+                        deferred.add(f['frame_number'])
+                    else:
+                        to_tag.append(j)
+                batch_tags = dict(zip(
+                    to_tag,
+                    self.tagger.tag_batch([frames_info[j]['frame'].image for j in to_tag], batch_size=tag_batch_size)
+                ))
+                tag_calls += len(to_tag)
+
+            # Decode once, shared by all analysis stages
+            analysis_frame = frame['frame']
+            image = analysis_frame.image
+            if image is None:
+                logger.warning(f"Could not decode frame {frame['frame_number']}")
+                continue
 
-            # Tagging (do early for category classification)
-            tags = self.tagger.tag(frame['path'])
+            faces = batch_faces.pop(i, [])
+            tags = batch_tags.pop(i, [])
 
-            # Classify into 4 categories
+            # Classify into 4 categories (in analysis pixels)
+            img_height, img_width = image.shape[:2]
             frame_category = classify_frame_category(
                 [f.to_dict() if isinstance(f, FaceData) else f for f in faces],
-                tags
+                tags, img_width, img_height
             )
             is_broll = frame_category in ['broll', 'detail']
 
-            # Collect embeddings for clustering
-            for face_idx, face in enumerate(faces):
-                if face.embedding:
-                    all_embeddings.append(np.array(face.embedding))
-                    embedding_map.append((len(candidates), face_idx))
-
             # Smart cropping
-            crops = self.cropper.generate_crops(frame['path'], faces)
+            crops = self.cropper.generate_crops_array(image, faces)
+
+            # Map faces and crops back to source pixels for export
+            scale = analysis_frame.scale
+            source_width = int(round(img_width * scale))
+            source_height = int(round(img_height * scale))
+            if scale != 1.0:
+                faces = [f.scaled(scale) for f in faces]
+                crops = {k: v.scaled(scale, source_width, source_height) for k, v in crops.items()}
+
+            # In-memory frames stay decoded until selection decides whether
+            # they are written; disk-backed frames can be re-read
+            if analysis_frame.on_disk:
+                analysis_frame.release()
 
             # Audio analysis for this frame
             timestamp = frame['timestamp']
@@ -1792,7 +3960,10 @@ class ScreenshotPipeline:
                 timestamp=timestamp,
                 image_path=frame['path'],  # LUT preview for display/ML
                 sharpness_score=frame.get('sharpness_score', 0.0),
+                quality=frame.get('quality', {}),
                 raw_path=frame.get('raw_path'),  # Original LOG/RAW for final export
+                nima_score=frame.get('nima_score', 0.0),
+                aesthetic_score=max(0.0, (frame.get('nima_score', 0.0) - 1.0) / 9.0),
                 faces=[f.to_dict() if isinstance(f, FaceData) else f for f in faces],
                 tags=tags,
                 crops={k: v.to_dict() if isinstance(v, CropCoordinates) else v for k, v in crops.items()},
@@ -1806,14 +3977,30 @@ class ScreenshotPipeline:
             candidate_dict['audio_type'] = audio_type
             candidate_dict['audio_intensity'] = audio_intensity
             candidate_dict['frame_category'] = frame_category
+            candidate_dict['source_width'] = source_width
+            candidate_dict['source_height'] = source_height
 
             candidates.append(candidate_dict)
 
+        # Recognition once per face track, shared by all of its faces
+        track_embeddings = self.face_detector.embed_tracks(tracker) if tracker is not None else {}
+
+        # Collect embeddings for clustering
+        for cand_idx, candidate in enumerate(candidates):
+            for face_idx, face in enumerate(candidate['faces']):
+                if not face_store.has_embedding(face.index) and face.get('track_id') in track_embeddings:
+                    face_store.set_embedding(face.index, track_embeddings[face.get('track_id')])
+                if face_store.has_embedding(face.index):
+                    embedding_rows.append(face.index)
+                    embedding_map.append((cand_idx, face_idx))
+
+        analysis_seconds = time.perf_counter() - analysis_start
+
         # Phase 10: Face Clustering
         progress(92, "Clustering faces...")
-        if all_embeddings:
+        if embedding_rows:
             cluster_labels = self.clusterer.cluster(
-                all_embeddings,
+                face_store.embeddings(embedding_rows),
                 eps=options.get('cluster_eps', 0.5),
                 min_samples=options.get('cluster_min_samples', 2)
             )
@@ -1829,6 +4016,58 @@ class ScreenshotPipeline:
             cluster_info = self.clusterer.get_cluster_info()
             logger.info(f"Found {len(cluster_info)} face clusters")
 
+        # Near-duplicates inherit their leader's analysis (after clustering,
+        # so they get its cluster labels without adding embeddings)
+        candidates_by_number = {c['frame_number']: c for c in candidates}
+        for frame in duplicates:
+            leader = candidates_by_number.get(frame['duplicate_of'])
+            if leader is None:
+                continue
+            timestamp = frame['timestamp']
+            audio_event = self.audio_analyzer.get_event_at_timestamp(timestamp)
+            duplicate = copy.deepcopy(leader)
+            duplicate.update(
+                frame_number=frame['frame_number'],
+                timestamp=timestamp,
+                image_path=frame['path'],
+                raw_path=frame.get('raw_path'),
+                sharpness_score=frame.get('sharpness_score', 0.0),
+                quality=frame.get('quality', {}),
+                duplicate_of=frame['duplicate_of'],
+                is_audio_peak=self.audio_analyzer.is_audio_peak(timestamp, threshold=0.6),
+                audio_type=audio_event.event_type if audio_event else None,
+                audio_intensity=self.audio_analyzer.get_energy_at_timestamp(timestamp),
+            )
+            candidates.append(duplicate)
+        candidates.sort(key=lambda c: c['frame_number'])
+
+        skipped = len(duplicates)
+        self.last_dedupe = {
+            'frames': total_frames + skipped,
+            'analyzed': total_frames,
+            'duplicates': skipped,
+            'groups': len({f['duplicate_of'] for f in duplicates}),
+            'skipped_inference': {
+                'face_detection': skipped if self.face_detector.app is not None else 0,
+                'tagging': skipped if self.tagger.model is not None else 0,
+                'saliency': skipped if self.cropper.session is not None else 0,
+                'nima': skipped if self.quality_filter.nima_session is not None else 0,
+            },
+            'estimated_seconds_saved': round(analysis_seconds / max(1, total_frames) * skipped, 2),
+        }
+        if skipped:
+            logger.info(
+                f"Dedupe: skipped heavy models on {skipped} frames "
+                f"(~{self.last_dedupe['estimated_seconds_saved']:.1f}s saved)"
+            )
+
+        self.last_face_analysis = copy.deepcopy(self.face_detector.counters)
+        if self.last_face_analysis['gated']:
+            logger.info(
+                f"Face gate: {self.last_face_analysis['gated']}/{self.last_face_analysis['faces']} faces "
+                f"skipped recognition and landmarks"
+            )
+
         # Phase 11: Variety Selection
         # Select BEST frames per scene with category diversity (hard cap)
         progress(95, "Selecting best frames...")
@@ -1836,7 +4075,8 @@ class ScreenshotPipeline:
             selected_candidates = self.variety_selector.select(
                 candidates,
                 min_per_scene=options.get('min_per_scene', 1),   # At least 1 per scene
-                max_per_scene=options.get('max_per_scene', 3)    # HARD cap at 3 per scene
+                max_per_scene=options.get('max_per_scene', 3),   # HARD cap at 3 per scene
+                min_eye_open=options.get('min_eye_open', 0.0)
             )
         else:
             # Keep ALL candidates - user will cull in lightbox
@@ -1844,6 +4084,57 @@ class ScreenshotPipeline:
             for c in selected_candidates:
                 c['selection_reasons'] = ['quality_passed']
 
+        # Deferred tagging: only kept frames whose tags were postponed. A
+        # duplicate takes its leader's tags, like the rest of its analysis
+        pending = {}
+        for c in selected_candidates:
+            source = c['frame_number'] if c.get('duplicate_of') is None else c['duplicate_of']
+            if source in deferred:
+                pending.setdefault(source, []).append(c)
+        if pending:
+            progress(95, "Tagging selected frames...")
+            numbers = sorted(pending)
+            images = [frames_by_number[n].image for n in numbers]
+            for number, tags in zip(numbers, self.tagger.tag_batch(images, batch_size=tag_batch_size)):
+                for c in pending[number]:
+                    c['tags'] = tags
+        self.last_tagging = {
+            'frames': total_frames,
+            'tagged': tag_calls + len(pending),
+            'deferred': len(deferred),
+            'tagged_after_selection': len(pending),
+            'skipped': len(deferred) - len(pending),
+        }
+        if deferred:
+            logger.info(
+                f"Lazy tagging: {self.last_tagging['skipped']}/{total_frames} frames never needed RAM++"
+            )
+
+        # Write in-memory frames once, only for selected candidates
+        for c in selected_candidates:
+            frames_by_number[c['frame_number']].save()
+        for analysis_frame in frames_by_number.values():
+            analysis_frame.release()
+
+        # Deferred RAW export: one batched decode for the kept frames only.
+        # Also needed without a LUT when analysis frames were scaled down.
+        downscaled = any(f.scale != 1.0 for f in frames_by_number.values())
+        if (lut_path or downscaled) and raw_export == 'selected' and selected_candidates:
+            progress(96, "Exporting RAW frames...")
+            raw_paths = self.export_raw_frames(
+                video_path,
+                sorted(c['frame_number'] for c in selected_candidates),
+                os.path.join(frames_dir, 'raw'),
+                seek_strategy=options.get('seek_strategy', 'auto')
+            )
+            for c in selected_candidates:
+                c['raw_path'] = raw_paths.get(c['frame_number'])
+            logger.info(f"RAW export: {len(raw_paths)}/{len(candidates)} analyzed frames encoded")
+
+        # Faces leave the FaceStore as plain dicts for JSON and the API
+        for c in selected_candidates:
+            c['faces'] = [f.to_dict() if isinstance(f, FaceRecord) else f for f in c['faces']]
+
         # Save results
         progress(98, "Saving results...")
         results_path = os.path.join(output_dir, 'results.json')
@@ -1854,6 +4145,10 @@ class ScreenshotPipeline:
                 'total_scenes': len(scenes),
                 'total_analyzed': len(candidates),
                 'total_selected': len(selected_candidates),
+                'dedupe': self.last_dedupe,
+                'analysis_budget': budget,
+                'face_analysis': self.last_face_analysis,
+                'tagging': self.last_tagging,
                 'audio_events': [e.to_dict() for e in audio_events],
                 'candidates': selected_candidates,
             }, f, indent=2)
@@ -0,0 +1,142 @@
+"""
+On-disk cache of per-frame scene transition probabilities.
+
+TransNetV2 inference is the expensive part of scene detection; turning its
+per-frame probabilities into scenes at a given threshold takes milliseconds.
+Caching the raw probabilities by video content means re-detecting a clip
+(another threshold, a second /analyze, /detect-scenes after /analyze) skips
+inference entirely.
+
+The motion signal used for motion-aware frame sampling is stored the same
+way, under its own key prefix.
+
+Entries are .npy files named by content fingerprint. The cache is bounded by
+total size and evicts least recently used entries first.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'screenshot_tool', 'scene_predictions')
+
+# Bytes hashed at each of the start, middle and end of the file
+FINGERPRINT_CHUNK = 1024 * 1024
+
+
+def video_fingerprint(video_path: str) -> str:
+    """
+    Content fingerprint of a video file.
+
+    Hashes the file size plus 1 MB from the start, middle and end, so
+    multi-GB camera files are keyed in milliseconds while renames, copies
+    and re-imports of the same clip still hit the cache.
+    """
+    size = os.path.getsize(video_path)
+    digest = hashlib.sha1(str(size).encode())
+
+    with open(video_path, 'rb') as f:
+        for offset in (0, max(0, size // 2 - FINGERPRINT_CHUNK // 2), max(0, size - FINGERPRINT_CHUNK)):
+            f.seek(offset)
+            digest.update(f.read(FINGERPRINT_CHUNK))
+
+    return digest.hexdigest()
+
+
+class ScenePredictionCache:
+    """Size-bounded LRU cache of prediction arrays on disk."""
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir or os.environ.get('SCREENSHOT_TOOL_CACHE_DIR') or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()  # key -> size, oldest first
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Rebuild LRU order from the last-used times of existing entries
+        existing = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.npy'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                existing.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(existing):
+            self._entries[key] = size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Cached predictions for key, or None (counts a hit or miss)."""
+        with self._lock:
+            if key in self._entries:
+                try:
+                    predictions = np.load(self._path(key))
+                    os.utime(self._path(key))  # Persist recency across restarts
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return predictions
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Dropping unreadable scene cache entry {key}: {e}")
+                    self._remove(key)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, predictions: np.ndarray):
+        """Store predictions, evicting least recently used entries over the size limit."""
+        with self._lock:
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, np.asarray(predictions, dtype=np.float32))
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not write scene cache entry {key}: {e}")
+                return
+
+            self._entries[key] = os.path.getsize(path)
+            self._entries.move_to_end(key)
+
+            while sum(self._entries.values()) > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        self._entries.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'size_bytes': sum(self._entries.values()),
+                'max_bytes': self.max_bytes,
+            }
@@ -74,9 +74,48 @@ class AnalyzeRequest(BaseModel):
     Options dict supports:
         - lut_path (str): Path to LUT file for LOG footage (e.g., Sony S-Log3 to Rec.709)
         - sharpness_threshold (float): Minimum sharpness score (default: 100.0, use lower for LOG)
+        - quality_gates (dict): Metric -> [min, max] (either may be null) checked before face
+          detection and tagging, e.g. {"luminance": [20, 235], "clipping": [null, 5]}. Metrics:
+          sharpness, tile_sharpness, luminance, clipping (%), contrast, noise
+        - quality_batch_size (int): Frames per batched quality computation (default: 8)
         - ram_model_path (str): Path to RAM++ model weights
+        - tag_batch_size (int): Frames per RAM++ inference batch (default: sized to free memory,
+          at most 32)
+        - lazy_tagging (bool): Skip RAM++ during analysis for frames whose faces already make them
+          people_face, and tag only those that are selected (default: true)
+        - nima_model_path (str): Path to NIMA aesthetic model (default: models/nima.onnx)
+        - nima_batch_size (int): Frames per NIMA inference batch (default: 32)
+        - face_batch_size (int): Frames whose face crops share batched landmark, gender/age and
+          recognition inference (default: 16)
+        - face_modules (list): Face modules run after detection (default: all of landmark_3d_68,
+          landmark_2d_106, genderage, recognition)
+        - face_min_area (float): Faces smaller than this fraction of the frame keep only their
+          detection box, keypoints and score (default: 0.005, i.e. 0.5%, 0 disables)
+        - face_min_score (float): Detection score a face needs for the face modules (default: 0.0)
+        - face_tracking (bool): Link faces across consecutive samples of a scene and run recognition
+          once per track, on its best observation (default: true)
+        - dedupe_radius (int): dHash Hamming radius (of 64 bits) for near-duplicate frames within
+          a scene (default: 6, -1 disables). Duplicates reuse the sharpest frame's analysis
+        - analysis_budget (float): Only the best ceil(analysis_budget * max_per_scene) frames per scene,
+          ranked by sharpness/clipping, run the heavy models (default: off, analyze all)
+        - min_eye_open (float): Drop frames where a face's eye_open (0-1) is below this before
+          selection scoring, unless the whole scene blinks (default: 0.0, off; 0.3 rejects blinks)
         - cluster_eps (float): DBSCAN epsilon for face clustering (default: 0.5)
         - cluster_min_samples (int): Min samples per cluster (default: 2)
+        - extraction_mode (str): LUT preview extraction - 'in_process' (default, .cube only),
+          'single_pass' or 'per_frame' FFmpeg
+        - seek_strategy (str): 'auto' (default), 'seek' or 'sequential' OpenCV extraction without a LUT
+        - frame_memory_mb (float): Decoded frames kept in memory between stages (default: 2048)
+        - scene_threshold (float): TransNetV2 transition threshold (default: 0.5, cached predictions)
+        - scene_workers (int): Processes for chunk-parallel scene detection on CPU (default: 1)
+        - sampling (str): Candidate placement - 'grid' (default, every sample_interval) or 'motion'
+          (dense where a low-resolution change signal moves, sparse where it doesn't, snapped
+          to locally still frames)
+        - max_candidates_per_scene (int): Per-scene candidate cap (default: 20 with 'motion', else none)
+        - raw_export (str): RAW/LOG frames with a LUT - 'selected' (default, after selection),
+          'all' candidates, or 'on_demand' via /export-raw
+        - analysis_max_side (int): Long edge of frames used for ML analysis (default: 1920, 0 = source).
+          Faces and crops are returned in source pixels; sharpness is normalized to a 1920px long edge
     """
     video_path: str = Field(..., description="Path to video file")
     output_dir: str = Field(..., description="Directory for output files")
@@ -91,6 +130,9 @@ class AnalyzeResponse(BaseModel):
     errors: List[str] = Field(default_factory=list)
     total_scenes: int = 0
     total_candidates: int = 0
+    dedupe: Dict[str, Any] = Field(default_factory=dict)
+    face_analysis: Dict[str, Any] = Field(default_factory=dict)
+    tagging: Dict[str, Any] = Field(default_factory=dict)
 
 
 class HealthResponse(BaseModel):
@@ -101,18 +143,21 @@ class HealthResponse(BaseModel):
     current_job: Optional[str] = None
     job_progress: int = 0
     job_message: str = ""
+    scene_cache: Dict[str, Any] = Field(default_factory=dict)
 
 
 class DetectScenesRequest(BaseModel):
     """Request model for scene detection."""
     video_path: str
     threshold: float = 0.5
+    workers: int = 1
 
 
 class DetectScenesResponse(BaseModel):
     """Response model for scene detection."""
     success: bool
     scenes: List[Dict] = Field(default_factory=list)
+    cache: Dict[str, Any] = Field(default_factory=dict)
     error: Optional[str] = None
 
 
@@ -153,6 +198,7 @@ class QualityScoreResponse(BaseModel):
     success: bool
     sharpness: float = 0.0
     is_sharp: bool = False
+    quality: Dict[str, float] = Field(default_factory=dict)
     error: Optional[str] = None
 
 
@@ -171,6 +217,21 @@ class ClusterFacesResponse(BaseModel):
     error: Optional[str] = None
 
 
+class ExportRawRequest(BaseModel):
+    """Request model for deferred RAW frame export."""
+    video_path: str
+    output_dir: str
+    frame_numbers: List[int]
+    seek_strategy: str = 'auto'
+
+
+class ExportRawResponse(BaseModel):
+    """Response model for deferred RAW frame export."""
+    success: bool
+    frames: List[Dict] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
 class ProgressResponse(BaseModel):
     """Response model for job progress."""
     job_id: Optional[str] = None
@@ -195,6 +256,7 @@ async def startup_event():
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
+    scene_cache = state.pipeline.scene_detector.cache if state.pipeline else None
     return HealthResponse(
         status="healthy",
         models_loaded=state.models_loaded,
@@ -202,18 +264,19 @@ async def health_check():
         current_job=state.current_job,
         job_progress=state.job_progress,
         job_message=state.job_message,
+        scene_cache=scene_cache.stats() if scene_cache else {},
     )
 
 
 # Load models explicitly
 @app.post("/load-models")
-async def load_models(ram_model_path: Optional[str] = None):
+async def load_models(ram_model_path: Optional[str] = None, nima_model_path: Optional[str] = None):
     """Explicitly load all ML models."""
     try:
         if state.pipeline is None:
             state.pipeline = ScreenshotPipeline(device=get_device())
 
-        state.pipeline.load_models(ram_model_path)
+        state.pipeline.load_models(ram_model_path, nima_model_path)
         state.models_loaded = True
 
         return {"success": True, "message": "Models loaded successfully"}
@@ -289,8 +352,11 @@ async def analyze_video(request: AnalyzeRequest):
             success=True,
             job_id=job_id,
             candidates=candidates,
-            total_scenes=len(state.pipeline.scene_detector.detect(request.video_path)) if state.pipeline else 0,
+            total_scenes=len(state.pipeline.last_scenes),
             total_candidates=len(candidates),
+            dedupe=state.pipeline.last_dedupe,
+            face_analysis=state.pipeline.last_face_analysis,
+            tagging=state.pipeline.last_tagging,
         )
 
     except Exception as e:
@@ -313,14 +379,19 @@ async def detect_scenes(request: DetectScenesRequest):
                 error=f"Video file not found: {request.video_path}"
             )
 
-        detector = SceneDetector(device=get_device())
+        # Shared detector: the model loads once and predictions are cached,
+        # so re-detecting at another threshold skips inference
+        if state.pipeline is None:
+            state.pipeline = ScreenshotPipeline(device=get_device())
+        detector = state.pipeline.scene_detector
         detector.load()
 
-        scenes = detector.detect(request.video_path, threshold=request.threshold)
+        scenes = detector.detect(request.video_path, threshold=request.threshold, workers=request.workers)
 
         return DetectScenesResponse(
             success=True,
-            scenes=[{"start": s[0], "end": s[1]} for s in scenes]
+            scenes=[{"start": s[0], "end": s[1]} for s in scenes],
+            cache=detector.cache.stats() if detector.cache else {},
         )
 
     except Exception as e:
@@ -475,6 +546,37 @@ async def generate_crops(request: GenerateCropsRequest):
         return GenerateCropsResponse(success=False, error=str(e))
 
 
+# Deferred RAW export endpoint
+@app.post("/export-raw", response_model=ExportRawResponse)
+async def export_raw(request: ExportRawRequest):
+    """Export full-quality RAW/LOG frames for frames the user kept."""
+    try:
+        if not os.path.exists(request.video_path):
+            return ExportRawResponse(
+                success=False,
+                error=f"Video file not found: {request.video_path}"
+            )
+
+        if state.pipeline is None:
+            state.pipeline = ScreenshotPipeline(device=get_device())
+
+        raw_paths = state.pipeline.export_raw_frames(
+            request.video_path,
+            request.frame_numbers,
+            request.output_dir,
+            seek_strategy=request.seek_strategy,
+        )
+
+        return ExportRawResponse(
+            success=True,
+            frames=[{"frame_number": n, "raw_path": p} for n, p in sorted(raw_paths.items())]
+        )
+
+    except Exception as e:
+        logger.error(f"RAW export failed: {e}")
+        return ExportRawResponse(success=False, error=str(e))
+
+
 # Quality scoring endpoint
 @app.post("/quality-score", response_model=QualityScoreResponse)
 async def get_quality_score(request: QualityScoreRequest):
@@ -487,12 +589,14 @@ async def get_quality_score(request: QualityScoreRequest):
             )
 
         quality_filter = QualityFilter()
-        sharpness = quality_filter.compute_sharpness_from_path(request.image_path)
+        quality = quality_filter.compute_quality_from_path(request.image_path)
+        sharpness = quality['sharpness']
 
         return QualityScoreResponse(
             success=True,
             sharpness=sharpness,
             is_sharp=sharpness >= 100.0,
+            quality=quality,
         )
 
     except Exception as e:
@@ -105,12 +105,264 @@ def test_quality_filter():
     print_result("Sharpness comparison", passed,
                 f"Sharp={sharp_score:.2f}, Blurry={blurry_score:.2f}")
 
-    return passed
+    # Scores are measured at a 1920px long edge, so 4K and 1080p agree
+    pattern = cv2.resize(np.tile(sharp_image, (11, 20, 1)), (1920, 1080), interpolation=cv2.INTER_NEAREST)
+    uhd_image = cv2.resize(pattern, (3840, 2160), interpolation=cv2.INTER_NEAREST)
+    hd_score = qf.compute_sharpness(pattern)
+    uhd_score = qf.compute_sharpness(uhd_image)
+    normalized = abs(uhd_score - hd_score) <= 0.01 * hd_score
+    print_result("Resolution normalization", normalized,
+                f"1080p={hd_score:.2f}, UHD={uhd_score:.2f}")
+
+    # Batched metrics match single-frame scoring and flag exposure/noise
+    midtone = pattern // 2 + 64
+    dark = midtone // 16
+    blown = np.full_like(midtone, 255)
+    blown[:, :960] = midtone[:, :960]
+    noisy = np.clip(np.full_like(pattern, 128) + np.random.default_rng(0).normal(0, 8, pattern.shape), 0, 255).astype(np.uint8)
+    batch = qf.compute_quality_batch([midtone, dark, blown, noisy, None])
+    reference = cv2.Laplacian(cv2.cvtColor(midtone, cv2.COLOR_BGR2GRAY), cv2.CV_64F).var()
+    batched = (
+        abs(batch[0]["sharpness"] - reference) <= 1e-6 * reference
+        and batch[4]["sharpness"] == 0.0
+    )
+    metrics = (
+        batch[1]["luminance"] < 20 < batch[0]["luminance"]
+        and batch[2]["clipping"] > 40 > batch[0]["clipping"]
+        and batch[3]["noise"] > 3 > batch[0]["noise"]
+        and batch[0]["contrast"] > batch[1]["contrast"]
+    )
+    print_result("Batched quality metrics", batched and metrics,
+                f"Luma={batch[1]['luminance']:.1f}, clipped={batch[2]['clipping']:.1f}%, noise={batch[3]['noise']:.2f}")
+
+    # Near-duplicates: same picture with sensor noise groups under the sharpest
+    from screenshot_tool.pipeline import ScreenshotPipeline, AnalysisFrame
+    rng = np.random.default_rng(1)
+    shots = [midtone, np.clip(midtone + rng.normal(0, 3, midtone.shape), 0, 255).astype(np.uint8), noisy[:, ::-1]]
+    frames = [
+        {'frame_number': i, 'scene_index': 0, 'sharpness_score': score, 'path': '', 'frame': AnalysisFrame('', image=shot)}
+        for i, (shot, score) in enumerate(zip(shots, [100.0, 200.0, 150.0]))
+    ]
+    unique = ScreenshotPipeline.dedupe_frames(frames, radius=6)
+    deduped = [f['frame_number'] for f in unique] == [1, 2] and frames[0].get('duplicate_of') == 1
+    print_result("Near-duplicate grouping", deduped,
+                f"Kept {[f['frame_number'] for f in unique]}, frame 0 -> {frames[0].get('duplicate_of')}")
+
+    return passed and normalized and batched and metrics and deduped
+
+
+def test_lut():
+    """Test .cube parsing and in-process LUT application."""
+    print("\n4. Testing LUT application...")
+
+    import numpy as np
+    from screenshot_tool.lut import load_cube
+
+    # Write a 17-point LUT that inverts each channel (red runs fastest)
+    size = 17
+    levels = np.linspace(0.0, 1.0, size)
+    with tempfile.NamedTemporaryFile('w', suffix=".cube", delete=False) as f:
+        f.write(f"LUT_3D_SIZE {size}\n")
+        for b in levels:
+            for g in levels:
+                for r in levels:
+                    f.write(f"{1 - r:.6f} {1 - g:.6f} {1 - b:.6f}\n")
+        lut_path = f.name
+
+    try:
+        lut = load_cube(lut_path)
+        image = np.random.randint(0, 255, (64, 64, 3), dtype=np.uint8)
+        expected = 255 - image.astype(int)
+
+        passed = True
+        for interpolation in ['tetrahedral', 'trilinear']:
+            graded = lut.apply(image, interpolation).astype(int)
+            max_diff = int(np.abs(graded - expected).max())
+            ok = graded.shape == image.shape and max_diff <= 1
+            print_result(f"Invert LUT ({interpolation})", ok, f"Max diff: {max_diff}")
+            passed = passed and ok
+
+        return passed
+
+    except Exception as e:
+        print_result("LUT application", False, str(e))
+        return False
+
+    finally:
+        os.unlink(lut_path)
+
+
+def test_scene_cache():
+    """Test scene prediction cache hits, misses and LRU eviction."""
+    print("\n5. Testing scene prediction cache...")
+
+    import shutil
+    import numpy as np
+    from screenshot_tool.scene_cache import ScenePredictionCache
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        predictions = np.random.rand(1000).astype(np.float32)  # ~4 KB per entry
+        cache = ScenePredictionCache(cache_dir, max_bytes=10 * 1024)
+
+        cache.put('a', predictions)
+        cache.put('b', predictions)
+        hit = cache.get('a')  # 'a' becomes most recently used
+        cache.put('c', predictions)  # Over the limit: evicts 'b'
+        miss = cache.get('b')
+
+        round_trip = hit is not None and np.array_equal(hit, predictions)
+        print_result("Round trip", round_trip)
+
+        stats = cache.stats()
+        lru = miss is None and cache.get('c') is not None and stats['evictions'] == 1
+        print_result("LRU eviction", lru, f"Entries: {stats['entries']}, evictions: {stats['evictions']}")
+
+        # A new instance picks up the entries left on disk
+        reopened = ScenePredictionCache(cache_dir, max_bytes=10 * 1024)
+        counters = cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1 and reopened.get('a') is not None
+        print_result("Counters and persistence", counters,
+                    f"Hits: {cache.stats()['hits']}, misses: {cache.stats()['misses']}")
+
+        return round_trip and lru and counters
+
+    except Exception as e:
+        print_result("Scene prediction cache", False, str(e))
+        return False
+
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def test_cut_detector():
+    """Test the CPU cut detector on a clip with one hard cut."""
+    print("\n6. Testing fast cut detector...")
+
+    from screenshot_tool.cut_detector import FastCutDetector
+
+    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as f:
+        video_path = f.name
+
+    try:
+        # 1.5 s test pattern, hard cut to 1.5 s colour bars (24 fps -> cut at frame 36)
+        result = subprocess.run([
+            'ffmpeg', '-y', '-v', 'error',
+            '-f', 'lavfi', '-i', 'testsrc2=size=320x180:rate=24:duration=1.5',
+            '-f', 'lavfi', '-i', 'smptebars=size=320x180:rate=24:duration=1.5',
+            '-filter_complex', '[0:v][1:v]concat=n=2:v=1[v]', '-map', '[v]',
+            '-c:v', 'libx264', '-pix_fmt', 'yuv420p', video_path
+        ], capture_output=True, text=True)
+        if result.returncode != 0:
+            print_result("Encode test clip", False, result.stderr[-200:])
+            return False
+
+        scenes = FastCutDetector().detect(video_path)
+        passed = len(scenes) == 2 and scenes[1][0] == 36 and scenes[-1][1] == 71
+        print_result("Hard cut", passed, f"Scenes: {scenes}")
+
+        # Motion sampling: 20 s static then 10 s of fast change at 24 fps
+        import numpy as np
+        from screenshot_tool.pipeline import ScreenshotPipeline
+        motion = np.r_[np.full(480, 0.001), np.full(240, 0.06)]
+        samples = ScreenshotPipeline._motion_samples(motion, 0, len(motion) - 1, 24.0, 1.5)
+        static = sum(f < 480 for f in samples)
+        sampled = static <= 5 and len(samples) - static >= 3 * static
+        capped = len(ScreenshotPipeline._motion_samples(motion, 0, len(motion) - 1, 24.0, 1.5, max_samples=8)) <= 8
+        print_result("Motion-aware sampling", sampled and capped,
+                    f"Static 20 s: {static}, busy 10 s: {len(samples) - static}")
+        return passed and sampled and capped
+
+    except Exception as e:
+        print_result("Fast cut detector", False, str(e))
+        return False
+
+    finally:
+        os.unlink(video_path)
+
+
+def test_face_tracker():
+    """Test that faces are linked across consecutive samples of a scene."""
+    print("\n7. Testing face tracker...")
+
+    import numpy as np
+    from insightface.app.common import Face
+    from screenshot_tool.pipeline import FaceTracker
+
+    def face(x, y, size=100, score=0.9):
+        box = np.array([x, y, x + size, y + size], dtype=np.float32)
+        kps = np.array([[0.3, 0.4], [0.7, 0.4], [0.5, 0.6], [0.35, 0.8], [0.65, 0.8]], dtype=np.float32) * size + [x, y]
+        return Face(bbox=box, kps=kps, det_score=score)
+
+    tracker = FaceTracker()
+    first = [face(100, 100), face(400, 100)]
+    second = [face(410, 105), face(108, 96), face(800, 300)]  # Both moved a little, one new
+    third = [face(110, 100)]  # Next scene
+    tracker.update(0, first)
+    tracker.update(0, second)
+    tracker.update(1, third)
+
+    ids = [[f['track_id'] for f in sample] for sample in (first, second, third)]
+    linked = ids == [[0, 1], [1, 0, 2], [3]]
+    print_result("Track association", linked, f"Track ids per sample: {ids}")
+
+    for sample in (first, second):
+        for f in sample:
+            tracker.offer(f['track_id'], FaceTracker.observation_quality(f), lambda f=f: f.bbox)
+    best = tracker.observations == 5 and len(tracker.best) == 3
+    print_result("One recognition crop per track", best,
+                f"{tracker.observations} observations, {len(tracker.best)} crops")
+
+    return linked and best
+
+
+def test_expressions():
+    """Test vectorized smile and blink scores and blink rejection."""
+    print("\n8. Testing expression scoring...")
+
+    import numpy as np
+    from screenshot_tool.expression import score_expressions
+    from screenshot_tool.pipeline import VarietySelector
+
+    def face(lid_gap: float, corner_y: float) -> np.ndarray:
+        points = np.zeros((106, 2))
+        for center_x, corners, lids, pupil in [(30, (35, 39), ((36, 41), (33, 40), (37, 42)), 38),
+                                               (70, (89, 93), ((90, 95), (87, 94), (91, 96)), 88)]:
+            points[pupil] = (center_x, 40)
+            points[list(corners)] = [(center_x - 8, 40), (center_x + 8, 40)]
+            for x, (upper, lower) in zip((-4, 0, 4), lids):
+                points[upper] = (center_x + x, 40 - lid_gap)
+                points[lower] = (center_x + x, 40 + lid_gap)
+        points[[52, 61, 57, 66]] = [(30, corner_y), (70, corner_y), (50, 70), (50, 80)]
+        return points
+
+    faces = np.stack([face(3.0, 75), face(0.5, 75), face(3.0, 72)])  # Open, blink, smile
+    scores = score_expressions(faces)
+    single = score_expressions(faces[2:3])
+    scored = (
+        scores['eye_open'][0] > 0.9 > 0.1 > scores['eye_open'][1]
+        and scores['smile'][2] > scores['smile'][0]
+        and np.allclose(single['smile'], scores['smile'][2:])
+    )
+    print_result("Smile and eye openness", scored,
+                f"Eyes open={scores['eye_open'][0]:.2f}, blink={scores['eye_open'][1]:.2f}, "
+                f"smile {scores['smile'][0]:.2f} -> {scores['smile'][2]:.2f}")
+
+    # The sharper frame blinks, so the selector takes the other one
+    candidates = [
+        {'frame_number': n, 'timestamp': n, 'scene_index': 0, 'sharpness_score': sharpness,
+         'frame_category': 'people_face', 'faces': [{'bbox': [0, 0, 200, 200], 'eye_open': eye_open}]}
+        for n, sharpness, eye_open in [(0, 500, 0.05), (48, 200, 0.8)]
+    ]
+    selected = VarietySelector().select(candidates, max_per_scene=1, min_eye_open=0.3)
+    rejected = [c['frame_number'] for c in selected] == [48]
+    print_result("Blink rejection", rejected, f"Selected frames: {[c['frame_number'] for c in selected]}")
+
+    return scored and rejected
 
 
 def test_server_startup():
     """Test that the server can start and respond to health checks."""
-    print("\n4. Testing server startup...")
+    print("\n9. Testing server startup...")
 
     # Start server in background
     python_path = sys.executable
@@ -144,7 +396,7 @@ def test_server_startup():
 
 def test_quality_endpoint(server_proc):
     """Test the quality scoring endpoint."""
-    print("\n5. Testing quality endpoint...")
+    print("\n10. Testing quality endpoint...")
 
     import numpy as np
     import cv2
@@ -180,7 +432,7 @@ def test_quality_endpoint(server_proc):
 
 def test_crops_endpoint(server_proc):
     """Test the smart cropping endpoint."""
-    print("\n6. Testing smart cropping endpoint...")
+    print("\n11. Testing smart cropping endpoint...")
 
     import numpy as np
     import cv2
@@ -251,18 +503,38 @@ def main():
         if not test_quality_filter():
             all_passed = False
 
-        # Test 4: Server startup
+        # Test 4: LUT application
+        if not test_lut():
+            all_passed = False
+
+        # Test 5: Scene prediction cache
+        if not test_scene_cache():
+            all_passed = False
+
+        # Test 6: Fast cut detector
+        if not test_cut_detector():
+            all_passed = False
+
+        # Test 7: Face tracker
+        if not test_face_tracker():
+            all_passed = False
+
+        # Test 8: Expression scoring
+        if not test_expressions():
+            all_passed = False
+
+        # Test 9: Server startup
         passed, server_proc = test_server_startup()
         if not passed:
             all_passed = False
             print("\nCritical: Server failed to start. Stopping.")
             return 1
 
-        # Test 5: Quality endpoint
+        # Test 10: Quality endpoint
         if not test_quality_endpoint(server_proc):
             all_passed = False
 
-        # Test 6: Crops endpoint
+        # Test 11: Crops endpoint
         if not test_crops_endpoint(server_proc):
             all_passed = False
 